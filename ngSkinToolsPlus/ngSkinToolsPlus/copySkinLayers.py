@@ -58,6 +58,13 @@ from ngSkinTools.ui.uiWrappers import DropDownField, RadioButtonField, CheckBoxF
 from ngSkinTools.doclink import SkinToolsDocs
 from ngSkinTools.log import LoggerFactory
 
+from ngSkinToolsPlus.lib.layerWeights import SparseLayerWeights
+from ngSkinToolsPlus.lib.parallel import getProcessCount
+from ngSkinToolsPlus.lib.profiling import profiler
+from ngSkinToolsPlus.lib.scheduler import Scheduler
+from ngSkinToolsPlus.lib.skinWeights import MayaSkinClusterWeights
+from ngSkinToolsPlus.utilities.transferSession import TransferSession, BatchTransferSession, CopyLayersJob
+
 
 #===============================================================================
 # UI - similar options to Maya's copySkinWeightsOptions UI
@@ -88,6 +95,8 @@ class CopyLayersTab(BaseTab):
     
     def __init__(self):
         BaseTab.__init__(self)
+        # copy running in the background
+        self.scheduler = None
         
     def createUI(self, parent):
         # base layout
@@ -142,6 +151,20 @@ class CopyLayersTab(BaseTab):
         self.controls.normalization.addOption('Off')
         self.controls.normalization.endRebuildItems()
         
+        self.createFixedTitledRow(group, 'Re-copy')
+        self.controls.incremental = CheckBoxField(self.VAR_PREFIX+'incremental', label='Update changed layers only', defaultValue=0,
+                                                  annotation='Update layers copied before in place, skipping layers that did not change')
+        
+        # "Off" copies in the background, inside Maya
+        # more processes transfer layers in parallel, but block Maya until done
+        self.createFixedTitledRow(group, 'Worker processes')
+        self.controls.processes = DropDownField(self.VAR_PREFIX+'processes')
+        self.controls.processes.beginRebuildItems()
+        self.controls.processes.addOption('Off')
+        for processes in getProcessCountOptions():
+            self.controls.processes.addOption(str(processes))
+        self.controls.processes.endRebuildItems()
+        
     def createInfluenceAssociationGroup(self):
         '''
         '''
@@ -168,7 +191,12 @@ class CopyLayersTab(BaseTab):
     
     def copySkinLayers(self, *args):
         '''
+        starts copying in the background, the progress window's cancel (Esc) stops it
         '''
+        if self.scheduler is not None and self.scheduler.isRunning():
+            mc.warning('Copy Skin Layers is still running, cancel it first.')
+            return
+        
         uv = None
         #=======================================================================
         # get layers that we want to copy
@@ -193,12 +221,9 @@ class CopyLayersTab(BaseTab):
         elif self.controls.radioClosestComponent.getValue():
             surfaceAssociation = 'closestComponent'
         elif self.controls.radioUVSpace.getValue():
+            # uv sets are queried per mesh below
             surfaceAssociation = 'closestPoint'
-            uvSets = mc.polyUVSet(q=True, currentUVSet=True)
-            if len(uvSets) > 0:
-                srcSet = uvSets[0]
-                destSet = uvSets[-1]
-                uv = srcSet, destSet
+            uv = True
         else:
             mc.warning('Unknown surface association')
             
@@ -221,6 +246,12 @@ class CopyLayersTab(BaseTab):
         
         normalize = 1 - self.controls.normalization.getValue()
         
+        incremental = bool(self.controls.incremental.getValue())
+        
+        processes = 1
+        if self.controls.processes.getValue():
+            processes = int(self.controls.processes.getSelectedText())
+        
         '''
         print surfaceAssociation
         print sampleSpace
@@ -235,6 +266,11 @@ class CopyLayersTab(BaseTab):
         else:
             mc.error('Select source mesh, then shift-select destination mesh.')
         
+        if uv:
+            # use current uv set of each mesh
+            uv = (mc.polyUVSet(srcMeshName, q=True, currentUVSet=True)[0],
+                  mc.polyUVSet(destMeshName, q=True, currentUVSet=True)[0])
+        
         args = [srcMeshName, destMeshName, layerLister, 
                influenceAssociation, surfaceAssociation, 
                sampleSpace, normalize]
@@ -242,9 +278,18 @@ class CopyLayersTab(BaseTab):
         if uv:
             args.append(uv)
         
-        copySkinLayers(*args)
+        def selectDestination(scheduler=None):
+            mc.select(destMeshName)
         
-        mc.select(destMeshName)
+        if processes > 1:
+            # worker processes can't run in the background, the copy blocks until done
+            copySkinLayers(*args, incremental=incremental, processes=processes)
+            selectDestination()
+            return
+        
+        self.scheduler = copySkinLayersInBackground(*args, incremental=incremental, onDone=selectDestination)
+        if self.scheduler is None:
+            selectDestination()
         
     def closeWindow(self, *args):
         '''
@@ -277,29 +322,12 @@ def soloLayer(mll, layerId):
         
 def queryWeights(skn, mesh):
     '''
-    returns skinCluster's weights in the format
-    [[influence 0 weights], [influence 1 weights], ...]
+    returns skinCluster's weights as a (influences x vertices) float32 matrix,
+    so that weights[influenceId] gives the weights of one influence
     '''
-    # The skinPercent command gives us a list of influence weights for each vertex
-    # but we need to convert it into a list of vertex weights for each influence!!!
-    
-    influenceWeightsPerVert = []
-    
-    vertCount = mc.polyEvaluate(mesh, v=True)
-    
-    for vertId in range(vertCount):
-        # query influenceWeights for this vert
-        # and append to list
-        influenceWeightsPerVert.append(mc.skinPercent(skn, mesh+'.vtx[%d]'%vertId, q=True, v=True))
-        
-    vertWeightsPerInfluence = []
-    
-    influenceCount = len(mc.skinCluster(skn, q=True, inf=True))
-        
-    for influenceId in range(influenceCount):
-        vertWeightsPerInfluence.append([influenceWeights[influenceId] for influenceWeights in influenceWeightsPerVert])
-        
-    return vertWeightsPerInfluence
+    # read the whole skinCluster in one call,
+    # instead of calling skinPercent on every vertex
+    return profiler.wrap(MayaSkinClusterWeights(skn, mesh), 'skinCluster').getWeights()
 
 
 def getLayerName(mll, layerId):
@@ -313,19 +341,30 @@ def getLayerName(mll, layerId):
             return layerName
      
      
-def setInfluenceWeight(skn, mesh, influenceName, weightList):
+def getProcessCountOptions():
     '''
-    Set weights on influence using a float list
+    worker process counts offered in the UI: powers of two, and one per cpu
     '''
-    for vertId in range(len(weightList)):
-        if weightList[vertId]:
-            mc.skinPercent(skn, mesh+'.vtx[%d]'%vertId, transformValue=[influenceName, weightList[vertId]])
+    cpuCount = getProcessCount()
+    options = []
+    processes = 2
+    while processes < cpuCount:
+        options.append(processes)
+        processes *= 2
+    if cpuCount > 1:
+        options.append(cpuCount)
+    return options
 
 
-def copySkinLayers(srcMeshName, destMeshName, layers, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv=None):
+def copySkinLayers(srcMeshName, destMeshName, layers, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv=None, incremental=False, processes=None):
     '''
     layers [list] - ids of layers to be copied
     if layers is [], all layers will be copied
+    incremental - update layers copied before in place, transferring only
+                  layers that changed since (native association methods only,
+                  copySkinWeights always creates new layers)
+    processes - number of worker processes transferring layers
+                (None for one per cpu, 1 to compute in Maya, see lib.parallel)
     '''
     srcMll = MllInterface()
     destMll = MllInterface()
@@ -340,21 +379,104 @@ def copySkinLayers(srcMeshName, destMeshName, layers, influenceAssociation, surf
     if layers == []:
         layers = [layerId for layerId, _ in srcMll.listLayers()]
         layers.reverse()
-        
+    
+    # compute vertex and influence correspondence once for all layers
+    session = TransferSession(srcMll, destMll, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv,
+                              processes=getProcessCount(processes))
+    if session.isSupported():
+        session.copyLayers(layers, incremental)
+        return
+    
+    # fall back to copySkinWeights for the remaining association methods
     for eachLayer in layers:
-        copySkinLayerById(srcMll, destMll, eachLayer, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv)
+        copySkinLayerById(srcMll, destMll, eachLayer, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv, session)
      
 
-def copySkinLayerById(srcMll, destMll, srcLayerId, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv=None):
+def copySkinLayersInBackground(srcMeshName, destMeshName, layers, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv=None, incremental=False, onDone=None, executor=None):
+    '''
+    same as copySkinLayers, without blocking Maya:
+    meshes and layers are read right away, layers are transferred in a worker thread,
+    and written to the destination one by one while Maya is idle.
+    the progress window can be cancelled (Esc), layers written until then are kept
+    
+    onDone - onDone(scheduler), called when the copy is done or cancelled
+    executor - runs main thread callbacks (see lib.scheduler)
+    returns the started Scheduler, or None if the association methods need copySkinWeights
+    (layers are copied before returning then)
+    '''
+    srcMll = MllInterface()
+    destMll = MllInterface()
+    
+    srcMll.setCurrentMesh(srcMeshName)
+    destMll.setCurrentMesh(destMeshName)
+    
+    # check that selected objects are valid
+    if False in (srcMll.getLayersAvailable(), destMll.getLayersAvailable()):
+        mc.error("Skinning layers must be initialized on both source and destination meshes")
+    
+    if layers == []:
+        layers = [layerId for layerId, _ in srcMll.listLayers()]
+        layers.reverse()
+    
+    session = TransferSession(srcMll, destMll, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv)
+    if not session.isSupported():
+        copySkinLayers(srcMeshName, destMeshName, layers, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv)
+        return None
+    
+    job = CopyLayersJob(session, layers, incremental, cancellable=True)
+    scheduler = Scheduler(job, executor, isCancelled=profiler.isCancelled, onDone=onDone)
+    scheduler.start()
+    return scheduler
+
+
+def copySkinLayersToMany(srcMeshName, destMeshNames, layers, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv=None, processes=1, incremental=False):
+    '''
+    copies layers from srcMeshName to every mesh in destMeshNames (e.g. LODs or clothing variants)
+    source layers are read, and source spatial search built, once for all destinations
+    layers [list] - ids of layers to be copied
+    if layers is [], all layers will be copied
+    processes - number of worker processes computing destination mappings
+                (1 to compute in Maya, None for one per cpu)
+    incremental - see copySkinLayers
+    '''
+    srcMll = MllInterface()
+    srcMll.setCurrentMesh(srcMeshName)
+    
+    destMlls = []
+    for destMeshName in destMeshNames:
+        destMll = MllInterface()
+        destMll.setCurrentMesh(destMeshName)
+        destMlls.append(destMll)
+    
+    # check that selected objects are valid
+    if False in [mll.getLayersAvailable() for mll in [srcMll] + destMlls]:
+        mc.error("Skinning layers must be initialized on both source and destination meshes")
+    
+    if layers == []:
+        layers = [layerId for layerId, _ in srcMll.listLayers()]
+        layers.reverse()
+    
+    batch = BatchTransferSession(srcMll, destMlls, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv, processes)
+    if batch.isSupported():
+        batch.copyLayers(layers, incremental)
+        return
+    
+    # fall back to copySkinWeights, one destination at a time
+    for destMeshName in destMeshNames:
+        copySkinLayers(srcMeshName, destMeshName, layers, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv)
+
+def copySkinLayerById(srcMll, destMll, srcLayerId, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv=None, session=None):
     '''
     Actual work is done here. Copies an individual layer from srcMll to destMll
+    session [TransferSession] - reuse vertex correspondence between calls (optional)
     '''
+    if session is None:
+        session = TransferSession(srcMll, destMll, influenceAssociation, surfaceAssociation, sampleSpace, normalize, uv)
+    
+    srcMll = profiler.wrap(srcMll, 'srcMll')
+    destMll = profiler.wrap(destMll, 'destMll')
     
     layerName = getLayerName(srcMll, srcLayerId)
-
-    mc.progressWindow(title='Copy layer: %s' % layerName,
-                      progress=0, min=0, max=6,
-                      status='Get layer mask')
     
     srcMeshName, srcSkn = srcMll.getTargetInfo()
     destMeshName, destSkn = destMll.getTargetInfo()
@@ -375,106 +497,73 @@ def copySkinLayerById(srcMll, destMll, srcLayerId, influenceAssociation, surface
     if False in (srcMll.getLayersAvailable(), destMll.getLayersAvailable()):
         mc.error("Skinning layers must be initialized on both source and destination meshes")
     
-    # solo layer on srcMesh
-    disableLayers = soloLayer(srcMll, srcLayerId)
-    
-    # save mask weights
-    origMaskWeights = srcMll.getLayerMask(srcLayerId)
-    
-    # temporarily flood mask to 1, so that we can transfer all the data inside this layer
-    srcMll.setLayerMask(srcLayerId, [])
-    
-    #===========================================================================
-    # Transfer influence weights
-    #===========================================================================
-    mc.progressWindow(e=True, status='Get influence weights', step=1)
-    
-    # use maya's copySkinWeights command to transfer weights
-    mc.copySkinWeights(**kwargs)
-    
-    # query and catch weights
-    mc.progressWindow(e=True, status='Transfer influence weights', step=1)
-    destInfluenceWeights = queryWeights(destSkn, destMeshName)
-    
-    #===========================================================================
-    # Transfer mask weights
-    # This is very messed up, but it's the simplest workaround I can think of...
-    # Basically, we create a new joint "tempSkinLayerMaskTransferer_jnt" bound to both skins
-    # This ensures that we can transfer the mask weights by joint name,
-    # even if influence weights are transfered by other methods
-    #===========================================================================
-    
-    mc.select(cl=True)
-    mc.progressWindow(e=True, status='Transfer layer mask', step=1)
-    if origMaskWeights:
-        # create tempJnt
-        tempJnt = mc.joint(n='layerMaskTransfer_tempJnt')
-        mc.skinCluster(srcSkn, edit=True, addInfluence=tempJnt)
-        
-        # also create an additional tempJnt to hold the "reversed" weights
-        tempHoldJnt = mc.joint(n='layerMaskTransferHold_tempJnt')
-        mc.skinCluster(srcSkn, edit=True, addInfluence=tempHoldJnt, weight=1, lockWeights=True)
-        mc.skinCluster(srcSkn, inf=tempHoldJnt, e=True, lockWeights=False);
-        
-        # apply mask weights to tempJnt
-        setInfluenceWeight(srcSkn, srcMeshName, tempJnt, origMaskWeights)
-        
-        # use maya's copySkinWeights command, with name as influence association
-        mc.skinCluster(destSkn, edit=True, addInfluence=tempJnt)
-        mc.skinCluster(destSkn, edit=True, addInfluence=tempHoldJnt)
-        kwargs['ia'] = 'name'
-        mc.copySkinWeights(**kwargs)
-        
-        # query and catch weights
-        destMaskWeights = queryWeights(destSkn, destMeshName)[-2]
-        
-        # remove tempJnt
-        mc.skinCluster(srcSkn, edit=True, removeInfluence=tempJnt)
-        mc.skinCluster(srcSkn, edit=True, removeInfluence=tempHoldJnt)
-        mc.skinCluster(destSkn, edit=True, removeInfluence=tempJnt)
-        mc.skinCluster(destSkn, edit=True, removeInfluence=tempHoldJnt)
-        mc.delete(tempJnt) # automatically deletes the holdJnt as well since it is a child
-    else:
-        # if origMaskWeights was uninitialized, just use []
-        destMaskWeights = []
-    
-    #===========================================================================
-    # Reset original skin layer
-    #===========================================================================
-    
-    # reset mask to original weights
-    srcMll.setLayerMask(srcLayerId, origMaskWeights)
-    
-    # un-solo layer
-    for layerId in disableLayers:
-        srcMll.setLayerEnabled(layerId, True)
-    
-    #===========================================================================
-    # Add layer to destination skin
-    #===========================================================================
-    # print destInfluenceWeights
-    mc.progressWindow(e=True, status='Set influence weights', step=1)
-    destLayerId = destMll.createLayer(layerName, forceEmpty=True)
-    
-    influenceCount = len(mc.skinCluster(destSkn, q=True, inf=True))
-    
-    layerInfluences = list(destMll.listLayerInfluences(destLayerId, False))
-    if len(layerInfluences) != influenceCount:
-        mc.error('SkinCluster %s has %d influences. But SkinLayer has %s influences.\
-                Try rebinding this mesh.' % (destSkn, influenceCount, len(layerInfluences)))
-    
-    # set influence weights
-    for influenceId in range(influenceCount):
-        weights = destInfluenceWeights[influenceId]
-        layerInfluenceId = layerInfluences[influenceId][1]
-        # check if the influence has non-zero values, to reduce number of calls
-        if not all(val==0 for val in weights):
-            destMll.setInfluenceWeights(destLayerId, layerInfluenceId, weights)
-        
-    # set mask weights
-    mc.progressWindow(e=True, status='Set layer mask', step=1)
-    destMll.setLayerMask(destLayerId, destMaskWeights)
-    
-    mc.progressWindow(endProgress=True)
-    
-    print 'Sucessfully copied layer %s' % layerName
\ No newline at end of file
+    with profiler.scope(source=srcMeshName, destination=destMeshName, layer=layerName):
+        profiler.beginProgress('Copy layer: %s' % layerName, 6)
+        try:
+            disableLayers = []
+            origMaskWeights = None
+            try:
+                with profiler.phase('Get layer mask'):
+                    # solo layer on srcMesh
+                    disableLayers = soloLayer(srcMll, srcLayerId)
+                    
+                    # save mask weights
+                    origMaskWeights = srcMll.getLayerMask(srcLayerId)
+                    
+                    # temporarily flood mask to 1, so that we can transfer all the data inside this layer
+                    srcMll.setLayerMask(srcLayerId, [])
+                
+                #===============================================================
+                # Transfer influence weights
+                #===============================================================
+                with profiler.phase('Transfer influence weights'):
+                    # use maya's copySkinWeights command to transfer weights
+                    profiler.wrap(mc, 'mc').copySkinWeights(**kwargs)
+                
+                with profiler.phase('Get influence weights'):
+                    # query and catch weights
+                    destInfluenceWeights = queryWeights(destSkn, destMeshName)
+                
+                #===============================================================
+                # Transfer mask weights
+                # Masks are interpolated directly with the session's vertex correspondence,
+                # so we don't need to touch the scene or the skinClusters' influences
+                #===============================================================
+                with profiler.phase('Transfer layer mask'):
+                    destMaskWeights = session.transferMask(origMaskWeights)
+            finally:
+                #===============================================================
+                # Reset original skin layer, even if the transfer failed
+                #===============================================================
+                with profiler.phase('Reset source layer'):
+                    # reset mask to original weights
+                    if origMaskWeights is not None:
+                        srcMll.setLayerMask(srcLayerId, origMaskWeights)
+                    
+                    # un-solo layer
+                    for layerId in disableLayers:
+                        srcMll.setLayerEnabled(layerId, True)
+            
+            #===================================================================
+            # Add layer to destination skin
+            #===================================================================
+            with profiler.phase('Set layer weights'):
+                destLayerId = destMll.createLayer(layerName, forceEmpty=True)
+                
+                influenceCount = len(destInfluenceWeights)
+                
+                layerInfluences = list(destMll.listLayerInfluences(destLayerId, False))
+                if len(layerInfluences) != influenceCount:
+                    mc.error('SkinCluster %s has %d influences. But SkinLayer has %s influences.\
+                            Try rebinding this mesh.' % (destSkn, influenceCount, len(layerInfluences)))
+                
+                # only influences with non-zero weights are stored, so they are found from
+                # the row pointers instead of scanning every influence's weights
+                layer = SparseLayerWeights.fromDense([influenceName for influenceName, _ in layerInfluences],
+                                                     [influenceIndex for _, influenceIndex in layerInfluences],
+                                                     destInfluenceWeights, destMaskWeights, name=layerName)
+                layer.toMll(destMll, destLayerId)
+        finally:
+            profiler.endProgress()
+    
+    print 'Successfully copied layer %s' % layerName
\ No newline at end of file
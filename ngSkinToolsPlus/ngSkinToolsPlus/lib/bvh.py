@@ -0,0 +1,245 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Bounding volume hierarchy for batched spatial queries with numpy.
+
+The tree is a complete binary tree stored in heap order
+(children of node i are 2i+1 and 2i+2), built by median splits one whole
+level at a time, so building it is a handful of array operations per level
+instead of a recursive python build.
+
+Queries are not run one point at a time: the whole batch walks down the
+tree together as a frontier of (query, node) pairs, pruned on every level.
+The tree does not know what its primitives are; callers pass a function
+that measures primitives (triangles, points, segments...).
+'''
+import numpy as np
+
+
+def sortIntoNodes(centers, depth):
+    '''
+    top-down median split: on every level, the primitives of each node are
+    sorted along the longest axis of the node, so that the first half goes
+    to the left child and the second half to the right child.
+    all nodes of a level are split at once.
+
+    returns primitive order and start index of each leaf in that order
+    '''
+    primitiveCount = len(centers)
+    leafCount = 2 ** depth
+    starts = (np.arange(leafCount + 1) * primitiveCount) // leafCount
+    order = np.arange(primitiveCount)
+
+    for level in range(depth):
+        # start of each node on this level, in the current order
+        nodeStarts = starts[::2 ** (depth - level)]
+        sizes = np.diff(nodeStarts)
+        filled = sizes > 0
+        nodeIds = np.repeat(np.arange(len(sizes)), sizes)
+
+        sortedCenters = centers[order]
+        lower = np.full((len(sizes), 3), np.inf)
+        upper = np.full((len(sizes), 3), -np.inf)
+        lower[filled] = np.minimum.reduceat(sortedCenters, nodeStarts[:-1][filled], axis=0)
+        upper[filled] = np.maximum.reduceat(sortedCenters, nodeStarts[:-1][filled], axis=0)
+        axis = np.argmax(upper - lower, axis=1)
+
+        key = sortedCenters[np.arange(primitiveCount), axis[nodeIds]]
+        order = order[np.lexsort((key, nodeIds))]
+
+    return order, starts
+
+
+def boxSqDistance(points, lower, upper):
+    '''
+    squared distance from points[i] to box (lower[i], upper[i])
+    empty boxes (lower > upper) are infinitely far away
+    '''
+    delta = np.maximum(lower - points, 0) + np.maximum(points - upper, 0)
+    sqDistance = np.einsum('ij,ij->i', delta, delta)
+    sqDistance[(lower > upper).any(axis=1)] = np.inf
+    return sqDistance
+
+
+def lineBoxDistance(origins, inverseDirections, lower, upper, maxDistance=np.inf):
+    '''
+    smallest abs(t) at which line origins[i] + t * directions[i] touches box (lower[i], upper[i])
+    (slab test, with both directions allowed)
+    inf if the line misses the box, or only touches it further away than maxDistance
+    '''
+    with np.errstate(invalid='ignore'):
+        t1 = (lower - origins) * inverseDirections
+        t2 = (upper - origins) * inverseDirections
+    # fmin/fmax ignore the nans we get for lines lying exactly on a slab plane
+    tNear = np.fmax.reduce(np.fmin(t1, t2), axis=1)
+    tFar = np.fmin.reduce(np.fmax(t1, t2), axis=1)
+
+    distance = np.where((tNear <= 0) & (tFar >= 0), 0.0, np.minimum(np.abs(tNear), np.abs(tFar)))
+    distance[(tNear > tFar) | (distance > maxDistance) | (lower > upper).any(axis=1)] = np.inf
+    return distance
+
+
+def selectClosest(queryIds, candidateIds, sqDistances):
+    '''
+    for every unique queryId, picks the candidate with the smallest distance
+    returns queryIds, candidateIds, sqDistances of the winners
+    '''
+    order = np.lexsort((sqDistances, queryIds))
+    queryIds = queryIds[order]
+    first = np.ones(len(queryIds), dtype=bool)
+    first[1:] = queryIds[1:] != queryIds[:-1]
+    return queryIds[first], candidateIds[order][first], sqDistances[order][first]
+
+
+class BVH(object):
+    '''
+    bounding volume hierarchy over a set of primitive bounding boxes
+    '''
+
+    def __init__(self, lower, upper, leafSize=8):
+        '''
+        lower, upper - (n x 3) bounding box corners of each primitive
+        leafSize - max number of primitives per leaf
+        '''
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+        primitiveCount = len(lower)
+        if not primitiveCount:
+            raise ValueError('Cannot build BVH without primitives')
+
+        self.primitiveCount = primitiveCount
+
+        # number of leaves must be a power of two to get a complete tree
+        self.depth = int(np.ceil(np.log2(max(1.0, np.ceil(primitiveCount / float(leafSize))))))
+        leafCount = 2 ** self.depth
+        self.leafOffset = leafCount - 1
+
+        # spread primitives evenly over the leaves
+        order, starts = sortIntoNodes((lower + upper) * 0.5, self.depth)
+        sizes = np.diff(starts)
+        self.leafPrimitives = np.full((leafCount, max(1, sizes.max())), -1, dtype=np.int64)
+        slots = np.arange(primitiveCount) - np.repeat(starts[:-1], sizes)
+        self.leafPrimitives[np.repeat(np.arange(leafCount), sizes), slots] = order
+
+        # leaf bounds
+        valid = self.leafPrimitives >= 0
+        leafLower = np.where(valid[..., None], lower[self.leafPrimitives], np.inf).min(axis=1)
+        leafUpper = np.where(valid[..., None], upper[self.leafPrimitives], -np.inf).max(axis=1)
+
+        # internal node bounds, one tree level at a time
+        self.nodeLower = np.empty((self.leafOffset + leafCount, 3))
+        self.nodeUpper = np.empty((self.leafOffset + leafCount, 3))
+        self.nodeLower[self.leafOffset:] = leafLower
+        self.nodeUpper[self.leafOffset:] = leafUpper
+        for level in reversed(range(self.depth)):
+            start = 2 ** level - 1
+            end = 2 ** (level + 1) - 1
+            children = slice(2 * start + 1, 2 * end + 1)
+            self.nodeLower[start:end] = np.minimum(self.nodeLower[children][0::2], self.nodeLower[children][1::2])
+            self.nodeUpper[start:end] = np.maximum(self.nodeUpper[children][0::2], self.nodeUpper[children][1::2])
+
+    def testLeaves(self, queryIds, leafIds, measure):
+        '''
+        measures all primitives in leafIds against queryIds
+        returns closest primitive per unique query
+        '''
+        primitives = self.leafPrimitives[leafIds]
+        queryIds = np.repeat(queryIds, primitives.shape[1])
+        primitives = primitives.ravel()
+        valid = primitives >= 0
+        queryIds = queryIds[valid]
+        primitives = primitives[valid]
+        return selectClosest(queryIds, primitives, measure(queryIds, primitives))
+
+    def nearest(self, points, measure, chunkSize=16384):
+        '''
+        finds the closest primitive to each point
+
+        measure(queryIds, primitiveIds) - returns squared distances
+            from points[queryIds] to primitives primitiveIds
+        chunkSize - number of points processed at once, to keep memory bounded
+
+        returns primitive ids and squared distances
+        '''
+        points = np.asarray(points, dtype=np.float64)
+
+        def boxDistance(queryIds, nodes):
+            return boxSqDistance(points[queryIds], self.nodeLower[nodes], self.nodeUpper[nodes])
+
+        return self.search(len(points), boxDistance, measure, chunkSize)
+
+    def raycast(self, origins, directions, measure, maxDistance=np.inf, chunkSize=16384):
+        '''
+        finds the closest primitive hit by each line origins[i] + t * directions[i],
+        i.e. rays are cast both forwards and backwards
+
+        measure(queryIds, primitiveIds) - returns abs(t) of the hit,
+            or inf if the line misses the primitive
+        maxDistance - ignore hits further away than this
+
+        returns primitive ids (-1 for misses) and abs(t) of the hits
+        '''
+        origins = np.asarray(origins, dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            inverseDirections = 1.0 / np.asarray(directions, dtype=np.float64)
+
+        def boxDistance(queryIds, nodes):
+            return lineBoxDistance(origins[queryIds], inverseDirections[queryIds],
+                                   self.nodeLower[nodes], self.nodeUpper[nodes], maxDistance)
+
+        primitives, distances = self.search(len(origins), boxDistance, measure, chunkSize)
+        primitives[distances > maxDistance] = -1
+        return primitives, distances
+
+    def search(self, queryCount, boxDistance, measure, chunkSize):
+        '''
+        generic closest primitive search
+
+        boxDistance(queryIds, nodes) - lower bound of measure for anything inside nodes
+        measure(queryIds, primitiveIds) - distance from queries to primitives
+        '''
+        bestPrimitive = np.full(queryCount, -1, dtype=np.int64)
+        bestDistance = np.full(queryCount, np.inf)
+
+        for chunkStart in range(0, queryCount, chunkSize):
+            chunk = np.arange(chunkStart, min(chunkStart + chunkSize, queryCount))
+            self.searchChunk(chunk, boxDistance, measure, bestPrimitive, bestDistance)
+
+        return bestPrimitive, bestDistance
+
+    def searchChunk(self, queryIds, boxDistance, measure, bestPrimitive, bestDistance):
+        '''
+        updates bestPrimitive/bestDistance for queryIds
+        '''
+        def update(queries, primitives, distances):
+            better = distances < bestDistance[queries]
+            bestPrimitive[queries[better]] = primitives[better]
+            bestDistance[queries[better]] = distances[better]
+
+        # greedy descent to a nearby leaf first,
+        # so that we start the full search with a tight upper bound
+        nodes = np.zeros(len(queryIds), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes + 1
+            leftDistance = boxDistance(queryIds, left)
+            rightDistance = boxDistance(queryIds, left + 1)
+            nodes = np.where(leftDistance <= rightDistance, left, left + 1)
+        update(*self.testLeaves(queryIds, nodes - self.leafOffset, measure))
+
+        # exact search, pruning anything further away than the best so far
+        nodes = np.zeros(len(queryIds), dtype=np.int64)
+        while len(queryIds):
+            distance = boxDistance(queryIds, nodes)
+            keep = distance < bestDistance[queryIds]
+            queryIds = queryIds[keep]
+            nodes = nodes[keep]
+
+            isLeaf = nodes >= self.leafOffset
+            if isLeaf.any():
+                update(*self.testLeaves(queryIds[isLeaf], nodes[isLeaf] - self.leafOffset, measure))
+
+            queryIds = np.repeat(queryIds[~isLeaf], 2)
+            nodes = 2 * np.repeat(nodes[~isLeaf], 2) + 1
+            nodes[1::2] += 1
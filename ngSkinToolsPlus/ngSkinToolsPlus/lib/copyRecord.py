@@ -0,0 +1,71 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Record of copied layers, stored on the destination skinCluster
+as a json string attribute.
+
+For every source skinCluster, the record holds a hash of the copy
+parameters, and for every copied source layer the hash of its content
+and the id of the destination layer it was written to:
+
+{srcSkinCluster: {'parameters': hash,
+                  'layers': {srcLayerId: [layerHash, destLayerId]}}}
+
+so that a re-copy only has to transfer layers that changed.
+'''
+import json
+
+try:
+    import maya.cmds as mc
+except ImportError:
+    mc = None
+
+RECORD_ATTRIBUTE = 'ngSkinToolsPlusCopyRecord'
+
+
+def readCopyRecord(skinCluster):
+    '''
+    returns record stored on skinCluster ({} if nothing was copied to it yet)
+    '''
+    if not mc.attributeQuery(RECORD_ATTRIBUTE, node=skinCluster, exists=True):
+        return {}
+    data = mc.getAttr('%s.%s' % (skinCluster, RECORD_ATTRIBUTE))
+    try:
+        return json.loads(data) if data else {}
+    except ValueError:
+        # unreadable record, everything gets copied again
+        return {}
+
+
+def writeCopyRecord(skinCluster, record):
+    '''
+    stores record on skinCluster
+    '''
+    if not mc.attributeQuery(RECORD_ATTRIBUTE, node=skinCluster, exists=True):
+        mc.addAttr(skinCluster, longName=RECORD_ATTRIBUTE, dataType='string')
+    mc.setAttr('%s.%s' % (skinCluster, RECORD_ATTRIBUTE), json.dumps(record, sort_keys=True), type='string')
+
+
+def getCopiedLayers(record, source, parameters):
+    '''
+    returns {srcLayerId: [layerHash, destLayerId]} of layers copied from source
+    if the copy parameters changed since, layer hashes are None
+    (layers have to be transferred again, but destination layers can still be reused)
+    '''
+    entry = record.get(source, {})
+    copied = dict((int(layerId), list(value)) for layerId, value in entry.get('layers', {}).items())
+    if entry.get('parameters') != parameters:
+        for value in copied.values():
+            value[0] = None
+    return copied
+
+
+def setCopiedLayers(record, source, parameters, copied):
+    '''
+    replaces entry of source in record
+    copied - {srcLayerId: [layerHash, destLayerId]}
+    '''
+    record[source] = {'parameters': parameters,
+                      'layers': dict((str(layerId), value) for layerId, value in copied.items())}
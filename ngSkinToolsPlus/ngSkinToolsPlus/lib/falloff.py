@@ -0,0 +1,102 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Falloff weights between two loops of points, numpy only.
+
+Same result as lofting a poly strip between the loops, weighting the
+inner loop to 1, and copying the weights to a mesh by closest point,
+without building anything in the scene.
+'''
+import numpy as np
+
+from ngSkinToolsPlus.lib.bvh import BVH
+from ngSkinToolsPlus.lib.geometry import triangleBounds, closestPointOnTriangles, sqDistanceToTriangles
+
+
+def catmullRomLoop(points, subdivisions=8):
+    '''
+    closed smooth curve through points, as a polyline
+    with subdivisions segments between every two points
+    '''
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if len(points) < 3:
+        return points
+
+    p0 = np.roll(points, 1, axis=0)
+    p1 = points
+    p2 = np.roll(points, -1, axis=0)
+    p3 = np.roll(points, -2, axis=0)
+
+    t = (np.arange(subdivisions) / float(subdivisions))[None, :, None]
+    t2 = t * t
+    t3 = t2 * t
+    curve = 0.5 * (2 * p1[:, None] + (p2 - p0)[:, None] * t +
+                   (2 * p0 - 5 * p1 + 4 * p2 - p3)[:, None] * t2 +
+                   (3 * p1 - p0 - 3 * p2 + p3)[:, None] * t3)
+    return curve.reshape(-1, 3)
+
+
+def resampleLoop(points, count):
+    '''
+    count points evenly spaced along closed polyline, starting at its first point
+    '''
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    closed = np.vstack((points, points[:1]))
+    lengths = np.sqrt(((closed[1:] - closed[:-1]) ** 2).sum(axis=1))
+    distances = np.concatenate(([0.0], np.cumsum(lengths)))
+
+    samples = np.arange(count) * (distances[-1] / count)
+    segments = np.clip(np.searchsorted(distances, samples, side='right') - 1, 0, len(points) - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(lengths[segments] > 0, (samples - distances[segments]) / lengths[segments], 0.0)
+    return closed[segments] + (closed[segments + 1] - closed[segments]) * t[:, None]
+
+
+def stripMesh(outerPoints, innerPoints, subdivisions=8):
+    '''
+    strip of triangles between two loops
+    returns points, triangles, and parameter per point (0 on outer loop, 1 on inner loop)
+    '''
+    outer = catmullRomLoop(outerPoints, subdivisions)
+    inner = catmullRomLoop(innerPoints, subdivisions)
+
+    # both loops get the same number of points, like rebuilding the curves before lofting
+    count = max(len(outer), len(inner))
+    outer = resampleLoop(outer, count)
+    inner = resampleLoop(inner, count)
+
+    ids = np.arange(count)
+    nextIds = np.roll(ids, -1)
+    triangles = np.vstack((np.column_stack((ids, nextIds, count + ids)),
+                           np.column_stack((nextIds, count + nextIds, count + ids))))
+    parameters = np.concatenate((np.zeros(count), np.ones(count)))
+    return np.vstack((outer, inner)), triangles, parameters
+
+
+def stripFalloff(meshPoints, outerPoints, innerPoints, loops=0, subdivisions=8):
+    '''
+    returns weight per mesh point: 0 at the outer loop, rising to 1 at the inner loop
+    (and beyond, for points closest to the inside edge of the strip)
+
+    loops [int]: number of loops the strip would have
+            0 means the falloff spans the whole strip
+            1 means falloff after 50%, etc...
+    '''
+    meshPoints = np.asarray(meshPoints, dtype=np.float64).reshape(-1, 3)
+    points, triangles, parameters = stripMesh(outerPoints, innerPoints, subdivisions)
+
+    def measure(queryIds, triangleIds):
+        corners = triangles[triangleIds]
+        return sqDistanceToTriangles(meshPoints[queryIds], points[corners[:, 0]],
+                                     points[corners[:, 1]], points[corners[:, 2]])
+
+    triangleIds, _ = BVH(*triangleBounds(points, triangles)).nearest(meshPoints, measure)
+
+    # interpolate strip parameter at the closest point
+    corners = triangles[triangleIds]
+    _, bary = closestPointOnTriangles(meshPoints, points[corners[:, 0]],
+                                      points[corners[:, 1]], points[corners[:, 2]])
+    parameter = (bary * parameters[corners]).sum(axis=1)
+    return np.clip(parameter * (loops + 1), 0.0, 1.0).astype(np.float32)
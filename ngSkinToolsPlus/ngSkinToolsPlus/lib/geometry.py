@@ -0,0 +1,150 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Vectorized geometry queries.
+All functions work on whole arrays of points/triangles at once,
+points are (n x 3) arrays, triangles are given by their corners a, b, c.
+'''
+import numpy as np
+
+
+def dot(u, v):
+    '''
+    row-wise dot product of two (n x 3) arrays
+    '''
+    return np.einsum('ij,ij->i', u, v)
+
+
+def triangleBounds(points, triangles):
+    '''
+    returns lower and upper corners of the bounding box of each triangle
+    '''
+    corners = points[triangles]
+    return corners.min(axis=1), corners.max(axis=1)
+
+
+def closestPointOnTriangles(points, a, b, c):
+    '''
+    finds closest point to points[i] on triangle (a[i], b[i], c[i])
+    (Ericson, Real-Time Collision Detection, 5.1.5)
+
+    returns closest points and their barycentric coordinates (n x 3)
+    '''
+    points = np.asarray(points, dtype=np.float64)
+    ab = b - a
+    ac = c - a
+    ap = points - a
+    d1 = dot(ab, ap)
+    d2 = dot(ac, ap)
+
+    bp = points - b
+    d3 = dot(ab, bp)
+    d4 = dot(ac, bp)
+
+    cp = points - c
+    d5 = dot(ab, cp)
+    d6 = dot(ac, cp)
+
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    bary = np.zeros((len(points), 3))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # regions are tested from the lowest priority upwards,
+        # so that later assignments win, like the early returns in Ericson's version
+
+        # inside face
+        denom = va + vb + vc
+        v = np.where(denom != 0, vb / denom, 0.0)
+        w = np.where(denom != 0, vc / denom, 0.0)
+        bary[:, 0] = 1.0 - v - w
+        bary[:, 1] = v
+        bary[:, 2] = w
+
+        # edge bc
+        d43 = d4 - d3
+        d56 = d5 - d6
+        region = (va <= 0) & (d43 >= 0) & (d56 >= 0)
+        w = np.where(d43 + d56 != 0, d43 / (d43 + d56), 0.0)
+        bary[region] = np.column_stack((np.zeros_like(w), 1.0 - w, w))[region]
+
+        # edge ac
+        region = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+        w = np.where(d2 - d6 != 0, d2 / (d2 - d6), 0.0)
+        bary[region] = np.column_stack((1.0 - w, np.zeros_like(w), w))[region]
+
+        # vertex c
+        region = (d6 >= 0) & (d5 <= d6)
+        bary[region] = (0.0, 0.0, 1.0)
+
+        # edge ab
+        region = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+        v = np.where(d1 - d3 != 0, d1 / (d1 - d3), 0.0)
+        bary[region] = np.column_stack((1.0 - v, v, np.zeros_like(v)))[region]
+
+        # vertex b
+        region = (d3 >= 0) & (d4 <= d3)
+        bary[region] = (0.0, 1.0, 0.0)
+
+        # vertex a
+        region = (d1 <= 0) & (d2 <= 0)
+        bary[region] = (1.0, 0.0, 0.0)
+
+    closest = bary[:, 0:1] * a + bary[:, 1:2] * b + bary[:, 2:3] * c
+    return closest, bary
+
+
+def sqDistanceToTriangles(points, a, b, c):
+    '''
+    squared distance from points[i] to triangle (a[i], b[i], c[i])
+    '''
+    closest, _ = closestPointOnTriangles(points, a, b, c)
+    delta = closest - points
+    return dot(delta, delta)
+
+
+def intersectLineTriangles(origins, directions, a, b, c, epsilon=1e-12):
+    '''
+    intersects line origins[i] + t * directions[i] with triangle (a[i], b[i], c[i])
+    (Moller-Trumbore, with negative t allowed)
+
+    returns t (nan where the line misses) and barycentric coordinates (n x 3)
+    '''
+    ab = b - a
+    ac = c - a
+    p = np.cross(directions, ac)
+    determinant = dot(ab, p)
+    parallel = np.abs(determinant) < epsilon
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = np.where(parallel, 0.0, 1.0 / determinant)
+        ao = origins - a
+        u = dot(ao, p) * inverse
+        q = np.cross(ao, ab)
+        v = dot(directions, q) * inverse
+        t = dot(ac, q) * inverse
+
+    miss = parallel | (u < 0) | (v < 0) | (u + v > 1)
+    t[miss] = np.nan
+    return t, np.column_stack((1.0 - u - v, u, v))
+
+
+def vertexNormals(points, triangles):
+    '''
+    area weighted vertex normals
+    '''
+    corners = points[triangles]
+    faceNormals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+
+    normals = np.zeros((len(points), 3))
+    for corner in range(3):
+        for axis in range(3):
+            normals[:, axis] += np.bincount(triangles[:, corner], weights=faceNormals[:, axis], minlength=len(points))
+
+    length = np.sqrt(dot(normals, normals))
+    length[length == 0] = 1.0
+    return normals / length[:, None]
@@ -0,0 +1,370 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Resolves influence names stored in layer data (long names from another
+scene, short names, names in another namespace) to nodes of the scene.
+
+The scene's transforms are listed once, and indexed by short name and
+by name without namespaces, so resolving all influences of a LayerData
+takes one scene query instead of one per influence per layer.
+
+Influences can be renamed before resolving, by rules that are compiled
+once and applied to each unique name:
+
+rules = compileRules([('prefix', 'LT_', 'LT_lips_'), ('namespace', 'old', 'rig')])
+result = rules.applyToLayerData(data, getSceneResolver(), dryRun=True)
+print result.format()
+'''
+from collections import OrderedDict
+import re
+
+try:
+    import maya.cmds as mc
+except ImportError:
+    mc = None
+
+
+def getShortName(name):
+    '''
+    node name without dag path
+    '''
+    return name.rsplit('|', 1)[-1]
+
+
+def stripNamespace(name):
+    '''
+    short name without namespaces
+    '''
+    return getShortName(name).rsplit(':', 1)[-1]
+
+
+def splitNamespace(shortName):
+    '''
+    returns (namespace, name), namespace is '' for names without one
+    '''
+    if ':' not in shortName:
+        return '', shortName
+    return tuple(shortName.rsplit(':', 1))
+
+
+def joinNamespace(namespace, name):
+    return '%s:%s' % (namespace, name) if namespace else name
+
+
+def getInfluenceNames(data):
+    '''
+    unique influence names of all layers in LayerData, in order of appearance
+    '''
+    names = OrderedDict()
+    for layer in data.layers:
+        for influence in layer.influences:
+            names[influence.influenceName] = None
+    return list(names)
+
+
+class InfluenceNameResolver(object):
+    '''
+    resolver = InfluenceNameResolver.fromScene()
+    resolved, ambiguous, missing = resolver.resolveLayerData(data)
+    '''
+
+    def __init__(self, longNames):
+        '''
+        longNames - long names of all nodes that influences can resolve to
+        '''
+        self.longNames = list(longNames)
+        self.existing = set(self.longNames)
+
+        self.byShortName = {}
+        self.byStrippedName = {}
+        for longName in self.longNames:
+            self.byShortName.setdefault(getShortName(longName), []).append(longName)
+            self.byStrippedName.setdefault(stripNamespace(longName), []).append(longName)
+
+        # {name: candidates}, kept between calls
+        self.results = {}
+
+    @classmethod
+    def fromScene(cls):
+        '''
+        indexes all transforms (and joints) in the scene
+        '''
+        return cls(listSceneTransforms())
+
+    def findPath(self, name):
+        '''
+        returns long names of nodes that name (long name, partial path or short name) refers to,
+        like objExists would
+        '''
+        if name in self.existing:
+            return [name]
+        if name.startswith('|'):
+            return []
+        return [longName for longName in self.byShortName.get(getShortName(name), [])
+                if longName.endswith('|' + name)]
+
+    def exists(self, name):
+        return bool(self.findPath(name))
+
+    def resolve(self, name):
+        '''
+        returns long names of candidate nodes for name: the node itself if it exists,
+        else nodes with the same short name, else nodes with the same name without namespaces
+        (one candidate: resolved, several: ambiguous, none: missing)
+        '''
+        if name not in self.results:
+            candidates = self.findPath(name)
+            if not candidates:
+                candidates = self.byShortName.get(getShortName(name), [])
+            if not candidates:
+                candidates = self.byStrippedName.get(stripNamespace(name), [])
+            self.results[name] = list(candidates)
+        return self.results[name]
+
+    def resolveNames(self, names):
+        '''
+        resolves unique names in one pass
+        returns (resolved {name: longName}, ambiguous {name: candidates}, missing [names])
+        '''
+        resolved = OrderedDict()
+        ambiguous = OrderedDict()
+        missing = []
+        for name in OrderedDict.fromkeys(names):
+            candidates = self.resolve(name)
+            if len(candidates) == 1:
+                resolved[name] = candidates[0]
+            elif candidates:
+                ambiguous[name] = candidates
+            else:
+                missing.append(name)
+        return resolved, ambiguous, missing
+
+    def resolveLayerData(self, data):
+        '''
+        resolves influence names of all layers in LayerData
+        returns (resolved, ambiguous, missing) as resolveNames
+        '''
+        return self.resolveNames(getInfluenceNames(data))
+
+
+def listSceneTransforms():
+    '''
+    long names of all transforms in the scene (joints are transforms too)
+    '''
+    return mc.ls(type='transform', long=True) or []
+
+
+# resolver of the current scene, see getSceneResolver
+sceneResolver = None
+
+
+def getSceneResolver():
+    '''
+    returns resolver for the current scene
+    the scene is listed on every call, but indexes and resolved names
+    are reused as long as the scene's transforms stay the same
+    '''
+    global sceneResolver
+    longNames = listSceneTransforms()
+    if sceneResolver is None or sceneResolver.longNames != longNames:
+        sceneResolver = InfluenceNameResolver(longNames)
+    return sceneResolver
+
+
+#===============================================================================
+# rename rules
+# rules work on short names, the part after the namespace
+# unless noted otherwise
+#===============================================================================
+
+class PrefixRule(object):
+    '''
+    replaces prefix old with new
+    '''
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+
+    def apply(self, shortName):
+        namespace, name = splitNamespace(shortName)
+        if not name.startswith(self.old):
+            return shortName
+        return joinNamespace(namespace, self.new + name[len(self.old):])
+
+
+class SuffixRule(object):
+    '''
+    replaces suffix old with new
+    '''
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+
+    def apply(self, shortName):
+        namespace, name = splitNamespace(shortName)
+        if not self.old or not name.endswith(self.old):
+            return shortName
+        return joinNamespace(namespace, name[:-len(self.old)] + self.new)
+
+
+class RegexRule(object):
+    '''
+    re.sub on the whole short name, namespace included
+    '''
+
+    def __init__(self, pattern, replacement):
+        self.pattern = re.compile(pattern)
+        self.replacement = replacement
+
+    def apply(self, shortName):
+        return self.pattern.sub(self.replacement, shortName)
+
+
+class NamespaceRule(object):
+    '''
+    moves names from namespace old to new
+    old - '' for names without namespace, '*' for any namespace
+    new - '' to remove the namespace
+    '''
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+
+    def apply(self, shortName):
+        namespace, name = splitNamespace(shortName)
+        if self.old != '*' and namespace != self.old:
+            return shortName
+        return joinNamespace(self.new, name)
+
+
+RULE_TYPES = {'prefix': PrefixRule,
+              'suffix': SuffixRule,
+              'regex': RegexRule,
+              'namespace': NamespaceRule}
+
+
+class RenameResult(object):
+    '''
+    outcome of applying RenameRules
+    renamed - {old name: new name} of every influence name a rule changed
+    resolved - {name: long name} of names the resolver mapped to another name
+               of the same node (new names if renamed)
+    ambiguous, missing - names that the resolver could not map to a single node
+                         (new names if renamed)
+    '''
+
+    def __init__(self, renamed, resolved=None, ambiguous=None, missing=None, dryRun=False):
+        self.renamed = renamed
+        self.resolved = resolved or OrderedDict()
+        self.ambiguous = ambiguous or OrderedDict()
+        self.missing = missing or []
+        self.dryRun = dryRun
+
+    def format(self):
+        '''
+        returns report as text
+        '''
+        lines = ['%s -> %s' % item for item in self.renamed.items()]
+        lines.extend('resolved: %s -> %s' % item for item in self.resolved.items())
+        lines.extend('ambiguous: %s (%s)' % (name, ', '.join(candidates)) for name, candidates in self.ambiguous.items())
+        lines.extend('missing: %s' % name for name in self.missing)
+        if self.dryRun:
+            lines.append('(dry run, nothing changed)')
+        return '\n'.join(lines)
+
+
+class RenameRules(object):
+    '''
+    ordered rules, applied one after the other to the short name of each influence
+    results are memoized, so each unique name is renamed once
+    '''
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.cache = {}
+
+    def rename(self, name):
+        '''
+        returns new short name, or name itself if no rule changes it
+        '''
+        if name not in self.cache:
+            shortName = getShortName(name)
+            newName = shortName
+            for rule in self.rules:
+                newName = rule.apply(newName)
+            self.cache[name] = name if newName == shortName else newName
+        return self.cache[name]
+
+    def mapNames(self, names, resolver=None):
+        '''
+        renames, then resolves unique names
+        resolver [InfluenceNameResolver] - map new names to long names of scene nodes
+                                           (names that don't resolve keep the new short name)
+        returns (renamed {old name: new name} of names a rule changed,
+                 resolved {name: long name} of (new) names that resolved to another name,
+                 ambiguous, missing)
+        '''
+        newNames = OrderedDict((name, self.rename(name)) for name in names)
+        renamed = OrderedDict((name, newName) for name, newName in newNames.items() if newName != name)
+        if resolver is None:
+            return renamed, OrderedDict(), OrderedDict(), []
+
+        resolved, ambiguous, missing = resolver.resolveNames(newNames.values())
+        resolved = OrderedDict((name, longName) for name, longName in resolved.items() if longName != name)
+        return renamed, resolved, ambiguous, missing
+
+    def apply(self, names, setName, resolver=None, dryRun=False):
+        '''
+        names - influence names, as found in the data
+        setName - setName(index, newName), called for every changed names[index]
+        '''
+        renamed, resolved, ambiguous, missing = self.mapNames(names, resolver)
+        if not dryRun:
+            for index, name in enumerate(names):
+                newName = renamed.get(name, name)
+                newName = resolved.get(newName, newName)
+                if newName != name:
+                    setName(index, newName)
+        return RenameResult(renamed, resolved, ambiguous, missing, dryRun)
+
+    def applyToLayerData(self, data, resolver=None, dryRun=False):
+        '''
+        renames influences of all layers in LayerData, in one pass over the unique names
+        returns RenameResult
+        '''
+        influences = [influence for layer in data.layers for influence in layer.influences]
+
+        def setName(index, newName):
+            influences[index].influenceName = newName
+
+        return self.apply([influence.influenceName for influence in influences], setName, resolver, dryRun)
+
+    def applyToJson(self, jsonDict, resolver=None, dryRun=False):
+        '''
+        same as applyToLayerData, on the JSON dict structure
+        '''
+        influences = [influence for layer in jsonDict['layers'] for influence in layer['influences']]
+
+        def setName(index, newName):
+            influences[index]['name'] = newName
+
+        return self.apply([influence['name'] for influence in influences], setName, resolver, dryRun)
+
+
+def compileRules(specs):
+    '''
+    builds RenameRules from a list of (type, old, new) tuples,
+    with type one of RULE_TYPES, e.g.
+    [('prefix', 'CT_', 'CT_lips_'), ('regex', r'^(LT|RT)_', r'\1_lips_'), ('namespace', '*', '')]
+    '''
+    rules = []
+    for ruleType, old, new in specs:
+        if ruleType not in RULE_TYPES:
+            raise ValueError('Unknown rename rule %r, use one of %s' % (ruleType, ', '.join(sorted(RULE_TYPES))))
+        rules.append(RULE_TYPES[ruleType](old, new))
+    return RenameRules(rules)
@@ -0,0 +1,391 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Binary layer file, readable through numpy.memmap.
+
+layout:
+    MAGIC
+    data blocks (masks and influence weights), each aligned to 8 bytes
+    index (utf-8 JSON) describing layers, influences and their blocks
+    trailer: index offset, index length (little endian uint64), MAGIC
+
+influence weights are stored dense (vertCount values), or sparse
+(nnz int32 vertex ids, followed by nnz values) when that is smaller.
+the index is at the end of the file, so layers can be written as they
+are produced (e.g. while streaming an XML file), and a single layer,
+mask or influence can be read without touching the rest of the file.
+
+values are float64 by default, so python float weights (JSON dicts, LayerData)
+round-trip bit exact. dtype=np.float32 halves the file, at float32 precision
+(what ngSkinTools stores weights as). SparseLayerWeights are float32 already,
+so writeSparseLayers stores float32 by default without losing anything.
+'''
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+try:
+    from ngSkinTools.importExport import LayerData, Layer, Influence
+except ImportError:
+    # conversion to ngSkinTools' model is only available inside Maya
+    LayerData = Layer = Influence = None
+
+from ngSkinToolsPlus.lib.layerWeights import SparseLayerWeights
+from ngSkinToolsPlus.lib.sparse import CsrMatrix
+
+MAGIC = b'NGSTLYR\x00'
+VERSION = 1
+TRAILER = struct.Struct('<QQ')
+ALIGNMENT = 8
+INDEX_DTYPE = np.dtype('<i4')
+
+
+class LayerFileWriter(object):
+    '''
+    writes layers one at a time
+
+    writer = LayerFileWriter(filepath)
+    for layer in layers:
+        writer.addLayer(layer.name, layer.enabled, layer.opacity, layer.mask, influences)
+    writer.close()
+
+    layers are written to filepath + '.tmp', which replaces filepath on close,
+    so a failed export leaves the previous file as it was
+    '''
+
+    def __init__(self, filepath, dtype=np.float64, manualInfluenceOverrides=None):
+        '''
+        dtype - type of stored values (float32 or float64)
+        manualInfluenceOverrides - stored as is (see LayerData.mirrorInfluenceAssociationOverrides)
+        '''
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.manualInfluenceOverrides = manualInfluenceOverrides
+        self.layers = []
+        self.filepath = filepath
+        self.tempPath = filepath + '.tmp'
+        self.f = open(self.tempPath, 'wb')
+        self.f.write(MAGIC)
+        self.offset = len(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+
+    def writeBlock(self, array):
+        '''
+        writes array at the next aligned offset
+        returns offset of the block
+        '''
+        padding = -self.offset % ALIGNMENT
+        if padding:
+            self.f.write(b'\x00' * padding)
+            self.offset += padding
+        offset = self.offset
+        data = np.ascontiguousarray(array).tobytes()
+        self.f.write(data)
+        self.offset += len(data)
+        return offset
+
+    def addLayer(self, name, enabled, opacity, mask, influences):
+        '''
+        mask - list/array of vertCount floats, [] for an uninitialized mask,
+               or None if layer has no mask
+        influences - iterable of (influenceName, influenceIndex, weights)
+                     where weights are dense per vertex lists/arrays.
+                     influences are stored in the given order, empty ones included
+        '''
+        layerEntry = {'name': name,
+                      'enabled': bool(enabled),
+                      'opacity': float(opacity),
+                      'mask': None,
+                      'influences': []}
+
+        if mask is not None:
+            mask = np.asarray(mask, dtype=self.dtype)
+            layerEntry['mask'] = {'offset': self.writeBlock(mask), 'count': len(mask)}
+
+        for influenceName, influenceIndex, weights in influences:
+            weights = np.asarray(weights, dtype=self.dtype)
+            nonzero = np.flatnonzero(weights).astype(INDEX_DTYPE)
+            entry = {'name': influenceName, 'index': int(influenceIndex), 'count': len(weights)}
+
+            if len(nonzero) * (INDEX_DTYPE.itemsize + self.dtype.itemsize) < weights.nbytes:
+                entry['nnz'] = len(nonzero)
+                entry['offset'] = self.writeBlock(nonzero)
+                entry['valueOffset'] = self.writeBlock(weights[nonzero])
+            else:
+                entry['offset'] = self.writeBlock(weights)
+
+            layerEntry['influences'].append(entry)
+
+        self.layers.append(layerEntry)
+
+    def addSparseLayer(self, layer):
+        '''
+        layer [SparseLayerWeights]
+        '''
+        self.addLayer(layer.name, layer.enabled, layer.opacity,
+                      layer.mask if layer.mask is not None else [], layer.iterInfluenceWeights())
+
+    def close(self):
+        '''
+        writes the index, and moves the finished file to filepath
+        '''
+        if self.f.closed:
+            return
+        try:
+            index = {'version': VERSION,
+                     'dtype': self.dtype.str,
+                     'manualInfluenceOverrides': self.manualInfluenceOverrides,
+                     'layers': self.layers}
+            data = json.dumps(index).encode('utf-8')
+            self.f.write(data)
+            self.f.write(TRAILER.pack(self.offset, len(data)))
+            self.f.write(MAGIC)
+            self.f.close()
+
+            # os.rename doesn't replace existing files on Windows
+            if sys.platform == 'win32' and os.path.exists(self.filepath):
+                os.remove(self.filepath)
+            os.rename(self.tempPath, self.filepath)
+        except Exception:
+            self.abort()
+            raise
+
+    def abort(self):
+        '''
+        closes and deletes the unfinished file, filepath is left untouched
+        '''
+        self.f.close()
+        if os.path.exists(self.tempPath):
+            os.remove(self.tempPath)
+
+
+class LayerFile(object):
+    '''
+    reads a binary layer file through numpy.memmap
+    only the index is parsed on open, weights are read on demand
+
+    layerFile = LayerFile(filepath)
+    for layerId in range(layerFile.getLayerCount()):
+        print layerFile.getLayerName(layerId), layerFile.listInfluences(layerId)
+    weights = layerFile.getInfluenceWeights(0, 3)
+    '''
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('Not a layer file: %s' % filepath)
+            f.seek(-(TRAILER.size + len(MAGIC)), 2)
+            indexOffset, indexLength = TRAILER.unpack(f.read(TRAILER.size))
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError('Layer file is truncated: %s' % filepath)
+            f.seek(indexOffset)
+            index = json.loads(f.read(indexLength).decode('utf-8'))
+
+        if index['version'] > VERSION:
+            raise ValueError('Layer file version %d is not supported' % index['version'])
+
+        self.dtype = np.dtype(str(index['dtype']))
+        self.manualInfluenceOverrides = index.get('manualInfluenceOverrides')
+        self.layers = index['layers']
+        self.data = np.memmap(filepath, dtype=np.uint8, mode='r')
+
+    def close(self):
+        '''
+        releases the memory map (the file stays locked on Windows until then)
+        '''
+        self.data = None
+
+    def readBlock(self, offset, count, dtype):
+        '''
+        returns read-only view of count values at offset
+        '''
+        return self.data[offset:offset + count * dtype.itemsize].view(dtype)
+
+    def getLayerCount(self):
+        return len(self.layers)
+
+    def getLayerName(self, layerId):
+        return self.layers[layerId]['name']
+
+    def listInfluences(self, layerId):
+        '''
+        returns [(influenceName, influenceIndex)] of layer, in stored order
+        '''
+        return [(entry['name'], entry['index']) for entry in self.layers[layerId]['influences']]
+
+    def getLayerMask(self, layerId):
+        '''
+        returns mask array, or None if layer was stored without mask
+        '''
+        entry = self.layers[layerId]['mask']
+        if entry is None:
+            return None
+        return self.readBlock(entry['offset'], entry['count'], self.dtype)
+
+    def getInfluenceWeights(self, layerId, position):
+        '''
+        returns dense weights of the influence at position in listInfluences(layerId)
+        dense blocks are returned as memory mapped views, without copying
+        '''
+        entry = self.layers[layerId]['influences'][position]
+        if 'nnz' not in entry:
+            return self.readBlock(entry['offset'], entry['count'], self.dtype)
+
+        weights = np.zeros(entry['count'], dtype=self.dtype)
+        vertIds, values = self.getSparseInfluenceWeights(layerId, position)
+        weights[vertIds] = values
+        return weights
+
+    def getSparseInfluenceWeights(self, layerId, position):
+        '''
+        returns vertex ids and values of the nonzero weights of an influence
+        '''
+        entry = self.layers[layerId]['influences'][position]
+        if 'nnz' not in entry:
+            weights = self.readBlock(entry['offset'], entry['count'], self.dtype)
+            vertIds = np.flatnonzero(weights)
+            return vertIds, weights[vertIds]
+
+        vertIds = self.readBlock(entry['offset'], entry['nnz'], INDEX_DTYPE)
+        values = self.readBlock(entry['valueOffset'], entry['nnz'], self.dtype)
+        return vertIds, values
+
+    def getVertCount(self, layerId):
+        '''
+        vertex count of layer (0 if layer has neither mask nor influences)
+        '''
+        layer = self.layers[layerId]
+        if layer['influences']:
+            return layer['influences'][0]['count']
+        if layer['mask'] is not None:
+            return layer['mask']['count']
+        return 0
+
+    def getSparseLayer(self, layerId):
+        '''
+        returns layer as SparseLayerWeights (float32)
+        '''
+        layer = self.layers[layerId]
+        rows = []
+        cols = []
+        values = []
+        for position in range(len(layer['influences'])):
+            vertIds, influenceValues = self.getSparseInfluenceWeights(layerId, position)
+            rows.append(np.full(len(vertIds), position, dtype=np.int64))
+            cols.append(vertIds)
+            values.append(influenceValues)
+
+        shape = (len(layer['influences']), self.getVertCount(layerId))
+        if rows:
+            weights = CsrMatrix.fromCoo(np.concatenate(rows), np.concatenate(cols), np.concatenate(values), shape)
+        else:
+            weights = CsrMatrix.fromCoo([], [], [], shape)
+
+        names, indices = zip(*self.listInfluences(layerId)) if layer['influences'] else ((), ())
+        return SparseLayerWeights(names, indices, weights, self.getLayerMask(layerId),
+                                  name=layer['name'], enabled=layer['enabled'], opacity=layer['opacity'])
+
+    def iterLayerDicts(self):
+        '''
+        yields layers in the JSON dict structure used by retModel
+        '''
+        for layerId, layer in enumerate(self.layers):
+            mask = self.getLayerMask(layerId)
+            yield {'name': layer['name'],
+                   'enabled': layer['enabled'],
+                   'opacity': layer['opacity'],
+                   'mask': mask.tolist() if mask is not None else None,
+                   'influences': [{'name': entry['name'],
+                                   'index': entry['index'],
+                                   'weights': self.getInfluenceWeights(layerId, position).tolist()}
+                                  for position, entry in enumerate(layer['influences'])]}
+
+    def toJsonDict(self):
+        '''
+        returns the whole file in the JSON dict structure used by retModel
+        '''
+        jsonDict = {'layers': list(self.iterLayerDicts())}
+        if self.manualInfluenceOverrides is not None:
+            jsonDict['manualInfluenceOverrides'] = self.manualInfluenceOverrides
+        return jsonDict
+
+    def toLayerData(self):
+        '''
+        returns the whole file as ngSkinTools' importExport.LayerData
+        '''
+        return jsonDictToLayerData(self.toJsonDict())
+
+
+def jsonDictToLayerData(jsonDict):
+    '''
+    builds ngSkinTools' importExport.LayerData from the JSON dict structure
+    '''
+    model = LayerData()
+
+    if 'manualInfluenceOverrides' in jsonDict:
+        model.mirrorInfluenceAssociationOverrides = jsonDict['manualInfluenceOverrides']
+
+    for layerData in jsonDict['layers']:
+        layer = Layer()
+        model.addLayer(layer)
+        layer.enabled = layerData['enabled']
+        layer.mask = layerData['mask']
+        layer.name = layerData['name']
+        layer.opacity = layerData['opacity']
+        layer.influences = []
+
+        for influenceData in layerData['influences']:
+            influence = Influence()
+            layer.addInfluence(influence)
+            influence.weights = influenceData['weights']
+            influence.logicalIndex = influenceData['index']
+            influence.influenceName = influenceData['name']
+
+    return model
+
+
+def writeJsonDict(filepath, jsonDict, dtype=np.float64):
+    '''
+    writes the JSON dict structure used by retModel
+    dtype - np.float32 for smaller files, rounding weights to float32
+    '''
+    with LayerFileWriter(filepath, dtype, jsonDict.get('manualInfluenceOverrides')) as writer:
+        for layer in jsonDict['layers']:
+            influences = ((influence['name'], influence['index'], influence['weights'])
+                          for influence in layer['influences'])
+            writer.addLayer(layer['name'], layer['enabled'], layer['opacity'], layer['mask'], influences)
+
+
+def writeLayerData(filepath, data, dtype=np.float64):
+    '''
+    writes ngSkinTools' importExport.LayerData
+    dtype - np.float32 for smaller files, rounding weights to float32
+    '''
+    overrides = getattr(data, 'mirrorInfluenceAssociationOverrides', None)
+    with LayerFileWriter(filepath, dtype, overrides) as writer:
+        for layer in data.layers:
+            influences = ((influence.influenceName, influence.logicalIndex, influence.weights)
+                          for influence in layer.influences)
+            writer.addLayer(layer.name, layer.enabled, layer.opacity, layer.mask, influences)
+
+
+def writeSparseLayers(filepath, layers, dtype=np.float32):
+    '''
+    writes an iterable of SparseLayerWeights, e.g. lib.xmlLayerData.iterXmlLayers(xmlPath)
+    '''
+    with LayerFileWriter(filepath, dtype) as writer:
+        for layer in layers:
+            writer.addSparseLayer(layer)
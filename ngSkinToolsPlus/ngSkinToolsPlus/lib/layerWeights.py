@@ -0,0 +1,275 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Sparse container for the influence weights of a skin layer.
+
+Layers usually touch only a few of the skinCluster's influences per vertex,
+so instead of one dense list of vertCount floats per influence,
+weights are stored as a (influences x vertices) CSR matrix.
+'''
+import hashlib
+
+import numpy as np
+
+try:
+    from ngSkinTools.importExport import LayerData, Layer, Influence
+except ImportError:
+    # conversion to ngSkinTools' model is only available inside Maya
+    LayerData = Layer = Influence = None
+
+from ngSkinToolsPlus.lib.sparse import CsrMatrix
+
+
+class SparseLayerWeights(object):
+    '''
+    influence weights and mask of one layer
+    row i of weights holds the weights of influence influenceIndices[i]
+    '''
+
+    def __init__(self, influenceNames, influenceIndices, weights, mask=None,
+                 name='', enabled=True, opacity=1.0):
+        '''
+        influenceNames - list of influence names
+        influenceIndices - logical indices of influences
+        weights [CsrMatrix] - (influences x vertices) weights
+        mask - vertCount floats, or None if mask is uninitialized
+        '''
+        self.influenceNames = list(influenceNames)
+        self.influenceIndices = np.asarray(influenceIndices, dtype=np.int64)
+        self.weights = weights
+        self.mask = None if mask is None or not len(mask) else np.asarray(mask, dtype=np.float32)
+        self.name = name
+        self.enabled = enabled
+        self.opacity = opacity
+
+    @classmethod
+    def fromLists(cls, influences, vertCount, mask=None, **kwargs):
+        '''
+        influences - list of (influenceName, influenceIndex, weights),
+                     where weights are dense per-vertex lists
+        '''
+        rows = []
+        cols = []
+        values = []
+        for row, (_, _, weights) in enumerate(influences):
+            weights = np.asarray(weights, dtype=np.float32)
+            nonzero = np.flatnonzero(weights)
+            rows.append(np.full(len(nonzero), row, dtype=np.int64))
+            cols.append(nonzero)
+            values.append(weights[nonzero])
+
+        if influences:
+            rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+        weights = CsrMatrix.fromCoo(rows, cols, values, (len(influences), vertCount))
+
+        return cls([name for name, _, _ in influences], [index for _, index, _ in influences],
+                   weights, mask, **kwargs)
+
+    @classmethod
+    def fromDense(cls, influenceNames, influenceIndices, weights, mask=None, **kwargs):
+        '''
+        weights - dense (influences x vertices) matrix
+        '''
+        return cls(influenceNames, influenceIndices, CsrMatrix.fromDense(weights), mask, **kwargs)
+
+    @classmethod
+    def fromMll(cls, mll, layerId):
+        '''
+        reads a layer through MllInterface
+        only influences that have weights on this layer are read
+        '''
+        influences = []
+        for influenceName, influenceIndex in mll.listLayerInfluences(layerId, True):
+            influences.append((influenceName, influenceIndex, mll.getInfluenceWeights(layerId, influenceIndex)))
+
+        return cls.fromLists(influences, mll.getVertCount(), mll.getLayerMask(layerId),
+                             name=mll.getLayerName(layerId), enabled=mll.isLayerEnabled(layerId))
+
+    @classmethod
+    def fromLayer(cls, layer, vertCount=None):
+        '''
+        converts ngSkinTools' importExport.Layer
+        '''
+        influences = [(influence.influenceName, influence.logicalIndex, influence.weights)
+                      for influence in layer.influences]
+        if vertCount is None:
+            vertCount = len(influences[0][2]) if influences else (len(layer.mask) if layer.mask is not None else 0)
+
+        return cls.fromLists(influences, vertCount, layer.mask,
+                             name=layer.name, enabled=layer.enabled, opacity=layer.opacity)
+
+    def toLayer(self):
+        '''
+        converts to ngSkinTools' importExport.Layer
+        influences without weights are left out
+        '''
+        layer = Layer()
+        layer.name = self.name
+        layer.enabled = self.enabled
+        layer.opacity = self.opacity
+        layer.mask = self.mask.tolist() if self.mask is not None else []
+        layer.influences = []
+
+        for influenceName, influenceIndex, weights in self.iterInfluenceWeights():
+            influence = Influence()
+            layer.addInfluence(influence)
+            influence.influenceName = influenceName
+            influence.logicalIndex = influenceIndex
+            influence.weights = weights.tolist()
+
+        return layer
+
+    def toMll(self, mll, layerId, replace=False):
+        '''
+        writes weights and mask to layerId through MllInterface
+        only influences with weights are written, as one batch
+        if mll supports batched updates
+
+        replace - layerId already holds weights (e.g. an earlier copy of this layer):
+                  influences that aren't on this layer anymore are cleared,
+                  and layer name and enabled state are set too
+        '''
+        batch = hasattr(mll, 'beginDataUpdate')
+        if batch:
+            mll.beginDataUpdate()
+        try:
+            if replace:
+                current = set(self.influenceIndices[np.diff(self.weights.indptr) > 0].tolist())
+                zeros = [0.0] * self.getVertCount()
+                for _, influenceIndex in list(mll.listLayerInfluences(layerId, True)):
+                    if influenceIndex not in current:
+                        mll.setInfluenceWeights(layerId, influenceIndex, zeros)
+                mll.setLayerName(layerId, self.name)
+                mll.setLayerEnabled(layerId, self.enabled)
+
+            for _, influenceIndex, weights in self.iterInfluenceWeights():
+                mll.setInfluenceWeights(layerId, influenceIndex, weights.tolist())
+            mll.setLayerMask(layerId, self.mask.tolist() if self.mask is not None else [])
+        finally:
+            if batch:
+                mll.endDataUpdate()
+
+    def getVertCount(self):
+        return self.weights.shape[1]
+
+    def iterInfluenceWeights(self):
+        '''
+        yields (influenceName, influenceIndex, dense weights)
+        for every influence that has weights on this layer
+        '''
+        nonzero = np.flatnonzero(np.diff(self.weights.indptr))
+        for row in nonzero:
+            yield self.influenceNames[row], int(self.influenceIndices[row]), self.weights.getRow(row)
+
+    def toDense(self):
+        '''
+        returns dense (influences x vertices) matrix
+        '''
+        return self.weights.toDense()
+
+    def contentHash(self):
+        '''
+        sha1 of name, enabled state, influences, weights and mask
+        layers with the same hash have the same content
+        '''
+        digest = hashlib.sha1(repr((self.name, bool(self.enabled), self.influenceNames,
+                                    self.influenceIndices.tolist(), self.weights.shape)).encode('utf-8'))
+        for array in (self.weights.indptr, self.weights.indices, self.weights.data):
+            digest.update(np.ascontiguousarray(array).view(np.uint8))
+        if self.mask is not None:
+            digest.update(np.ascontiguousarray(self.mask).view(np.uint8))
+        return digest.hexdigest()
+
+    def nbytes(self):
+        '''
+        memory used by weights and mask
+        '''
+        return self.weights.nbytes() + (self.mask.nbytes if self.mask is not None else 0)
+
+    def copy(self, weights=None, mask=None, influenceNames=None, influenceIndices=None):
+        '''
+        returns a copy of this layer, replacing given attributes
+        '''
+        return SparseLayerWeights(self.influenceNames if influenceNames is None else influenceNames,
+                                  self.influenceIndices if influenceIndices is None else influenceIndices,
+                                  self.weights if weights is None else weights,
+                                  self.mask if mask is None else mask,
+                                  self.name, self.enabled, self.opacity)
+
+    def remapInfluences(self, mapping, names=None):
+        '''
+        returns layer with influences renumbered by mapping {old index: new index}
+        influences missing from mapping are dropped,
+        influences mapped to the same index are added together
+
+        names - {new index: influence name} (optional)
+        '''
+        newIndices = sorted(set(mapping[index] for index in self.influenceIndices.tolist() if index in mapping))
+        newRows = dict((index, row) for row, index in enumerate(newIndices))
+
+        rowMap = np.array([newRows.get(mapping.get(index), -1) for index in self.influenceIndices.tolist()],
+                          dtype=np.int64)
+        rows = rowMap[self.weights.rowIds()] if len(rowMap) else np.zeros(0, dtype=np.int64)
+        keep = rows >= 0
+        weights = CsrMatrix.fromCoo(rows[keep], self.weights.indices[keep], self.weights.data[keep],
+                                    (len(newIndices), self.getVertCount()))
+
+        if names is None:
+            names = {}
+            for oldName, index in zip(self.influenceNames, self.influenceIndices.tolist()):
+                if index in mapping:
+                    names.setdefault(mapping[index], oldName)
+
+        return self.copy(weights, influenceNames=[names.get(index, '') for index in newIndices],
+                         influenceIndices=newIndices)
+
+    def transfer(self, surfaceAssociation):
+        '''
+        returns layer mapped onto destination mesh of surfaceAssociation
+        weights stay sparse all the way
+        '''
+        weights = surfaceAssociation.transferSparse(self.weights)
+        mask = None
+        if self.mask is not None:
+            mask = np.clip(surfaceAssociation.transfer(self.mask), 0.0, 1.0)
+
+        layer = self.copy(weights)
+        layer.mask = mask
+        return layer
+
+    def normalize(self):
+        '''
+        scales weights so that every vertex with weights adds up to 1.0
+        '''
+        total = self.weights.columnSums()
+        scale = np.zeros_like(total)
+        np.divide(1.0, total, out=scale, where=total > 0)
+        self.weights.data = (self.weights.data * scale[self.weights.indices]).astype(np.float32)
+
+    def prune(self, threshold=0.0):
+        '''
+        drops weights at or below threshold
+        '''
+        keep = self.weights.data > threshold
+        self.weights = CsrMatrix.fromCoo(self.weights.rowIds()[keep], self.weights.indices[keep],
+                                         self.weights.data[keep], self.weights.shape)
+
+
+def layerDataToSparse(data, vertCount=None):
+    '''
+    converts all layers of ngSkinTools' importExport.LayerData
+    returns list of SparseLayerWeights
+    '''
+    return [SparseLayerWeights.fromLayer(layer, vertCount) for layer in data.layers]
+
+
+def sparseToLayerData(layers):
+    '''
+    builds ngSkinTools' importExport.LayerData from a list of SparseLayerWeights
+    '''
+    data = LayerData()
+    for layer in layers:
+        data.addLayer(layer.toLayer())
+    return data
@@ -0,0 +1,224 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+LayerData whose weights and masks are decoded on first access.
+
+Layer headers and influence names are read up front, so renaming
+influences, listing them or picking a few layers doesn't pay for
+converting every weight list to python floats. Binary layer files are
+read from their memory map, so only the layers that are used are loaded.
+XML has no index to seek by: fromXml parses the whole file up front, one
+layer at a time, and keeps every layer as sparse float32 weights. For
+large files, convert them to a layer file once and load that instead:
+
+writeSparseLayers(layerFilePath, iterXmlLayers(xmlPath))
+data = LazyLayerData.fromLayerFile(layerFilePath)
+
+data = LazyLayerData.fromXml(filepath)
+print data.getAllInfluences()
+data.saveTo('body_geo')
+
+cache=False decodes weights on every access instead of keeping them,
+release() drops what was decoded so far.
+'''
+import numpy as np
+
+try:
+    from ngSkinTools.importExport import LayerData
+except ImportError:
+    # only the lazy model itself is available outside of Maya
+    LayerData = None
+
+from ngSkinToolsPlus.lib.influenceNames import getInfluenceNames
+from ngSkinToolsPlus.lib.layerFile import LayerFile
+from ngSkinToolsPlus.lib.xmlLayerData import iterXmlLayers
+
+
+class LazyValue(object):
+    '''
+    value computed by decode() on first access
+    '''
+
+    def __init__(self, decode, cache=True):
+        self.decode = decode
+        self.cache = cache
+        self.value = None
+        self.decoded = False
+
+    def get(self):
+        if self.decoded:
+            return self.value
+        value = self.decode()
+        if self.cache:
+            self.value = value
+            self.decoded = True
+        return value
+
+    def set(self, value):
+        '''
+        replaces the value, it won't be decoded or released anymore
+        '''
+        self.decode = None
+        self.value = value
+        self.decoded = True
+
+    def release(self):
+        if self.decode is not None:
+            self.value = None
+            self.decoded = False
+
+
+class LazyInfluence(object):
+    '''
+    same attributes as ngSkinTools' importExport.Influence
+    '''
+
+    def __init__(self, influenceName, logicalIndex, decodeWeights, cache=True):
+        self.influenceName = influenceName
+        self.logicalIndex = logicalIndex
+        self.lazyWeights = LazyValue(decodeWeights, cache)
+
+    @property
+    def weights(self):
+        return self.lazyWeights.get()
+
+    @weights.setter
+    def weights(self, weights):
+        self.lazyWeights.set(weights)
+
+    def release(self):
+        self.lazyWeights.release()
+
+
+class LazyLayer(object):
+    '''
+    same attributes as ngSkinTools' importExport.Layer
+    '''
+
+    def __init__(self, name, enabled, opacity, decodeMask, cache=True):
+        self.name = name
+        self.enabled = enabled
+        self.opacity = opacity
+        self.lazyMask = LazyValue(decodeMask, cache)
+        self.influences = []
+
+    @property
+    def mask(self):
+        return self.lazyMask.get()
+
+    @mask.setter
+    def mask(self, mask):
+        self.lazyMask.set(mask)
+
+    def addInfluence(self, influence):
+        self.influences.append(influence)
+
+    def release(self):
+        self.lazyMask.release()
+        for influence in self.influences:
+            influence.release()
+
+
+class LazyLayerData(LayerData or object):
+    '''
+    ngSkinTools' importExport.LayerData with lazy layers
+    (a plain container outside of Maya)
+    '''
+
+    def __init__(self):
+        if LayerData is not None:
+            LayerData.__init__(self)
+        self.layers = []
+        self.mirrorInfluenceAssociationOverrides = None
+
+    def addLayer(self, layer):
+        self.layers.append(layer)
+
+    def getAllInfluences(self):
+        '''
+        unique influence names of all layers
+        '''
+        return getInfluenceNames(self)
+
+    def release(self):
+        '''
+        drops decoded weights and masks, they are decoded again when needed
+        '''
+        for layer in self.layers:
+            layer.release()
+
+    @classmethod
+    def fromJsonDict(cls, jsonDict, cache=True):
+        '''
+        view of the JSON dict structure used by retModel
+        weight lists are handed out from the dict, without copying
+        '''
+        data = cls()
+        data.mirrorInfluenceAssociationOverrides = jsonDict.get('manualInfluenceOverrides')
+        for layerDict in jsonDict['layers']:
+            layer = LazyLayer(layerDict['name'], layerDict['enabled'], layerDict['opacity'],
+                              lambda layerDict=layerDict: layerDict['mask'], cache)
+            for influenceDict in layerDict['influences']:
+                layer.addInfluence(LazyInfluence(influenceDict['name'], influenceDict['index'],
+                                                 lambda influenceDict=influenceDict: influenceDict['weights'],
+                                                 cache))
+            data.addLayer(layer)
+        return data
+
+    @classmethod
+    def fromSparseLayers(cls, layers, cache=True):
+        '''
+        view of SparseLayerWeights (see lib.layerWeights), influences without weights are left out
+        weights are converted to lists when accessed
+        '''
+        data = cls()
+        for sparseLayer in layers:
+            layer = LazyLayer(sparseLayer.name, sparseLayer.enabled, sparseLayer.opacity,
+                              lambda sparseLayer=sparseLayer: decodeSparseMask(sparseLayer), cache)
+            weights = sparseLayer.weights
+            for row in np.flatnonzero(np.diff(weights.indptr)).tolist():
+                layer.addInfluence(LazyInfluence(sparseLayer.influenceNames[row],
+                                                 int(sparseLayer.influenceIndices[row]),
+                                                 lambda weights=weights, row=row: weights.getRow(row).tolist(),
+                                                 cache))
+            data.addLayer(layer)
+        return data
+
+    @classmethod
+    def fromXml(cls, source, cache=True, vertCount=None):
+        '''
+        reads ngSkinTools' XML layer data (file path or file object)
+        all layers are parsed up front, one at a time, and kept as sparse float32 weights
+        until accessed (fromLayerFile only loads the layers that are used)
+        '''
+        return cls.fromSparseLayers(iterXmlLayers(source, vertCount), cache)
+
+    @classmethod
+    def fromLayerFile(cls, filepath, cache=True):
+        '''
+        reads a binary layer file (see lib.layerFile), weights are read from the memory map when accessed
+        '''
+        layerFile = LayerFile(filepath)
+        data = cls()
+        data.mirrorInfluenceAssociationOverrides = layerFile.manualInfluenceOverrides
+        for layerId, header in enumerate(layerFile.layers):
+            layer = LazyLayer(header['name'], header['enabled'], header['opacity'],
+                              lambda layerId=layerId: decodeLayerFileMask(layerFile, layerId), cache)
+            for position, (influenceName, logicalIndex) in enumerate(layerFile.listInfluences(layerId)):
+                layer.addInfluence(LazyInfluence(influenceName, logicalIndex,
+                                                 lambda layerId=layerId, position=position:
+                                                     layerFile.getInfluenceWeights(layerId, position).tolist(),
+                                                 cache))
+            data.addLayer(layer)
+        return data
+
+
+def decodeSparseMask(layer):
+    return layer.mask.tolist() if layer.mask is not None else []
+
+
+def decodeLayerFileMask(layerFile, layerId):
+    mask = layerFile.getLayerMask(layerId)
+    return mask.tolist() if mask is not None else []
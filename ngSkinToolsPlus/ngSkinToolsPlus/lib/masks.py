@@ -0,0 +1,271 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Layer mask operations on numpy arrays.
+
+Neighbourhood operations (grow, shrink, smooth) work on a sparse
+vertex adjacency matrix, which is kept in the shared mesh cache.
+'''
+import numpy as np
+
+try:
+    import maya.OpenMaya as om
+except ImportError:
+    om = None
+
+from ngSkinToolsPlus.lib.meshCache import meshCache
+from ngSkinToolsPlus.lib.skinWeights import getShapePath
+from ngSkinToolsPlus.lib.sparse import CsrMatrix
+
+
+def polygonEdges(vertexCounts, vertexList):
+    '''
+    edges (k x 2) of polygons, given as returned by MFnMesh.getVertices
+    each polygon connects consecutive vertices, and the last one to the first
+    (edges shared by two polygons are listed twice)
+    '''
+    vertexCounts = np.asarray(vertexCounts, dtype=np.int64)
+    vertexList = np.asarray(vertexList, dtype=np.int64)
+
+    starts = np.cumsum(vertexCounts) - vertexCounts
+    nextIds = np.arange(len(vertexList)) + 1
+    nextIds[(starts + vertexCounts - 1)[vertexCounts > 0]] = starts[vertexCounts > 0]
+    return np.column_stack((vertexList, vertexList[nextIds]))
+
+
+def vertexAdjacency(edges, vertCount):
+    '''
+    returns symmetric (vertCount x vertCount) CsrMatrix,
+    with 1.0 for every pair of vertices connected by an edge
+    '''
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    rows = np.concatenate((edges[:, 0], edges[:, 1]))
+    cols = np.concatenate((edges[:, 1], edges[:, 0]))
+
+    adjacency = CsrMatrix.fromCoo(rows, cols, np.ones(len(rows)), (vertCount, vertCount))
+    # edges shared by several polygons were added up
+    adjacency.data[:] = 1.0
+    return adjacency
+
+
+def readMeshAdjacency(mesh):
+    '''
+    reads vertex adjacency of mesh from the scene
+    '''
+    fnMesh = om.MFnMesh(getShapePath(mesh))
+    vertexCounts = om.MIntArray()
+    vertexList = om.MIntArray()
+    fnMesh.getVertices(vertexCounts, vertexList)
+    return vertexAdjacency(polygonEdges(list(vertexCounts), list(vertexList)), fnMesh.numVertices())
+
+
+def getMeshAdjacency(mesh):
+    '''
+    returns vertex adjacency of mesh (cached in the shared mesh cache)
+    '''
+    return meshCache.get(mesh, 'adjacency', lambda: readMeshAdjacency(mesh))
+
+
+def reverseMask(mask):
+    '''
+    '''
+    return 1.0 - np.asarray(mask, dtype=np.float32)
+
+
+def unifyMask(mask, vertIds):
+    '''
+    sets mask weights on vertIds to their average
+    '''
+    mask = np.array(mask, dtype=np.float32)
+    vertIds = np.asarray(vertIds, dtype=np.int64)
+    if len(vertIds):
+        mask[vertIds] = mask[vertIds].mean()
+    return mask
+
+
+def clampMask(mask, low=0.0, high=1.0):
+    '''
+    '''
+    return np.clip(np.asarray(mask, dtype=np.float32), low, high)
+
+
+def remapMask(mask, curve):
+    '''
+    curve - function of the mask array,
+            or list of (input, output) points, interpolated linearly
+            (inputs must be increasing), e.g. [(0.0, 0.0), (0.5, 0.1), (1.0, 1.0)]
+    '''
+    mask = np.asarray(mask, dtype=np.float32)
+    if callable(curve):
+        return np.asarray(curve(mask), dtype=np.float32)
+    points = np.asarray(curve, dtype=np.float64).reshape(-1, 2)
+    return np.interp(mask, points[:, 0], points[:, 1]).astype(np.float32)
+
+
+def reduceNeighbours(mask, adjacency, ufunc):
+    '''
+    combines each vertex's weight with the weights of its neighbours using ufunc
+    '''
+    result = mask.copy()
+    filled = np.flatnonzero(np.diff(adjacency.indptr))
+    if len(filled):
+        # reduceat does not handle empty rows, so only reduce the filled ones
+        reduced = ufunc.reduceat(mask[adjacency.indices], adjacency.indptr[filled])
+        result[filled] = ufunc(mask[filled], reduced)
+    return result
+
+
+def growMask(mask, adjacency, steps=1):
+    '''
+    every step, each vertex takes the largest weight of its neighbours
+    '''
+    mask = np.asarray(mask, dtype=np.float32)
+    for _ in range(steps):
+        mask = reduceNeighbours(mask, adjacency, np.maximum)
+    return mask
+
+
+def shrinkMask(mask, adjacency, steps=1):
+    '''
+    every step, each vertex takes the smallest weight of its neighbours
+    '''
+    mask = np.asarray(mask, dtype=np.float32)
+    for _ in range(steps):
+        mask = reduceNeighbours(mask, adjacency, np.minimum)
+    return mask
+
+
+def conjugateGradient(matvec, b, diagonal, x=None, tolerance=1e-6, maxIterations=500):
+    '''
+    solves A x = b for a symmetric positive definite A,
+    given as matvec(x) = A x, with Jacobi (diagonal) preconditioning
+    '''
+    b = np.asarray(b, dtype=np.float64)
+    x = np.zeros_like(b) if x is None else np.array(x, dtype=np.float64)
+    inverseDiagonal = 1.0 / diagonal
+
+    residual = b - matvec(x)
+    z = residual * inverseDiagonal
+    direction = z.copy()
+    rz = np.dot(residual, z)
+    threshold = tolerance * max(np.linalg.norm(b), 1e-30)
+
+    for _ in range(maxIterations):
+        if np.linalg.norm(residual) <= threshold:
+            break
+        product = matvec(direction)
+        step = rz / np.dot(direction, product)
+        x += step * direction
+        residual -= step * product
+        z = residual * inverseDiagonal
+        rzNext = np.dot(residual, z)
+        direction = z + (rzNext / rz) * direction
+        rz = rzNext
+
+    return x
+
+
+def smoothMask(mask, adjacency, intensity=1.0, vertIds=None, tolerance=1e-6):
+    '''
+    Laplacian smoothing, solved implicitly in one step:
+    (I + intensity * (I - D^-1 A)) x = mask
+    so any intensity (fractional or larger than 1) is a single solve,
+    and large intensities don't overshoot like repeated flood smoothing
+
+    vertIds - only smooth these vertices, the rest keep their weights
+    '''
+    mask = np.asarray(mask, dtype=np.float32)
+    if intensity <= 0:
+        return mask.copy()
+
+    vertCount = len(mask)
+    # isolated vertices keep their weight (degree 1, no neighbours)
+    degree = np.maximum(np.diff(adjacency.indptr), 1).astype(np.float64)
+
+    free = np.ones(vertCount, dtype=bool)
+    if vertIds is not None:
+        free[:] = False
+        free[np.asarray(vertIds, dtype=np.int64)] = True
+    freeIds = np.flatnonzero(free)
+    if not len(freeIds):
+        return mask.copy()
+
+    # symmetric form: (D + intensity * (D - A)) x = D * mask
+    diagonal = degree * (1.0 + intensity)
+
+    def matvec(x):
+        full = np.zeros(vertCount)
+        full[freeIds] = x
+        return (diagonal * full - intensity * adjacency.dot(full))[freeIds]
+
+    # pinned vertices only contribute to the right hand side
+    pinned = np.where(free, 0.0, mask)
+    b = (degree * mask + intensity * adjacency.dot(pinned))[freeIds]
+
+    result = mask.copy()
+    result[freeIds] = conjugateGradient(matvec, b, diagonal[freeIds], mask[freeIds], tolerance)
+    return result
+
+
+class LayerMask(object):
+    '''
+    mask of a layer as a numpy array
+    edits happen in memory, and are written back with a single setLayerMask
+
+    mask = LayerMask(mll, layerId)
+    mask.grow(2)
+    mask.smooth(0.5)
+    mask.write()
+    '''
+
+    def __init__(self, mll, layerId, adjacency=None):
+        '''
+        adjacency [CsrMatrix] - vertex adjacency, read from the mesh on first use if not given
+        '''
+        self.mll = mll
+        self.layerId = layerId
+        self.adjacency = adjacency
+
+        weights = mll.getLayerMask(layerId)
+        if len(weights):
+            self.weights = np.asarray(weights, dtype=np.float32)
+        else:
+            # uninitialized mask is fully on
+            self.weights = np.ones(mll.getVertCount(), dtype=np.float32)
+
+    def getAdjacency(self):
+        '''
+        '''
+        if self.adjacency is None:
+            self.adjacency = getMeshAdjacency(self.mll.getTargetInfo()[0])
+        return self.adjacency
+
+    def reverse(self):
+        self.weights = reverseMask(self.weights)
+
+    def unify(self, vertIds):
+        self.weights = unifyMask(self.weights, vertIds)
+
+    def clamp(self, low=0.0, high=1.0):
+        self.weights = clampMask(self.weights, low, high)
+
+    def remap(self, curve):
+        self.weights = remapMask(self.weights, curve)
+
+    def grow(self, steps=1):
+        self.weights = growMask(self.weights, self.getAdjacency(), steps)
+
+    def shrink(self, steps=1):
+        self.weights = shrinkMask(self.weights, self.getAdjacency(), steps)
+
+    def smooth(self, intensity=1.0, vertIds=None):
+        self.weights = smoothMask(self.weights, self.getAdjacency(), intensity, vertIds)
+
+    def write(self):
+        '''
+        sets mask on layer, clamped to 0..1
+        '''
+        self.mll.setLayerMask(self.layerId, clampMask(self.weights).tolist())
@@ -0,0 +1,190 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Geometry of recently used meshes (points, triangles, adjacency,
+spatial indices...), shared by all tools.
+
+Entries are keyed by mesh, and checked against a signature (topology
+counts, world matrix and a hash of all point positions), so repeated
+tool invocations on an unchanged rig skip the rest of geometry
+extraction. Points are copied straight out of Maya's point buffer,
+and can be handed on to whatever computes the cached item, so a miss
+doesn't read them twice. Least recently used meshes are evicted when
+the cache grows over its byte budget.
+
+Edits the signature can miss (e.g. editing uvs, or rewiring faces
+without changing their counts) need an explicit invalidateMesh(mesh).
+'''
+from collections import OrderedDict
+import ctypes
+import hashlib
+
+import numpy as np
+
+try:
+    import maya.OpenMaya as om
+except ImportError:
+    om = None
+
+from ngSkinToolsPlus.lib.skinWeights import getShapePath
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def estimateBytes(value, depth=4):
+    '''
+    memory used by the numpy arrays in value
+    (arrays, CsrMatrices, containers and objects holding arrays)
+    '''
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if depth <= 0:
+        return 0
+    if isinstance(value, dict):
+        return sum(estimateBytes(item, depth - 1) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimateBytes(item, depth - 1) for item in value)
+    if hasattr(value, '__dict__'):
+        return sum(estimateBytes(item, depth - 1) for item in vars(value).values())
+    return 0
+
+
+def readMeshPoints(mesh):
+    '''
+    object space points of mesh as (n x 3) float32 array
+    copied from MFnMesh.getRawPoints() in one go, instead of
+    converting a per-vertex list like mc.xform does
+    '''
+    fnMesh = om.MFnMesh(getShapePath(mesh))
+    count = fnMesh.numVertices()
+    if not count:
+        return np.zeros((0, 3), dtype=np.float32)
+
+    buffer = (ctypes.c_float * (count * 3)).from_address(int(fnMesh.getRawPoints()))
+    return np.frombuffer(buffer, dtype=np.float32).reshape(count, 3).copy()
+
+
+def getWorldMatrix(mesh):
+    '''
+    world matrix of mesh shape as 4x4 array (row vectors, like Maya)
+    '''
+    matrix = getShapePath(mesh).inclusiveMatrix()
+    return np.array([[matrix(row, column) for column in range(4)] for row in range(4)], dtype=np.float64)
+
+
+def getMeshSignature(mesh, points=None):
+    '''
+    returns (shape path, signature) of mesh
+    the signature changes when topology counts, transform or any point changes
+
+    points - object space points as returned by readMeshPoints,
+             read from the scene if not given
+    '''
+    dagPath = getShapePath(mesh)
+    fnMesh = om.MFnMesh(dagPath)
+    if points is None:
+        points = readMeshPoints(mesh)
+
+    pointHash = hashlib.sha1(np.ascontiguousarray(points).view(np.uint8)).hexdigest()
+    signature = (fnMesh.numVertices(), fnMesh.numEdges(), fnMesh.numPolygons(), fnMesh.numFaceVertices(),
+                 tuple(getWorldMatrix(mesh).ravel().tolist()), pointHash)
+    return dagPath.fullPathName(), signature
+
+
+class MeshCache(object):
+    '''
+    least recently used cache of per-mesh data
+
+    adjacency = meshCache.get('body_geo', 'adjacency', lambda: readAdjacency('body_geo'))
+    '''
+
+    def __init__(self, maxBytes=DEFAULT_MAX_BYTES):
+        self.maxBytes = maxBytes
+        # {mesh identity: [signature, {item: value}, bytes]}, least recently used first
+        self.entries = OrderedDict()
+        # running total of entry bytes, so eviction doesn't walk every entry
+        self.nbytes = 0
+
+    def get(self, mesh, item, compute, signature=None):
+        '''
+        returns item of mesh, calling compute() if it isn't cached
+        (or the mesh changed since it was cached)
+
+        signature - (identity, signature) as returned by getMeshSignature,
+                    read from the scene if not given
+        '''
+        identity, signature = getMeshSignature(mesh) if signature is None else signature
+
+        entry = self.entries.pop(identity, None)
+        if entry is not None and entry[0] != signature:
+            self.nbytes -= entry[2]
+            entry = None
+        if entry is None:
+            entry = [signature, {}, 0]
+        self.entries[identity] = entry
+
+        items = entry[1]
+        if item not in items:
+            items[item] = compute()
+        # re-measured on every use: cached objects grow (e.g. spatial indices built on demand)
+        self.resize(entry)
+        self.evict()
+        return items[item]
+
+    def resize(self, entry):
+        '''
+        updates bytes of entry and the running total
+        '''
+        size = estimateBytes(entry[1])
+        self.nbytes += size - entry[2]
+        entry[2] = size
+
+    def getSize(self):
+        '''
+        bytes used by cached arrays
+        '''
+        return self.nbytes
+
+    def evict(self):
+        '''
+        drops least recently used meshes until the cache fits maxBytes
+        the most recently used mesh is always kept
+        '''
+        while len(self.entries) > 1 and self.nbytes > self.maxBytes:
+            _, entry = self.entries.popitem(last=False)
+            self.nbytes -= entry[2]
+
+    def invalidate(self, mesh=None, item=None):
+        '''
+        forgets cached data of mesh (all meshes if None)
+        item - only forget this item of mesh
+        '''
+        if mesh is None:
+            self.entries.clear()
+            self.nbytes = 0
+            return
+
+        identity = getShapePath(mesh).fullPathName()
+        entry = self.entries.get(identity)
+        if entry is None:
+            return
+        if item is None:
+            del self.entries[identity]
+            self.nbytes -= entry[2]
+        else:
+            entry[1].pop(item, None)
+            self.resize(entry)
+
+
+# cache shared by all tools
+meshCache = MeshCache()
+
+
+def invalidateMesh(mesh=None):
+    '''
+    call after editing a mesh in ways the cache signature might not catch
+    (mesh=None clears the whole cache)
+    '''
+    meshCache.invalidate(mesh)
@@ -0,0 +1,206 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Mesh geometry as numpy arrays, for the native transfer engines.
+'''
+import hashlib
+
+import numpy as np
+
+try:
+    import maya.OpenMaya as om
+except ImportError:
+    om = None
+
+from ngSkinToolsPlus.lib.bvh import BVH
+from ngSkinToolsPlus.lib.geometry import vertexNormals
+from ngSkinToolsPlus.lib.meshCache import getMeshSignature, getWorldMatrix, meshCache, readMeshPoints
+from ngSkinToolsPlus.lib.skinWeights import getShapePath
+
+
+def hashArray(array):
+    '''
+    cheap content hash of a numpy array
+    '''
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1(array.view(np.uint8))
+    digest.update(str(array.shape).encode('ascii'))
+    return digest.hexdigest()
+
+
+class MeshData(object):
+    '''
+    vertex positions and triangles of a mesh
+    '''
+
+    def __init__(self, points, triangles):
+        '''
+        points - (n x 3) vertex positions
+        triangles - (m x 3) vertex ids
+        '''
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+
+        self.topologyHash = hashArray(self.triangles)
+        self.pointHash = hashArray(self.points)
+
+        self.normals = None
+
+        # spatial indices of this mesh, built on first use
+        self.triangleBVH = None
+        self.pointBVH = None
+
+    def getVertCount(self):
+        return len(self.points)
+
+    def getVertexNormals(self):
+        '''
+        area weighted vertex normals (computed on first use)
+        '''
+        if self.normals is None:
+            self.normals = vertexNormals(self.points, self.triangles)
+        return self.normals
+
+    def getPointBVH(self):
+        '''
+        BVH of vertices (built on first use)
+        '''
+        if self.pointBVH is None:
+            self.pointBVH = BVH(self.points, self.points)
+        return self.pointBVH
+
+    def getKey(self):
+        '''
+        identifies mesh by content: meshes with the same key
+        have the same topology and point positions
+        '''
+        return self.topologyHash, self.pointHash
+
+
+class MeshUvs(object):
+    '''
+    uvs of one uv set, per triangle corner (m x 3 x 2) and per vertex (n x 2)
+    triangles/vertices without uvs are nan
+    '''
+
+    def __init__(self, triangleUvs, vertexUvs):
+        self.triangleUvs = np.asarray(triangleUvs, dtype=np.float64).reshape(-1, 3, 2)
+        self.vertexUvs = np.asarray(vertexUvs, dtype=np.float64).reshape(-1, 2)
+        self.uvHash = hashArray(self.triangleUvs) + hashArray(self.vertexUvs)
+
+
+def mapUvs(vertexCounts, vertexList, uvCounts, uvIds, uvs, triangleCounts, triangleVerts, vertCount):
+    '''
+    converts Maya's per polygon uv assignment (MFnMesh.getAssignedUVs)
+    to uvs per triangle corner and per vertex
+
+    vertexCounts, vertexList - as returned by MFnMesh.getVertices
+    uvCounts, uvIds - as returned by MFnMesh.getAssignedUVs
+    uvs - (k x 2) uv coordinates
+    triangleCounts, triangleVerts - as returned by MFnMesh.getTriangles
+
+    returns MeshUvs
+    '''
+    vertexCounts = np.asarray(vertexCounts, dtype=np.int64)
+    vertexList = np.asarray(vertexList, dtype=np.int64)
+    uvCounts = np.asarray(uvCounts, dtype=np.int64)
+    uvIds = np.asarray(uvIds, dtype=np.int64)
+    uvs = np.asarray(uvs, dtype=np.float64).reshape(-1, 2)
+    triangleCounts = np.asarray(triangleCounts, dtype=np.int64)
+    triangleVerts = np.asarray(triangleVerts, dtype=np.int64)
+    if not len(uvs):
+        # uv set is empty, so nothing gets a uv
+        uvs = np.full((1, 2), np.nan)
+
+    # uv id of every face-vertex (-1 for polygons without uvs)
+    polygonIds = np.repeat(np.arange(len(vertexCounts)), vertexCounts)
+    faceVertexUvIds = np.full(len(vertexList), -1, dtype=np.int64)
+    faceVertexUvIds[(uvCounts > 0)[polygonIds]] = uvIds
+
+    # find face-vertex of each triangle corner by (polygon, vertex)
+    faceVertexKeys = polygonIds * vertCount + vertexList
+    order = np.argsort(faceVertexKeys)
+    trianglePolygonIds = np.repeat(np.arange(len(triangleCounts)), triangleCounts)
+    cornerKeys = np.repeat(trianglePolygonIds, 3) * vertCount + triangleVerts
+    cornerFaceVertices = order[np.searchsorted(faceVertexKeys[order], cornerKeys)]
+    cornerUvIds = faceVertexUvIds[cornerFaceVertices]
+
+    triangleUvs = np.where((cornerUvIds >= 0)[:, None], uvs[cornerUvIds], np.nan)
+
+    # every vertex takes the uv of the first face-vertex that has one
+    vertexUvIds = np.full(vertCount, -1, dtype=np.int64)
+    mapped = np.flatnonzero(faceVertexUvIds >= 0)[::-1]
+    vertexUvIds[vertexList[mapped]] = faceVertexUvIds[mapped]
+    vertexUvs = np.where((vertexUvIds >= 0)[:, None], uvs[vertexUvIds], np.nan)
+
+    return MeshUvs(triangleUvs, vertexUvs)
+
+
+def getMeshUvs(mesh, uvSet):
+    '''
+    reads uvs of uvSet from the scene
+    returns MeshUvs
+    '''
+    fnMesh = om.MFnMesh(getShapePath(mesh))
+
+    vertexCounts = om.MIntArray()
+    vertexList = om.MIntArray()
+    fnMesh.getVertices(vertexCounts, vertexList)
+
+    uvCounts = om.MIntArray()
+    uvIds = om.MIntArray()
+    fnMesh.getAssignedUVs(uvCounts, uvIds, uvSet)
+
+    u = om.MFloatArray()
+    v = om.MFloatArray()
+    fnMesh.getUVs(u, v, uvSet)
+
+    triangleCounts = om.MIntArray()
+    triangleVerts = om.MIntArray()
+    fnMesh.getTriangles(triangleCounts, triangleVerts)
+
+    uvs = np.column_stack((list(u), list(v))) if u.length() else np.zeros((0, 2))
+    return mapUvs(list(vertexCounts), list(vertexList), list(uvCounts), list(uvIds), uvs,
+                  list(triangleCounts), list(triangleVerts), fnMesh.numVertices())
+
+
+def getMeshData(mesh, sampleSpace=0, points=None):
+    '''
+    reads mesh from the scene
+    sampleSpace - 0 for world space, 1 for local space
+                  (same values as copySkinWeights -sampleSpace)
+    points - object space points as returned by readMeshPoints,
+             read from the scene if not given
+    '''
+    if points is None:
+        points = readMeshPoints(mesh)
+    points = np.asarray(points, dtype=np.float64)
+    if not sampleSpace:
+        matrix = getWorldMatrix(mesh)
+        points = points.dot(matrix[:3, :3]) + matrix[3, :3]
+
+    fnMesh = om.MFnMesh(getShapePath(mesh))
+    triangleCounts = om.MIntArray()
+    triangleVerts = om.MIntArray()
+    fnMesh.getTriangles(triangleCounts, triangleVerts)
+
+    return MeshData(points, list(triangleVerts))
+
+
+def getCachedMeshData(mesh, sampleSpace=0):
+    '''
+    getMeshData through the shared mesh cache
+    points read for the cache signature are reused on a miss
+    '''
+    points = readMeshPoints(mesh)
+    return meshCache.get(mesh, ('meshData', sampleSpace), lambda: getMeshData(mesh, sampleSpace, points),
+                         getMeshSignature(mesh, points))
+
+
+def getCachedMeshUvs(mesh, uvSet):
+    '''
+    getMeshUvs through the shared mesh cache
+    '''
+    return meshCache.get(mesh, ('meshUvs', uvSet), lambda: getMeshUvs(mesh, uvSet))
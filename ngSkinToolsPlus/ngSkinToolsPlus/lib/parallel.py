@@ -0,0 +1,157 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Process pools that work from inside Maya.
+
+Pools are opt-in (processes > 1), tools compute in Maya by default.
+Workers are only ever spawned as fresh interpreters: forking Maya would
+copy the whole session, GUI and BLAS threads included. Python 2 can only
+spawn on Windows, so elsewhere tasks run in Maya's process instead.
+
+Spawned workers run sys.executable, which inside Maya is maya.exe,
+so they are pointed at mayapy instead. Worker entry points live in
+Maya-free lib modules (see lib.transferWorkers), and only get numpy data.
+
+Large inputs are put in shared memory and handed to workers through the
+pool initializer, so they are not pickled for every task.
+'''
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+from ngSkinToolsPlus.lib.sparse import CsrMatrix
+
+
+def getMayaPyExecutable():
+    '''
+    returns path of mayapy next to the running Maya executable,
+    or None if not running inside Maya (or mayapy can't be found)
+    '''
+    folder, name = os.path.split(sys.executable)
+    name = os.path.splitext(name)[0].lower()
+    if not name.startswith('maya') or name == 'mayapy':
+        return None
+
+    path = os.path.join(folder, 'mayapy.exe' if sys.platform == 'win32' else 'mayapy')
+    if os.path.exists(path):
+        return path
+    return None
+
+
+def getProcessCount(processes=None, taskCount=None):
+    '''
+    number of worker processes to use
+    processes - requested number (None for one per cpu)
+    taskCount - no more workers than tasks
+    '''
+    if processes is None:
+        try:
+            processes = multiprocessing.cpu_count()
+        except NotImplementedError:
+            processes = 1
+    if taskCount is not None:
+        processes = min(processes, taskCount)
+    return max(processes, 1)
+
+
+def getSpawnContext():
+    '''
+    returns multiprocessing context that spawns fresh interpreters,
+    or None if workers can only be forked here
+    '''
+    if hasattr(multiprocessing, 'get_context'):
+        return multiprocessing.get_context('spawn')
+    if sys.platform == 'win32':
+        # python 2 always spawns on Windows
+        return multiprocessing
+    return None
+
+
+def createPool(processes, initializer=None, initargs=()):
+    '''
+    returns multiprocessing.Pool, or None if workers can't be started here
+    (callers then run their tasks in this process)
+    '''
+    if processes <= 1:
+        return None
+
+    # imported here, so that worker processes don't import maya.cmds through it
+    from ngSkinToolsPlus.lib.profiling import profiler
+
+    context = getSpawnContext()
+    if context is None:
+        profiler.warning('Worker processes would fork Maya, running in this process instead')
+        return None
+
+    executable = getMayaPyExecutable()
+    if executable is not None:
+        context.set_executable(executable)
+
+    try:
+        return context.Pool(processes, initializer, initargs)
+    except (OSError, ImportError, NotImplementedError), e:
+        profiler.warning('Could not start worker processes, running in this process instead: %s' % e)
+        return None
+
+
+def mapTasks(function, tasks, processes=1, initializer=None, initargs=()):
+    '''
+    returns [function(task) for task in tasks], computed by a process pool
+    function and initializer must be module level functions,
+    tasks and results must be picklable.
+    initializer(*initargs) runs once per worker, so data shared by
+    all tasks is sent to every worker once, instead of with every task
+    '''
+    tasks = list(tasks)
+    pool = createPool(getProcessCount(processes, len(tasks)), initializer, initargs)
+
+    if pool is None:
+        if initializer is not None:
+            initializer(*initargs)
+        return [function(task) for task in tasks]
+
+    try:
+        return pool.map(function, tasks, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def shareArray(array):
+    '''
+    copies array into shared memory
+    returns (buffer, dtype, shape), to be passed to workers as initializer arguments
+    (shared buffers can't be sent along with tasks)
+    '''
+    array = np.ascontiguousarray(array)
+    buffer = multiprocessing.RawArray('b', max(array.nbytes, 1))
+    np.frombuffer(buffer, dtype=array.dtype, count=array.size)[:] = array.ravel()
+    return buffer, array.dtype.str, array.shape
+
+
+def unshareArray(shared):
+    '''
+    returns numpy view of an array created by shareArray (no copy)
+    '''
+    buffer, dtype, shape = shared
+    count = int(np.prod(shape)) if shape else 1
+    return np.frombuffer(buffer, dtype=np.dtype(dtype), count=count).reshape(shape)
+
+
+def shareCsr(matrix):
+    '''
+    copies CsrMatrix into shared memory
+    '''
+    return (shareArray(matrix.indptr), shareArray(matrix.indices), shareArray(matrix.data), matrix.shape)
+
+
+def unshareCsr(shared):
+    '''
+    returns CsrMatrix viewing the shared buffers created by shareCsr
+    '''
+    indptr, indices, data, shape = shared
+    return CsrMatrix(unshareArray(indptr), unshareArray(indices), unshareArray(data), shape)
@@ -0,0 +1,241 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Per-phase profiling of the layer tools.
+
+Tools wrap their phases in profiler.phase(name), which also drives the
+progress window. While profiling is on, every phase records its wall time,
+the calls made through wrapped objects (MllInterface, skinCluster weights,
+maya.cmds) and the bytes of weight data they passed in and out, tagged
+with the current mesh pair and layer:
+
+with profiling('/tmp/copy.csv'):
+    copySkinLayers('body_geo', 'shirt_geo', [], ['name'], 'closestPoint', 0, True)
+
+When profiling is off, phase() only updates the progress window,
+and wrap() returns the object itself.
+'''
+from collections import OrderedDict
+from contextlib import contextmanager
+import csv
+import json
+import timeit
+
+import numpy as np
+
+try:
+    import maya.cmds as mc
+except ImportError:
+    mc = None
+
+# bytes per weight value passed as a python float list (doubles in Maya)
+LIST_VALUE_BYTES = 8
+
+REPORT_FIELDS = ('source', 'destination', 'layer', 'phase', 'seconds', 'calls', 'bytes')
+
+
+def weightBytes(value):
+    '''
+    bytes of weight data in value: float lists and numpy arrays
+    '''
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, list) and value and isinstance(value[0], float):
+        return len(value) * LIST_VALUE_BYTES
+    return 0
+
+
+class CallCounter(object):
+    '''
+    forwards attribute access to target,
+    counting method calls and weight data on profiler
+    '''
+
+    def __init__(self, target, name, profiler):
+        self._target = target
+        self._name = name
+        self._profiler = profiler
+
+    def __getattr__(self, attribute):
+        value = getattr(self._target, attribute)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            result = value(*args, **kwargs)
+            moved = weightBytes(result)
+            for arg in args:
+                moved += weightBytes(arg)
+            self._profiler.countCall('%s.%s' % (self._name, attribute), moved)
+            return result
+        return call
+
+
+class Profiler(object):
+    '''
+    records one entry per phase:
+    {source, destination, layer, phase, seconds, calls: {command: count}, bytes}
+    '''
+
+    def __init__(self):
+        self.enabled = False
+        self.records = []
+        self.context = {'source': '', 'destination': '', 'layer': ''}
+        # innermost running phase, collects calls
+        self.current = None
+
+    def start(self):
+        '''
+        starts recording (previous records are discarded)
+        '''
+        self.enabled = True
+        self.records = []
+
+    def stop(self):
+        self.enabled = False
+
+    def wrap(self, target, name):
+        '''
+        returns target, counting its method calls while profiling
+        '''
+        if not self.enabled or isinstance(target, CallCounter):
+            return target
+        return CallCounter(target, name, self)
+
+    def countCall(self, command, moved=0):
+        '''
+        adds a call of command to the current phase
+        moved - bytes of weight data passed in and out
+        '''
+        if self.current is None:
+            return
+        calls = self.current['calls']
+        calls[command] = calls.get(command, 0) + 1
+        self.current['bytes'] += moved
+
+    @contextmanager
+    def scope(self, **context):
+        '''
+        tags phases inside with source, destination or layer
+        '''
+        previous = dict(self.context)
+        self.context.update(context)
+        try:
+            yield
+        finally:
+            self.context = previous
+
+    def beginProgress(self, title, maxValue, cancellable=False):
+        '''
+        opens the progress window, for maxValue phases
+        cancellable - the window can be cancelled (with Esc), see isCancelled
+        '''
+        if mc is not None:
+            mc.progressWindow(title=title, progress=0, min=0, max=maxValue, status='',
+                              isInterruptable=cancellable)
+
+    def endProgress(self):
+        if mc is not None:
+            mc.progressWindow(endProgress=True)
+
+    def warning(self, message):
+        '''
+        shows message as a warning in Maya (printed outside of Maya)
+        '''
+        if mc is not None:
+            mc.warning(message)
+        else:
+            print 'Warning: %s' % message
+
+    def isCancelled(self):
+        '''
+        returns True if the user cancelled the progress window
+        '''
+        return mc is not None and bool(mc.progressWindow(q=True, isCancelled=True))
+
+    @contextmanager
+    def phase(self, name, step=1, status=None):
+        '''
+        shows name (or status) in the progress window, advancing it by step,
+        and records the phase while profiling
+        '''
+        if mc is not None:
+            mc.progressWindow(e=True, status=status or name, step=step)
+        if not self.enabled:
+            yield
+            return
+
+        record = OrderedDict(self.context)
+        record['phase'] = name
+        record['seconds'] = 0.0
+        record['calls'] = {}
+        record['bytes'] = 0
+
+        outer = self.current
+        self.current = record
+        started = timeit.default_timer()
+        try:
+            yield
+        finally:
+            record['seconds'] = timeit.default_timer() - started
+            self.current = outer
+            self.records.append(record)
+
+    def summarize(self, keys):
+        '''
+        returns records added up per unique combination of keys
+        e.g. keys=('source', 'destination') gives totals per mesh pair
+        '''
+        totals = OrderedDict()
+        for record in self.records:
+            key = tuple(record[name] for name in keys)
+            if key not in totals:
+                totals[key] = OrderedDict(zip(keys, key))
+                totals[key].update(seconds=0.0, calls={}, bytes=0)
+            total = totals[key]
+            total['seconds'] += record['seconds']
+            total['bytes'] += record['bytes']
+            for command, count in record['calls'].items():
+                total['calls'][command] = total['calls'].get(command, 0) + count
+        return list(totals.values())
+
+    def writeReport(self, filepath):
+        '''
+        writes records to a .csv file (one row per phase),
+        or to a .json file, with totals per layer and per mesh pair
+        '''
+        if filepath.lower().endswith('.csv'):
+            with open(filepath, 'wb') as f:
+                writer = csv.writer(f)
+                writer.writerow(REPORT_FIELDS)
+                for record in self.records:
+                    row = dict(record)
+                    row['calls'] = ' '.join('%s=%d' % item for item in sorted(record['calls'].items()))
+                    writer.writerow([row[field] for field in REPORT_FIELDS])
+            return
+
+        report = OrderedDict([('meshPairs', self.summarize(('source', 'destination'))),
+                              ('layers', self.summarize(('source', 'destination', 'layer'))),
+                              ('phases', self.records)])
+        with open(filepath, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+# profiler used by all tools
+profiler = Profiler()
+
+
+@contextmanager
+def profiling(reportPath=None):
+    '''
+    profiles the tools used inside, writing a report to reportPath (.json or .csv) if given
+    '''
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        if reportPath:
+            profiler.writeReport(reportPath)
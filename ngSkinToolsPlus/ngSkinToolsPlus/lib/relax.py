@@ -0,0 +1,105 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Laplacian relaxation of layer weights, numpy only.
+'''
+import numpy as np
+
+from ngSkinToolsPlus.lib.bvh import BVH
+
+
+def closestVertices(points, positions, bvh=None):
+    '''
+    returns id of the closest vertex to each position
+    bvh - BVH of points (built if not given)
+    '''
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    if not len(positions):
+        return np.zeros(0, dtype=np.int64)
+
+    def measure(queryIds, pointIds):
+        delta = points[pointIds] - positions[queryIds]
+        return np.einsum('ij,ij->i', delta, delta)
+
+    if bvh is None:
+        bvh = BVH(points, points)
+    vertIds, _ = bvh.nearest(positions, measure)
+    return vertIds
+
+
+def pinnedVertices(points, adjacency, positions, expand=True, bvh=None):
+    '''
+    returns boolean mask of vertices closest to positions (e.g. influence positions)
+    expand - also pin the neighbours of those vertices
+    bvh - BVH of points (built if not given)
+    '''
+    pinned = np.zeros(len(points), dtype=bool)
+    vertIds = closestVertices(points, positions, bvh)
+    pinned[vertIds] = True
+
+    if expand:
+        pinned |= adjacency.dot(pinned.astype(np.float32)) > 0
+    return pinned
+
+
+def neighbourTable(adjacency, rowIds):
+    '''
+    returns (len(rowIds) x max degree) table of neighbour ids,
+    padded with adjacency.shape[1] (one past the last vertex)
+    '''
+    starts = adjacency.indptr[rowIds]
+    counts = adjacency.indptr[rowIds + 1] - starts
+    table = np.full((len(rowIds), max(counts.max(), 1) if len(counts) else 1), adjacency.shape[1], dtype=np.int64)
+
+    rows = np.repeat(np.arange(len(rowIds)), counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    table[rows, offsets] = adjacency.indices[np.repeat(starts, counts) + offsets]
+    return table
+
+
+def relaxWeights(weights, adjacency, steps, stepSize, pinned=None):
+    '''
+    relaxes (influences x vertices) weights towards the average of their neighbours:
+    every step, weights += stepSize * (neighbour average - weights)
+
+    pinned - boolean mask of vertices that keep their weights
+    per-vertex totals are kept after every step, so normalized weights stay normalized.
+    vertices without weights on this layer are left empty
+    '''
+    weights = np.asarray(weights, dtype=np.float32)
+    influenceCount, vertCount = weights.shape
+
+    # vertex major, so that neighbour lookups gather contiguous rows.
+    # the extra last row stays zero, for padding in the neighbour table
+    padded = np.zeros((vertCount + 1, influenceCount), dtype=np.float32)
+    padded[:vertCount] = weights.T
+    totals = padded.sum(axis=1)
+
+    degree = np.diff(adjacency.indptr)
+    free = (totals[:vertCount] > 0) & (degree > 0)
+    if pinned is not None:
+        free &= ~np.asarray(pinned, dtype=bool)
+    freeIds = np.flatnonzero(free)
+    if not len(freeIds) or not influenceCount:
+        return weights.copy()
+
+    table = neighbourTable(adjacency, freeIds)
+    factor = (stepSize / degree[freeIds].astype(np.float32))[:, None]
+    freeTotals = totals[freeIds][:, None]
+
+    for _ in range(steps):
+        neighbourSum = padded[table[:, 0]]
+        for column in range(1, table.shape[1]):
+            neighbourSum += padded[table[:, column]]
+        relaxed = padded[freeIds] * (1.0 - stepSize) + neighbourSum * factor
+
+        # keep per-vertex totals
+        sums = relaxed.sum(axis=1)[:, None]
+        scale = np.zeros_like(sums)
+        np.divide(freeTotals, sums, out=scale, where=sums > 0)
+        padded[freeIds] = relaxed * scale
+
+    return padded[:vertCount].T.copy()
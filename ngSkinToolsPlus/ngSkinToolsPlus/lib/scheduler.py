@@ -0,0 +1,248 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Runs long tools without blocking Maya.
+
+A job is split in phases:
+
+extract() - reads the scene on the main thread, returns work items
+compute(item) - runs in a worker thread, numpy only (no maya.cmds, no MllInterface)
+apply(item, result) - main thread, one chunk of results at a time
+finish(cancelled) - main thread, once at the end (also after cancel or error)
+
+The worker computes items one after the other, and the main thread applies
+each result as it arrives, in between Maya's own events, so the UI stays
+responsive. While no result is ready, the main thread checks again every
+pollInterval seconds instead of spinning on Maya's idle queue. After a
+cancel or error the job keeps running (dropping results) until the worker
+returns from its current item, so the next job never overlaps with it.
+
+Main thread callbacks go through an executor, Maya's idle queue by default.
+Tests (and batch mode) use a QueueExecutor, and run it by hand:
+
+executor = QueueExecutor()
+scheduler = Scheduler(job, executor, startWorker=runInline)
+scheduler.start()
+executor.runPending()
+'''
+from collections import deque
+import Queue
+import sys
+import threading
+
+try:
+    import maya.utils as mu
+except ImportError:
+    mu = None
+
+# kinds of worker queue entries
+RESULT = 'result'
+ERROR = 'error'
+DONE = 'done'
+
+
+class DeferredExecutor(object):
+    '''
+    runs callbacks on Maya's main thread, when it's idle
+    '''
+
+    def submit(self, callback):
+        mu.executeDeferred(callback)
+
+    def submitLater(self, callback, delay):
+        '''
+        submits callback after delay seconds
+        '''
+        timer = threading.Timer(delay, mu.executeDeferred, [callback])
+        timer.daemon = True
+        timer.start()
+
+
+class QueueExecutor(object):
+    '''
+    collects callbacks until runPending is called
+    (stands in for the main thread in tests and batch mode)
+    '''
+
+    def __init__(self):
+        self.pending = deque()
+
+    def submit(self, callback):
+        self.pending.append(callback)
+
+    def submitLater(self, callback, delay):
+        # runPending is the clock
+        self.pending.append(callback)
+
+    def runPending(self, limit=None):
+        '''
+        runs callbacks, including the ones they submit, until none are left (or limit ran)
+        returns number of callbacks run
+        '''
+        count = 0
+        while self.pending and (limit is None or count < limit):
+            self.pending.popleft()()
+            count += 1
+        return count
+
+
+def startThread(function):
+    '''
+    runs function in a daemon thread, so a running job doesn't keep Maya from quitting
+    returns the thread
+    '''
+    thread = threading.Thread(target=function, name='ngSkinToolsPlus worker')
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def runInline(function):
+    '''
+    runs "worker" function right away, on the calling thread
+    (returns no thread, the work is done when it returns)
+    '''
+    function()
+
+
+class Scheduler(object):
+    '''
+    runs a job: extract on start(), compute in a worker,
+    apply and finish through the main thread executor
+
+    state is 'idle', 'running', then 'done', 'cancelled' or 'failed'
+    once the worker is done
+    '''
+
+    def __init__(self, job, executor=None, startWorker=startThread, isCancelled=None,
+                 onDone=None, chunkSize=1, pollInterval=0.05):
+        '''
+        executor - runs main thread callbacks (DeferredExecutor if None)
+        startWorker - startWorker(function) runs function off the main thread,
+                      returns its thread (if any)
+        isCancelled - polled on the main thread before every chunk,
+                      e.g. the progress window's cancel button
+        onDone - onDone(scheduler), called on the main thread after finish
+        chunkSize - results applied per main thread callback
+        pollInterval - seconds between checks for results while none are ready
+        '''
+        self.job = job
+        self.executor = executor or DeferredExecutor()
+        self.startWorker = startWorker
+        self.isCancelled = isCancelled
+        self.onDone = onDone
+        self.chunkSize = chunkSize
+        self.pollInterval = pollInterval
+
+        self.state = 'idle'
+        self.results = Queue.Queue()
+        self.cancelRequested = threading.Event()
+        # an error was raised, the job fails once the worker is done
+        self.failed = False
+        self.worker = None
+        self.total = 0
+        self.applied = 0
+
+    def isRunning(self):
+        '''
+        True until the job is finished and the worker has returned,
+        also while a cancel is pending
+        '''
+        return self.state == 'running' or (self.worker is not None and self.worker.is_alive())
+
+    def start(self):
+        '''
+        extracts on the calling (main) thread, then starts computing in the background
+        '''
+        if self.state != 'idle':
+            raise RuntimeError('Scheduler was started already')
+        self.state = 'running'
+        try:
+            items = list(self.job.extract())
+        except Exception:
+            self.state = 'failed'
+            raise
+
+        self.total = len(items)
+        self.worker = self.startWorker(lambda: self.work(items))
+        self.executor.submit(self.tick)
+
+    def cancel(self):
+        '''
+        stops the job: the worker stops after its current item,
+        and results that were not applied yet are dropped
+        '''
+        self.cancelRequested.set()
+
+    def fail(self):
+        '''
+        main thread: cancels after an error, the job fails once the worker is done
+        '''
+        if not self.failed:
+            self.failed = True
+            self.cancel()
+            self.executor.submit(self.tick)
+
+    def work(self, items):
+        '''
+        worker thread: computes items until all are done, or cancelled
+        '''
+        try:
+            for item in items:
+                if self.cancelRequested.is_set():
+                    break
+                self.results.put((RESULT, item, self.job.compute(item)))
+        except Exception:
+            self.results.put((ERROR, None, sys.exc_info()))
+        finally:
+            self.results.put((DONE, None, None))
+
+    def tick(self):
+        '''
+        main thread: applies up to chunkSize results, then yields back to Maya
+        results that arrive after a cancel are dropped, until the worker is done
+        '''
+        if self.state != 'running':
+            return
+        if self.isCancelled is not None and not self.cancelRequested.is_set() and self.isCancelled():
+            self.cancel()
+
+        try:
+            for _ in range(self.chunkSize):
+                try:
+                    kind, item, value = self.results.get_nowait()
+                except Queue.Empty:
+                    self.executor.submitLater(self.tick, self.pollInterval)
+                    return
+
+                if kind == DONE:
+                    self.stop()
+                    return
+                if kind == ERROR:
+                    raise value[0], value[1], value[2]
+                if not self.cancelRequested.is_set():
+                    self.job.apply(item, value)
+                    self.applied += 1
+        except Exception:
+            self.fail()
+            raise
+
+        self.executor.submit(self.tick)
+
+    def stop(self):
+        '''
+        main thread: ends the job, once the worker is done
+        '''
+        if self.failed:
+            self.state = 'failed'
+        elif self.cancelRequested.is_set():
+            self.state = 'cancelled'
+        else:
+            self.state = 'done'
+        try:
+            self.job.finish(self.state != 'done')
+        finally:
+            if self.onDone is not None:
+                self.onDone(self)
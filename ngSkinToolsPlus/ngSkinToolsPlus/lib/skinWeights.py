@@ -0,0 +1,251 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Bulk access to skinCluster weights.
+
+Weights are always handled as a (influences x vertices) float32 numpy matrix,
+i.e. the same layout as copySkinLayers.queryWeights used to return,
+so matrix[influenceId] gives the weights of one influence.
+
+MayaSkinClusterWeights reads and writes the whole skinCluster with a single
+MFnSkinCluster.getWeights/setWeights call (API 2.0). API 2.0 arrays don't
+expose a buffer, so values are still converted one by one on the python
+side (np.fromiter when reading, a list when writing), but without API 1.0's
+per-value MScriptUtil calls.
+FakeSkinClusterWeights is a pure-Python stand-in with the same interface,
+so that code using it can be tested and benchmarked without Maya.
+'''
+import numpy as np
+
+try:
+    # API 2.0, for MayaSkinClusterWeights
+    import maya.api.OpenMaya as om2
+    import maya.api.OpenMayaAnim as oma2
+except ImportError:
+    # allow the fake backend to be used outside of Maya
+    om2 = None
+    oma2 = None
+
+try:
+    # API 1.0, for getShapePath: other lib modules use its MDagPath with API 1.0 function sets
+    import maya.OpenMaya as om
+except ImportError:
+    om = None
+
+
+class SkinClusterWeights(object):
+    '''
+    interface for reading and writing all weights of a skinCluster in one go
+    '''
+
+    def getInfluences(self):
+        '''
+        returns list of influence names, in the same order as
+        the rows of getWeights()
+        '''
+        raise NotImplementedError
+
+    def getVertCount(self):
+        '''
+        returns number of vertices on the deformed mesh
+        '''
+        raise NotImplementedError
+
+    def getWeights(self):
+        '''
+        returns (influences x vertices) float32 matrix
+        '''
+        raise NotImplementedError
+
+    def setWeights(self, weights, vertIds=None, influenceIds=None, normalize=False):
+        '''
+        write weights in one operation
+        weights - (len(influenceIds) x len(vertIds)) matrix
+        vertIds - vertices to write (all vertices if None)
+        influenceIds - rows to write (all influences if None)
+        normalize - if True, other influences are scaled so that
+                    each written vertex adds up to 1.0
+        '''
+        raise NotImplementedError
+
+
+class MayaSkinClusterWeights(SkinClusterWeights):
+    '''
+    reads weights from a skinCluster using the Maya API
+    '''
+
+    def __init__(self, skinCluster, mesh=None):
+        '''
+        skinCluster [string] - name of skinCluster node
+        mesh [string] - name of deformed mesh (optional). If not given,
+                        the first output geometry of the skinCluster is used
+        '''
+        self.skinCluster = skinCluster
+        self.mesh = mesh
+
+        sel = om2.MSelectionList()
+        sel.add(skinCluster)
+        self.fnSkin = oma2.MFnSkinCluster(sel.getDependNode(0))
+
+        if mesh is None:
+            self.meshPath = self.fnSkin.getPathAtIndex(0)
+        else:
+            sel = om2.MSelectionList()
+            sel.add(getShapePath(mesh).fullPathName())
+            self.meshPath = sel.getDagPath(0)
+
+    def getInfluences(self):
+        '''
+        '''
+        return [path.partialPathName() for path in self.fnSkin.influenceObjects()]
+
+    def getVertCount(self):
+        '''
+        '''
+        return om2.MFnMesh(self.meshPath).numVertices
+
+    def getVertComponent(self, vertIds=None):
+        '''
+        returns MObject for vertIds (or for all verts if vertIds is None)
+        '''
+        fnComp = om2.MFnSingleIndexedComponent()
+        comp = fnComp.create(om2.MFn.kMeshVertComponent)
+        if vertIds is None:
+            fnComp.setCompleteData(self.getVertCount())
+        else:
+            fnComp.addElements(om2.MIntArray(np.asarray(vertIds, dtype=np.int64).tolist()))
+        return comp
+
+    def getWeights(self):
+        '''
+        '''
+        weights, influenceCount = self.fnSkin.getWeights(self.meshPath, self.getVertComponent())
+
+        # API gives us vertex-major weights, transpose to influence-major
+        flatWeights = np.fromiter(weights, dtype=np.float32, count=len(weights))
+        return flatWeights.reshape(-1, influenceCount).T.copy()
+
+    def setWeights(self, weights, vertIds=None, influenceIds=None, normalize=False):
+        '''
+        note: MFnSkinCluster.setWeights is not undoable
+        '''
+        weights = np.asarray(weights, dtype=np.float64)
+        if influenceIds is None:
+            influenceIds = range(weights.shape[0])
+        indices = om2.MIntArray(np.asarray(influenceIds, dtype=np.int64).tolist())
+
+        # API wants vertex-major weights
+        values = om2.MDoubleArray(weights.T.ravel().tolist())
+
+        self.fnSkin.setWeights(self.meshPath, self.getVertComponent(vertIds), indices, values, normalize)
+
+
+class FakeSkinClusterWeights(SkinClusterWeights):
+    '''
+    in-memory skinCluster, for testing and benchmarking outside of Maya
+    '''
+
+    def __init__(self, influences, weights):
+        '''
+        influences [list] - influence names
+        weights - (influences x vertices) matrix
+        '''
+        self.influences = list(influences)
+        self.weights = np.array(weights, dtype=np.float32)
+        if self.weights.shape[0] != len(self.influences):
+            raise ValueError('Got %d influences, but weights have %d rows' %
+                             (len(self.influences), self.weights.shape[0]))
+
+        # number of calls made to each method, for benchmarks
+        self.callCount = {}
+
+    def countCall(self, name):
+        self.callCount[name] = self.callCount.get(name, 0) + 1
+
+    def getInfluences(self):
+        '''
+        '''
+        self.countCall('getInfluences')
+        return list(self.influences)
+
+    def getVertCount(self):
+        '''
+        '''
+        self.countCall('getVertCount')
+        return self.weights.shape[1]
+
+    def getWeights(self):
+        '''
+        '''
+        self.countCall('getWeights')
+        return self.weights.copy()
+
+    def setWeights(self, weights, vertIds=None, influenceIds=None, normalize=False):
+        '''
+        '''
+        self.countCall('setWeights')
+        if vertIds is None:
+            vertIds = np.arange(self.weights.shape[1])
+        if influenceIds is None:
+            influenceIds = np.arange(self.weights.shape[0])
+        vertIds = np.asarray(vertIds, dtype=np.intp)
+        influenceIds = np.asarray(influenceIds, dtype=np.intp)
+
+        self.weights[np.ix_(influenceIds, vertIds)] = weights
+
+        if normalize:
+            others = np.ones(self.weights.shape[0], dtype=bool)
+            others[influenceIds] = False
+            written = self.weights[influenceIds][:, vertIds].sum(axis=0)
+            self.weights[:, vertIds] = normalizeOtherInfluences(self.weights[:, vertIds], others, written)
+
+
+def normalizeOtherInfluences(weights, others, fixedTotal):
+    '''
+    scales rows flagged in others, so that every column of weights
+    adds up to 1.0 while keeping the weight of the remaining rows (fixedTotal)
+    '''
+    weights = np.array(weights, dtype=np.float32)
+    otherTotal = weights[others].sum(axis=0)
+    remaining = np.clip(1.0 - fixedTotal, 0.0, 1.0)
+    scale = np.zeros_like(otherTotal)
+    np.divide(remaining, otherTotal, out=scale, where=otherTotal > 0)
+    weights[others] *= scale
+    return weights
+
+
+def transformInfluenceWeights(weights, influenceId, values):
+    '''
+    vectorized equivalent of skinPercent -transformValue on every vertex:
+    sets weights[influenceId] to values, and scales the other influences
+    so that each vertex still adds up to 1.0
+    '''
+    weights = np.array(weights, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    weights[influenceId] = values
+    others = np.ones(weights.shape[0], dtype=bool)
+    others[influenceId] = False
+    return normalizeOtherInfluences(weights, others, values)
+
+
+def getShapePath(mesh):
+    '''
+    returns API 1.0 MDagPath to the (non-intermediate) mesh shape of mesh
+    '''
+    sel = om.MSelectionList()
+    sel.add(mesh)
+    path = om.MDagPath()
+    sel.getDagPath(0, path)
+    if path.apiType() == om.MFn.kMesh:
+        return path
+
+    # skip intermediate objects (e.g. orig shapes of skinned meshes)
+    for index in range(path.childCount()):
+        child = path.child(index)
+        if child.apiType() == om.MFn.kMesh and not om.MFnDagNode(child).isIntermediateObject():
+            path.push(child)
+            return path
+
+    raise RuntimeError('%s has no mesh shape' % mesh)
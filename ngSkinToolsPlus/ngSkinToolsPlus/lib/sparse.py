@@ -0,0 +1,159 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Minimal compressed sparse row matrix, numpy only
+(scipy is not available in every Maya install).
+'''
+import numpy as np
+
+
+class CsrMatrix(object):
+    '''
+    sparse (rows x cols) matrix in CSR format
+    row i holds values data[indptr[i]:indptr[i+1]]
+    in columns indices[indptr[i]:indptr[i+1]]
+    '''
+
+    def __init__(self, indptr, indices, data, shape):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        # vertex counts stay well below 2^31, int32 keeps the matrix small
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.data = np.asarray(data, dtype=np.float32)
+        self.shape = tuple(shape)
+
+    @classmethod
+    def fromCoo(cls, rows, cols, values, shape):
+        '''
+        builds matrix from coordinate arrays
+        duplicate entries are added together, explicit zeros are dropped
+        '''
+        rows = np.asarray(rows, dtype=np.int64).ravel()
+        cols = np.asarray(cols, dtype=np.int64).ravel()
+        values = np.asarray(values, dtype=np.float64).ravel()
+
+        order = np.lexsort((cols, rows))
+        rows, cols, values = rows[order], cols[order], values[order]
+
+        # sum up duplicates
+        unique = np.ones(len(rows), dtype=bool)
+        unique[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        groups = np.cumsum(unique) - 1
+        summed = np.bincount(groups, weights=values, minlength=unique.sum()) if len(values) else values
+        rows, cols, values = rows[unique], cols[unique], summed
+
+        nonzero = values != 0
+        rows, cols, values = rows[nonzero], cols[nonzero], values[nonzero]
+
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return cls(indptr, cols, values, shape)
+
+    @classmethod
+    def fromDense(cls, dense):
+        '''
+        builds matrix from the nonzero values of a dense 2D array
+        '''
+        dense = np.asarray(dense)
+        rows, cols = np.nonzero(dense)
+        return cls.fromCoo(rows, cols, dense[rows, cols], dense.shape)
+
+    @classmethod
+    def vstack(cls, matrices):
+        '''
+        stacks matrices with the same number of columns on top of each other
+        '''
+        matrices = list(matrices)
+        cols = matrices[0].shape[1] if matrices else 0
+        indptr = [np.zeros(1, dtype=np.int64)]
+        offset = 0
+        for matrix in matrices:
+            indptr.append(matrix.indptr[1:] + offset)
+            offset += matrix.nnz
+        return cls(np.concatenate(indptr),
+                   np.concatenate([matrix.indices for matrix in matrices] or [np.zeros(0, dtype=np.int32)]),
+                   np.concatenate([matrix.data for matrix in matrices] or [np.zeros(0, dtype=np.float32)]),
+                   (sum(matrix.shape[0] for matrix in matrices), cols))
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def rowIds(self):
+        '''
+        row index of every stored value
+        '''
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def dot(self, dense):
+        '''
+        returns self * dense, where dense is a (cols,) or (cols x k) array
+        '''
+        dense = np.asarray(dense)
+        result = np.zeros((self.shape[0],) + dense.shape[1:], dtype=np.float32)
+        if not self.nnz:
+            return result
+
+        products = dense[self.indices] * self.data.reshape((-1,) + (1,) * (dense.ndim - 1))
+
+        # reduceat does not handle empty rows, so only reduce the filled ones
+        filled = np.flatnonzero(np.diff(self.indptr))
+        result[filled] = np.add.reduceat(products, self.indptr[filled], axis=0)
+        return result
+
+    def matmul(self, other):
+        '''
+        returns sparse product self * other, where other is a CsrMatrix
+        '''
+        # every stored value (i, k) of self is combined with row k of other
+        columns = self.indices
+        counts = other.indptr[columns + 1] - other.indptr[columns]
+        total = counts.sum()
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = np.repeat(other.indptr[columns], counts) + offsets
+
+        rows = np.repeat(self.rowIds(), counts)
+        values = np.repeat(self.data, counts) * other.data[positions]
+        return CsrMatrix.fromCoo(rows, other.indices[positions], values, (self.shape[0], other.shape[1]))
+
+    def getRows(self, start, stop):
+        '''
+        returns rows start to stop as a new matrix, sharing this matrix's arrays
+        '''
+        first, last = self.indptr[start], self.indptr[stop]
+        return CsrMatrix(self.indptr[start:stop + 1] - first, self.indices[first:last],
+                         self.data[first:last], (stop - start, self.shape[1]))
+
+    def getRow(self, row):
+        '''
+        returns dense copy of one row
+        '''
+        dense = np.zeros(self.shape[1], dtype=np.float32)
+        start, end = self.indptr[row], self.indptr[row + 1]
+        dense[self.indices[start:end]] = self.data[start:end]
+        return dense
+
+    def columnSums(self):
+        '''
+        '''
+        return np.bincount(self.indices, weights=self.data, minlength=self.shape[1])
+
+    def nbytes(self):
+        '''
+        memory used by the stored arrays
+        '''
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    def transpose(self):
+        '''
+        returns transposed matrix
+        '''
+        return CsrMatrix.fromCoo(self.indices, self.rowIds(), self.data, self.shape[::-1])
+
+    def toDense(self):
+        '''
+        '''
+        dense = np.zeros(self.shape, dtype=np.float32)
+        dense[self.rowIds(), self.indices] = self.data
+        return dense
@@ -0,0 +1,253 @@
+'''
+Created on 01/09/2013
+
+@author: Leon
+
+numpy only, so worker processes can import it without Maya
+'''
+import numpy as np
+
+from ngSkinToolsPlus.lib.bvh import BVH
+from ngSkinToolsPlus.lib.geometry import triangleBounds, closestPointOnTriangles, sqDistanceToTriangles, intersectLineTriangles
+from ngSkinToolsPlus.lib.sparse import CsrMatrix
+from ngSkinToolsPlus.lib.uvGrid import UvGrid
+
+class SurfaceAssociation(object):
+    '''
+    Maps vertices of a destination mesh onto a source mesh.
+
+    The result is a sparse (destVerts x srcVerts) interpolation matrix,
+    so any per-vertex data (influence weights, masks) can be transferred
+    from source to destination with a single matrix multiplication.
+    '''
+
+
+    def __init__(self, srcPoints, srcTriangles, destPoints, method='closestPoint', destNormals=None,
+                 srcTriangleUvs=None, destUvs=None, triangleBVH=None, pointBVH=None):
+        '''
+        srcPoints - (n x 3) vertex positions of source mesh
+        srcTriangles - (m x 3) vertex ids of source mesh triangles
+        destPoints - (k x 3) vertex positions of destination mesh
+        method - "closestPoint", "rayCast", "uvSpace" or "closestComponent"
+        destNormals - (k x 3) vertex normals of destination mesh, needed for "rayCast"
+        srcTriangleUvs - (m x 3 x 2) uvs of source triangle corners, needed for "uvSpace"
+        destUvs - (k x 2) uvs of destination vertices, needed for "uvSpace"
+                  (nan for unmapped triangles/vertices)
+        triangleBVH, pointBVH - BVHs of source triangles/vertices, built on first use if not given.
+                  pass them in to share one source mesh between many destinations
+        '''
+        self.srcPoints = np.asarray(srcPoints, dtype=np.float64)
+        self.srcTriangles = np.asarray(srcTriangles, dtype=np.int64)
+        self.destPoints = np.asarray(destPoints, dtype=np.float64)
+        self.triangleBVH = triangleBVH
+        self.pointBVH = pointBVH
+        self.transposedMatrix = None
+
+        if method == 'closestPoint':
+            self.matrix = self.matchByClosestPoint()
+        elif method == 'rayCast':
+            self.matrix = self.matchByRayCast(np.asarray(destNormals, dtype=np.float64))
+        elif method == 'uvSpace':
+            self.matrix = self.matchByUvSpace(np.asarray(srcTriangleUvs, dtype=np.float64),
+                                              np.asarray(destUvs, dtype=np.float64))
+        elif method == 'closestComponent':
+            self.matrix = self.matchByClosestComponent()
+        else:
+            raise ValueError('Unknown surface association: %s' % method)
+
+    @classmethod
+    def fromMatrix(cls, matrix, transposedMatrix=None):
+        '''
+        association from a precomputed interpolation matrix
+        (can transfer weights, but has no meshes to search)
+        '''
+        association = cls.__new__(cls)
+        association.__setstate__({'matrix': matrix})
+        association.transposedMatrix = transposedMatrix
+        return association
+
+    def getTriangleBVH(self):
+        '''
+        '''
+        if self.triangleBVH is None:
+            self.triangleBVH = BVH(*triangleBounds(self.srcPoints, self.srcTriangles))
+        return self.triangleBVH
+
+    def getPointBVH(self):
+        '''
+        '''
+        if self.pointBVH is None:
+            self.pointBVH = BVH(self.srcPoints, self.srcPoints)
+        return self.pointBVH
+
+    def __getstate__(self):
+        '''
+        only the interpolation matrix is needed once it is computed,
+        so meshes and BVHs are left out when pickling (e.g. to send it between processes)
+        '''
+        return {'matrix': self.matrix}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.triangleBVH = None
+        self.pointBVH = None
+        self.transposedMatrix = None
+
+    def findClosestTriangles(self, destPoints):
+        '''
+        returns id of the closest source triangle for each point
+        '''
+        triangles = self.srcTriangles
+        points = self.srcPoints
+
+        def measure(queryIds, triangleIds):
+            corners = triangles[triangleIds]
+            return sqDistanceToTriangles(destPoints[queryIds], points[corners[:, 0]],
+                                         points[corners[:, 1]], points[corners[:, 2]])
+
+        triangleIds, _ = self.getTriangleBVH().nearest(destPoints, measure)
+        return triangleIds
+
+    def matchByClosestPoint(self):
+        '''
+        find closest point on source surface for every destination vertex,
+        and interpolate between the corners of that triangle
+        '''
+        triangleIds = self.findClosestTriangles(self.destPoints)
+        return self.barycentricMatrix(triangleIds, self.destPoints)
+
+    def matchByRayCast(self, destNormals):
+        '''
+        cast rays from every destination vertex along its normal (both ways),
+        and interpolate between the corners of the closest hit triangle.
+        vertices whose rays miss the source surface use the closest point instead
+        '''
+        triangles = self.srcTriangles
+        points = self.srcPoints
+        destPoints = self.destPoints
+
+        def measure(queryIds, triangleIds):
+            corners = triangles[triangleIds]
+            t, _ = intersectLineTriangles(destPoints[queryIds], destNormals[queryIds], points[corners[:, 0]],
+                                          points[corners[:, 1]], points[corners[:, 2]])
+            distance = np.abs(t)
+            distance[np.isnan(distance)] = np.inf
+            return distance
+
+        triangleIds, _ = self.getTriangleBVH().raycast(destPoints, destNormals, measure)
+
+        # hit points on the source surface
+        hits = np.flatnonzero(triangleIds >= 0)
+        corners = triangles[triangleIds[hits]]
+        t, _ = intersectLineTriangles(destPoints[hits], destNormals[hits], points[corners[:, 0]],
+                                      points[corners[:, 1]], points[corners[:, 2]])
+        projected = destPoints.copy()
+        projected[hits] += destNormals[hits] * t[:, None]
+
+        misses = np.flatnonzero(triangleIds < 0)
+        if len(misses):
+            triangleIds[misses] = self.findClosestTriangles(destPoints[misses])
+
+        # closest point on the hit triangle is the hit point itself
+        return self.barycentricMatrix(triangleIds, projected)
+
+    def matchByUvSpace(self, srcTriangleUvs, destUvs):
+        '''
+        locate every destination uv inside the source uv triangles,
+        and interpolate between the corners of that triangle.
+        uvs outside of the source uv shells use the closest point in uv space,
+        vertices without uvs use the closest point on the surface
+        '''
+        destCount = len(self.destPoints)
+        triangleIds = np.full(destCount, -1, dtype=np.int64)
+        bary = np.zeros((destCount, 3))
+
+        mapped = np.flatnonzero(np.isfinite(srcTriangleUvs.reshape(-1, 6)).all(axis=1))
+        if len(mapped):
+            found, foundBary = UvGrid(srcTriangleUvs[mapped]).locate(destUvs)
+            hits = found >= 0
+            triangleIds[hits] = mapped[found[hits]]
+            bary[hits] = foundBary[hits]
+
+            misses = np.flatnonzero((triangleIds < 0) & np.isfinite(destUvs).all(axis=1))
+            if len(misses):
+                # closest point in uv space: same as on a flat mesh at z=0
+                flatUvs = np.zeros((len(mapped), 3, 3))
+                flatUvs[..., :2] = srcTriangleUvs[mapped]
+                flatDestUvs = np.zeros((len(misses), 3))
+                flatDestUvs[:, :2] = destUvs[misses]
+
+                def measure(queryIds, triangleIds):
+                    corners = flatUvs[triangleIds]
+                    return sqDistanceToTriangles(flatDestUvs[queryIds], corners[:, 0], corners[:, 1], corners[:, 2])
+
+                closest, _ = BVH(flatUvs.min(axis=1), flatUvs.max(axis=1)).nearest(flatDestUvs, measure)
+                corners = flatUvs[closest]
+                _, bary[misses] = closestPointOnTriangles(flatDestUvs, corners[:, 0], corners[:, 1], corners[:, 2])
+                triangleIds[misses] = mapped[closest]
+
+        unmapped = np.flatnonzero(triangleIds < 0)
+        if len(unmapped):
+            triangleIds[unmapped] = self.findClosestTriangles(self.destPoints[unmapped])
+            bary[unmapped] = self.projectOntoTriangles(triangleIds[unmapped], self.destPoints[unmapped])
+
+        return self.interpolationMatrix(triangleIds, bary)
+
+    def projectOntoTriangles(self, triangleIds, destPoints):
+        '''
+        barycentric coordinates of closest points on source triangles
+        '''
+        corners = self.srcTriangles[triangleIds]
+        points = self.srcPoints
+        _, bary = closestPointOnTriangles(destPoints, points[corners[:, 0]],
+                                          points[corners[:, 1]], points[corners[:, 2]])
+        return bary
+
+    def barycentricMatrix(self, triangleIds, destPoints):
+        '''
+        interpolation matrix for destination points projected onto source triangles
+        '''
+        return self.interpolationMatrix(triangleIds, self.projectOntoTriangles(triangleIds, destPoints))
+
+    def interpolationMatrix(self, triangleIds, bary):
+        '''
+        interpolation matrix from barycentric coordinates on source triangles
+        '''
+        corners = self.srcTriangles[triangleIds]
+        rows = np.repeat(np.arange(len(triangleIds)), 3)
+        return CsrMatrix.fromCoo(rows, corners, bary, (len(triangleIds), len(self.srcPoints)))
+
+    def matchByClosestComponent(self):
+        '''
+        each destination vertex takes the values of the closest source vertex
+        '''
+        bvh = self.getPointBVH()
+
+        points = self.srcPoints
+        destPoints = self.destPoints
+
+        def measure(queryIds, pointIds):
+            delta = points[pointIds] - destPoints[queryIds]
+            return np.einsum('ij,ij->i', delta, delta)
+
+        pointIds, _ = bvh.nearest(destPoints, measure)
+        destCount = len(destPoints)
+        return CsrMatrix.fromCoo(np.arange(destCount), pointIds, np.ones(destCount), (destCount, len(points)))
+
+    def transfer(self, weights):
+        '''
+        weights - (n x srcVerts) matrix, e.g. influence weights of a layer,
+                  or (srcVerts,) array, e.g. a layer mask
+        returns (n x destVerts) matrix (or (destVerts,) array)
+        '''
+        weights = np.asarray(weights, dtype=np.float32)
+        return self.matrix.dot(weights.T).T
+
+    def transferSparse(self, weights):
+        '''
+        weights [CsrMatrix] - (n x srcVerts) sparse matrix
+        returns (n x destVerts) sparse matrix
+        '''
+        if self.transposedMatrix is None:
+            self.transposedMatrix = self.matrix.transpose()
+        return weights.matmul(self.transposedMatrix)
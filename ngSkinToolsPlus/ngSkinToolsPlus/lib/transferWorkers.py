@@ -0,0 +1,136 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Transfer work that runs in worker processes (see lib.parallel).
+
+Workers are fresh interpreters that import this module to find their
+entry points, so it only depends on numpy and other Maya-free lib
+modules: importing utilities would import ngSkinTools and maya.cmds.
+'''
+import numpy as np
+
+from ngSkinToolsPlus.lib.layerWeights import SparseLayerWeights
+from ngSkinToolsPlus.lib.parallel import shareArray, shareCsr, unshareArray, unshareCsr
+from ngSkinToolsPlus.lib.sparse import CsrMatrix
+from ngSkinToolsPlus.lib.surfaceAssociation import SurfaceAssociation
+
+
+class SourceMesh(object):
+    '''
+    source mesh shared by many destinations:
+    its BVHs are built for the first destination, and reused for the rest.
+    BVHs are kept on meshData, so cached MeshData keeps them between copies
+    '''
+
+    def __init__(self, meshData, uvs=None):
+        '''
+        meshData [MeshData]
+        uvs [MeshUvs] - needed for "uvSpace" method
+        '''
+        self.meshData = meshData
+        self.uvs = uvs
+
+    def associate(self, destMeshData, method, destUvs=None):
+        '''
+        returns SurfaceAssociation from this mesh to destMeshData
+        '''
+        kwargs = {}
+        if method == 'rayCast':
+            kwargs['destNormals'] = destMeshData.getVertexNormals()
+        elif method == 'uvSpace':
+            kwargs['srcTriangleUvs'] = self.uvs.triangleUvs
+            kwargs['destUvs'] = destUvs.vertexUvs
+
+        association = SurfaceAssociation(self.meshData.points, self.meshData.triangles, destMeshData.points, method,
+                                         triangleBVH=self.meshData.triangleBVH,
+                                         pointBVH=self.meshData.pointBVH, **kwargs)
+        self.meshData.triangleBVH = association.triangleBVH
+        self.meshData.pointBVH = association.pointBVH
+        return association
+
+
+# source mesh of a worker process, set by initWorker
+workerSource = None
+
+
+def initWorker(srcMeshData, srcUvs):
+    '''
+    runs once in every worker process of a batch transfer
+    '''
+    global workerSource
+    workerSource = SourceMesh(srcMeshData, srcUvs)
+
+
+def associateInWorker(task):
+    '''
+    task - (destMeshData, method, destUvs)
+    returns SurfaceAssociation (only its matrix is sent back to Maya)
+    '''
+    destMeshData, method, destUvs = task
+    return workerSource.associate(destMeshData, method, destUvs)
+
+
+def transferSparseLayer(layer, association, mapping, destNames, normalize, pruneThreshold=0.0):
+    '''
+    maps SparseLayerWeights onto destination mesh:
+    influences are renumbered with mapping, weights interpolated with association,
+    then weights at or below pruneThreshold are dropped, and the rest normalized
+    '''
+    layer = layer.remapInfluences(mapping, destNames).transfer(association)
+    if pruneThreshold > 0:
+        layer.prune(pruneThreshold)
+    if normalize:
+        layer.normalize()
+    return layer
+
+
+def shareLayers(layers):
+    '''
+    copies source layers into shared memory:
+    influence weights of all layers are stacked into one CsrMatrix,
+    masks into one dense (layers x vertices) matrix
+    returns (weights, masks, headers) for initLayerWorker
+    '''
+    vertCount = layers[0].getVertCount()
+    masks = np.zeros((len(layers), vertCount), dtype=np.float32)
+    headers = []
+    firstRow = 0
+    for position, layer in enumerate(layers):
+        if layer.mask is not None:
+            masks[position] = layer.mask
+        headers.append((layer.name, layer.enabled, layer.opacity, layer.influenceNames,
+                        layer.influenceIndices.tolist(), firstRow, layer.mask is not None))
+        firstRow += len(layer.influenceNames)
+
+    weights = CsrMatrix.vstack([layer.weights for layer in layers])
+    return shareCsr(weights), shareArray(masks), headers
+
+
+# shared inputs of a worker process, set by initLayerWorker
+layerWorkerState = None
+
+
+def initLayerWorker(sharedLayers, sharedMatrix, sharedTransposed, mapping, destNames, normalize, pruneThreshold):
+    '''
+    runs once in every worker process of a parallel layer transfer
+    '''
+    global layerWorkerState
+    weights, masks, headers = sharedLayers
+    association = SurfaceAssociation.fromMatrix(unshareCsr(sharedMatrix), unshareCsr(sharedTransposed))
+    layerWorkerState = (unshareCsr(weights), unshareArray(masks), headers, association,
+                        mapping, destNames, normalize, pruneThreshold)
+
+
+def transferLayerInWorker(position):
+    '''
+    transfers the layer at position in the shared layers
+    '''
+    weights, masks, headers, association, mapping, destNames, normalize, pruneThreshold = layerWorkerState
+    name, enabled, opacity, influenceNames, influenceIndices, firstRow, hasMask = headers[position]
+
+    layer = SparseLayerWeights(influenceNames, influenceIndices,
+                               weights.getRows(firstRow, firstRow + len(influenceNames)),
+                               masks[position] if hasMask else None, name, enabled, opacity)
+    return transferSparseLayer(layer, association, mapping, destNames, normalize, pruneThreshold)
@@ -0,0 +1,133 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Uniform 2D grid over UV triangles, for locating UVs in linear time.
+'''
+import numpy as np
+
+# cells per axis, so that cell ids (y * resolution[0] + x) fit in int64
+MAX_AXIS_CELLS = 2 ** 31 - 1
+
+
+class UvGrid(object):
+    '''
+    buckets triangles into the grid cells overlapped by their bounding box
+    only occupied cells are stored, sorted by cell id, in CSR layout:
+    triangles of cell occupiedCells[i] are cellTriangles[cellStart[i]:cellStart[i+1]]
+    so shells far apart (e.g. in distant UDIM tiles) don't allocate the empty cells between them
+    '''
+
+    def __init__(self, triangleUvs, maxCellsPerTriangle=4.0):
+        '''
+        triangleUvs - (m x 3 x 2) uv coordinates of each triangle corner
+        maxCellsPerTriangle - limits grid resolution, so that memory stays linear
+        '''
+        self.triangleUvs = np.asarray(triangleUvs, dtype=np.float64)
+        triangleCount = len(self.triangleUvs)
+        if not triangleCount:
+            raise ValueError('Cannot build UV grid without triangles')
+
+        lower = self.triangleUvs.min(axis=1)
+        upper = self.triangleUvs.max(axis=1)
+        self.origin = lower.min(axis=0)
+        self.extent = upper.max(axis=0) - self.origin
+        self.extent[self.extent == 0] = 1.0
+
+        # cells about the size of an average triangle
+        triangleSize = np.maximum(np.median((upper - lower).max(axis=1)), 1e-9)
+        self.resolution = np.clip(np.ceil(self.extent / triangleSize), 1, MAX_AXIS_CELLS).astype(np.int64)
+
+        # keep number of buckets within budget
+        while True:
+            lowerCells, upperCells = self.cellRange(lower, upper)
+            cellCounts = (upperCells - lowerCells + 1).prod(axis=1)
+            if cellCounts.sum() <= maxCellsPerTriangle * triangleCount or self.resolution.max() == 1:
+                break
+            self.resolution = np.maximum(self.resolution // 2, 1)
+
+        # expand every triangle into (cell, triangle) pairs
+        triangleIds = np.repeat(np.arange(triangleCount), cellCounts)
+        offsets = np.arange(len(triangleIds)) - np.repeat(np.cumsum(cellCounts) - cellCounts, cellCounts)
+        width = (upperCells - lowerCells + 1)[triangleIds, 0]
+        cellX = lowerCells[triangleIds, 0] + offsets % width
+        cellY = lowerCells[triangleIds, 1] + offsets // width
+        cellIds = cellY * self.resolution[0] + cellX
+
+        order = np.argsort(cellIds, kind='mergesort')
+        self.cellTriangles = triangleIds[order]
+        self.occupiedCells, counts = np.unique(cellIds[order], return_counts=True)
+        self.cellStart = np.zeros(len(self.occupiedCells) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.cellStart[1:])
+
+    def cellRange(self, lower, upper):
+        '''
+        returns first and last cell (x, y) overlapped by boxes
+        '''
+        scale = self.resolution / self.extent
+        lowerCells = np.clip(((lower - self.origin) * scale).astype(np.int64), 0, self.resolution - 1)
+        upperCells = np.clip(((upper - self.origin) * scale).astype(np.int64), 0, self.resolution - 1)
+        return lowerCells, upperCells
+
+    def locate(self, uvs, epsilon=1e-6):
+        '''
+        finds the triangle containing each uv
+        returns triangle ids (-1 where no triangle contains the uv)
+        and barycentric coordinates (n x 3)
+        '''
+        uvs = np.asarray(uvs, dtype=np.float64)
+        triangleIds = np.full(len(uvs), -1, dtype=np.int64)
+        bary = np.zeros((len(uvs), 3))
+
+        inside = np.flatnonzero(np.all(np.isfinite(uvs), axis=1))
+        cells, _ = self.cellRange(uvs[inside], uvs[inside])
+        cellIds = cells[:, 1] * self.resolution[0] + cells[:, 0]
+
+        # queries in empty cells get no candidates
+        positions = np.minimum(np.searchsorted(self.occupiedCells, cellIds), len(self.occupiedCells) - 1)
+        occupied = self.occupiedCells[positions] == cellIds
+        counts = np.where(occupied, self.cellStart[positions + 1] - self.cellStart[positions], 0)
+
+        # expand every query into (query, candidate triangle) pairs
+        queryIds = np.repeat(inside, counts)
+        offsets = np.arange(len(queryIds)) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = self.cellTriangles[np.repeat(self.cellStart[positions], counts) + offsets]
+
+        candidateBary = barycentric2d(uvs[queryIds], self.triangleUvs[candidates])
+
+        # pick the candidate the uv is deepest inside of,
+        # so uvs on shared edges get a consistent triangle
+        depth = candidateBary.min(axis=1)
+        hit = depth >= -epsilon
+        queryIds, candidates, candidateBary, depth = queryIds[hit], candidates[hit], candidateBary[hit], depth[hit]
+
+        order = np.lexsort((-depth, queryIds))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = queryIds[order][1:] != queryIds[order][:-1]
+        winners = order[first]
+
+        triangleIds[queryIds[winners]] = candidates[winners]
+        bary[queryIds[winners]] = np.clip(candidateBary[winners], 0.0, 1.0)
+        bary /= np.maximum(bary.sum(axis=1), 1e-12)[:, None]
+        return triangleIds, bary
+
+
+def barycentric2d(points, triangles):
+    '''
+    barycentric coordinates of points[i] in 2D triangle triangles[i] (3 x 2)
+    degenerate triangles give -inf coordinates (never contain anything)
+    '''
+    a = triangles[:, 0]
+    v0 = triangles[:, 1] - a
+    v1 = triangles[:, 2] - a
+    v2 = points - a
+    determinant = v0[:, 0] * v1[:, 1] - v1[:, 0] * v0[:, 1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        v = (v2[:, 0] * v1[:, 1] - v1[:, 0] * v2[:, 1]) / determinant
+        w = (v0[:, 0] * v2[:, 1] - v2[:, 0] * v0[:, 1]) / determinant
+
+    bary = np.column_stack((1.0 - v - w, v, w))
+    bary[determinant == 0] = -np.inf
+    return bary
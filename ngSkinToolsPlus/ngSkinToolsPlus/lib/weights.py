@@ -8,22 +8,23 @@ import pymel.core as pm
 
 import utils.rigging as rt
 
+from ngSkinToolsPlus.lib.falloff import stripFalloff
+from ngSkinToolsPlus.lib.layerWeights import SparseLayerWeights
+from ngSkinToolsPlus.lib.masks import LayerMask, getMeshAdjacency
+from ngSkinToolsPlus.lib.meshData import getCachedMeshData
+from ngSkinToolsPlus.lib.relax import pinnedVertices, relaxWeights
+from ngSkinToolsPlus.lib.sparse import CsrMatrix
+
 mel = pm.language.Mel()
 
 def smoothLayerMask(mll, layerId, intensity=1.0):
     '''
+    smooths mask of layerId
+    any intensity (including fractions and values above 1.0) is a single solve
     '''
-    mll.setCurrentLayer(layerId)
-    mll.ngSkinLayerCmd(cpt='mask')
-    
-    # if intensity is larger than 1.0, use multiple iterations
-    while intensity > 1.0:
-        mll.ngSkinLayerCmd(paintOperation=4, paintIntensity=1.0)
-        mll.ngSkinLayerCmd(paintFlood=True)
-        intensity = intensity - 1.0
-    
-    mll.ngSkinLayerCmd(paintOperation=4, paintIntensity=intensity)
-    mll.ngSkinLayerCmd(paintFlood=True)
+    mask = LayerMask(mll, layerId)
+    mask.smooth(intensity)
+    mask.write()
     
     
 def relaxLayerWeights(mll, layerId, expand=True, 
@@ -33,44 +34,25 @@ def relaxLayerWeights(mll, layerId, expand=True,
     verts closest to joints will be masked
     expand will expand the mask
     '''
-    infIter = mll.listLayerInfluences(2)
-    infs = list(infIter)
     mesh = mll.getTargetInfo()[0]
-    mesh = pm.PyNode(mesh)
-    
-    # get vert closest to joints
-    vertIds = []
-    for inf, infId in infs:
-        pos = pm.PyNode(inf).getTranslation(space='world')
-        faceId = mesh.getClosestPoint(pos, space='world')[1]
-        faceVertIds = mesh.f[faceId].getVertices()
-        closestVertId = min(faceVertIds, key=lambda vtxId: (mesh.vtx[vtxId].getPosition() - pos).length())
-        
-        closestVertIds = [closestVertId]
-        # expand ids if needed
-        if expand:
-            connectedVertices = mesh.vtx[closestVertId].connectedVertices()
-            closestVertIds += [vtx.index() for vtx in connectedVertices]
-        
-        vertIds += closestVertIds
-    
-    vertCount = mll.getVertCount()
-    
-    # invert vertIds
-    # just use strings since we're going to pass into ngSkinRelax
-    vertsToRelax = [mesh.name() + '.vtx[%d]' % id_ for id_ in range(vertCount) if id_ not in vertIds]
-    
-    args = {}
-    args['numSteps']=relaxSteps
-    args['stepSize']=relaxSize
-    mel.ngSkinRelax(vertsToRelax,**args)
+    meshData = getCachedMeshData(mesh)
+    adjacency = getMeshAdjacency(mesh)
+    
+    layer = SparseLayerWeights.fromMll(mll, layerId)
+    weights = layer.toDense()
+    
+    # pin verts closest to joints
+    positions = [mc.xform(inf, q=True, ws=True, t=True) for inf in layer.influenceNames]
+    pinned = pinnedVertices(meshData.points, adjacency, positions, expand, meshData.getPointBVH())
+    
+    weights = relaxWeights(weights, adjacency, relaxSteps, relaxSize, pinned)
     
     # run another relax to clean up any artefacts
     # relax all
-    args = {}
-    args['numSteps']=int(relaxSteps * relaxAllAmount)
-    args['stepSize']=relaxSize * relaxAllAmount
-    mel.ngSkinRelax(mesh.name(),**args)
+    weights = relaxWeights(weights, adjacency, int(relaxSteps * relaxAllAmount), relaxSize * relaxAllAmount)
+    
+    layer = layer.copy(CsrMatrix.fromDense(weights))
+    layer.toMll(mll, layerId)
     
     
 
@@ -81,27 +63,13 @@ def createWeightsListByPolyStrip(outerXfos, innerXfos, mesh, loops=0):
     loops [int]: number of loops the polyStrip will have
             0 means an instant falloff from inner to outer
             1 means falloff after 50%, etc...
+    
+    the strip is computed in memory (see lib.falloff), nothing is created in the scene
     '''
-    polyStrip, outerVerts, innerVerts = createPolyLoftStrip('temp_weights_', outerXfos, innerXfos, loops)
-    # bind polystrip to temporary jnts
-    pm.select(cl=True)
-    weightBnd = pm.joint(n='temp_weight_bnd')
-    pm.select(cl=True)
-    noWeightBnd = pm.joint(n='temp_noWeight_bnd')
-    sknStrip = pm.skinCluster(weightBnd, noWeightBnd, polyStrip)
-    # set weights to polystrip
-    sknStrip.setWeights(innerVerts, [0], [1])
-    sknStrip.setWeights(outerVerts, [1], [1])
-    # create temp mesh to transfer weights to
-    tempMesh = pm.duplicate(mesh)[0]
-    sknMesh = pm.skinCluster(weightBnd, noWeightBnd, tempMesh)
-    pm.copySkinWeights(ss=sknStrip, ds=sknMesh, ia='oneToOne', sa='closestPoint', nm=1)
-    # add weights to a float list
-    weightsIter = sknMesh.getWeights(tempMesh, 0)
-    weightsList = list(weightsIter)
-    # cleanup
-    pm.delete(polyStrip, tempMesh, weightBnd, noWeightBnd)
-    return weightsList
+    outerPoints = [mc.xform(xfo, q=True, ws=True, t=True) for xfo in outerXfos]
+    innerPoints = [mc.xform(xfo, q=True, ws=True, t=True) for xfo in innerXfos]
+    meshPoints = getCachedMeshData(mesh).points
+    return stripFalloff(meshPoints, outerPoints, innerPoints, loops).tolist()
     
     
 def createPolyLoftStrip(name, outerXfos, innerXfos, loops):
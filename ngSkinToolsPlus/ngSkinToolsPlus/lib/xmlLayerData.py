@@ -0,0 +1,91 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Streaming reader for ngSkinTools' XML layer data.
+
+XmlImporter needs the whole file as one string, and builds a DOM from it.
+Here the file is parsed incrementally, one layer at a time:
+
+<ngstLayerData version="1.0">
+    <layer name="base" opacity="1.0" enabled="yes" mask="...">
+        <influence name="joint1" index="0" weights="..."/>
+    </layer>
+</ngstLayerData>
+
+so peak memory is bounded by the largest layer, not by the file.
+'''
+try:
+    import xml.etree.cElementTree as ElementTree
+except ImportError:
+    import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+
+from ngSkinToolsPlus.lib.layerWeights import SparseLayerWeights
+
+
+def parseFloats(text):
+    '''
+    decodes a whitespace separated list of floats straight into a float32 array
+    '''
+    if not text:
+        return np.zeros(0, dtype=np.float32)
+    return np.fromstring(text, dtype=np.float32, sep=' ')
+
+
+def iterXmlLayers(source, vertCount=None):
+    '''
+    yields SparseLayerWeights for every layer in the file, in file order
+    source - file path or file object
+    vertCount - number of vertices (taken from the weights if not given)
+
+    the generator can be stopped early, e.g. to read only the first layers:
+    for layer in iterXmlLayers(filepath):
+        if layer.name == 'base':
+            break
+    '''
+    ownFile = isinstance(source, basestring)
+    f = open(source, 'rb') if ownFile else source
+    try:
+        root = None
+        inLayer = False
+        influences = []
+
+        for event, element in ElementTree.iterparse(f, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                    if root.tag != 'ngstLayerData':
+                        raise ValueError('Not a ngSkinTools layer data file: <%s>' % root.tag)
+                elif element.tag == 'layer':
+                    inLayer = True
+                continue
+
+            if element.tag == 'influence' and inLayer:
+                influences.append((element.get('name'), int(element.get('index')),
+                                   parseFloats(element.get('weights'))))
+                element.clear()
+
+            elif element.tag == 'layer':
+                mask = parseFloats(element.get('mask'))
+                count = vertCount
+                if count is None:
+                    count = len(influences[0][2]) if influences else len(mask)
+
+                layer = SparseLayerWeights.fromLists(influences, count, mask,
+                                                     name=element.get('name', ''),
+                                                     enabled=element.get('enabled', 'yes') != 'no',
+                                                     opacity=float(element.get('opacity', 1.0)))
+                # forget parsed text before handing out the layer
+                inLayer = False
+                influences = []
+                element.clear()
+                root.clear()
+
+                yield layer
+    finally:
+        if ownFile:
+            f.close()
+
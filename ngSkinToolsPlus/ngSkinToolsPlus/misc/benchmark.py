@@ -0,0 +1,653 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Benchmarks of the layer copy and mask tools on synthetic data.
+
+Meshes, skin layers and skinClusters are generated in memory, and the
+tools are pointed at in-memory stand-ins for MllInterface, the skinCluster
+weights API and the few maya.cmds commands they use, so timings don't
+depend on a scene. Phases are the tools' own profiler phases (see
+lib.profiling), and results are written as json, to be compared between
+versions:
+
+mayapy -m ngSkinToolsPlus.misc.benchmark --sizes small medium --output after.json --compare before.json
+
+sizes are presets (see SIZES) or "vertices x influences x layers", e.g. 50000x100x5.
+"large" needs several GB of memory, for the dense skinCluster weights.
+Benchmarks of modules that can't be imported (e.g. outside of mayapy) are
+reported as skipped.
+'''
+from collections import OrderedDict
+from contextlib import contextmanager
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from ngSkinToolsPlus.lib.layerWeights import SparseLayerWeights
+from ngSkinToolsPlus.lib.masks import polygonEdges
+from ngSkinToolsPlus.lib.meshData import MeshData
+from ngSkinToolsPlus.lib.relax import closestVertices
+from ngSkinToolsPlus.lib.skinWeights import FakeSkinClusterWeights
+from ngSkinToolsPlus.lib.sparse import CsrMatrix
+
+# name: (vertices, influences, layers)
+SIZES = OrderedDict([('small', (10000, 50, 1)),
+                     ('medium', (100000, 200, 10)),
+                     ('large', (1000000, 500, 50))])
+
+# influences per layer, besides the base layer (which uses all of them)
+LAYER_INFLUENCES = 16
+
+# influences per vertex
+VERTEX_INFLUENCES = 4
+
+SRC_MESH = 'benchmark_src_geo'
+DEST_MESH = 'benchmark_dest_geo'
+SRC_SKIN = 'benchmark_src_skinCluster'
+DEST_SKIN = 'benchmark_dest_skinCluster'
+
+
+#===============================================================================
+# synthetic data
+#===============================================================================
+
+def gridMesh(vertCount, waves=3.0):
+    '''
+    wavy square grid with about vertCount vertices
+    returns (points, triangles, quads)
+    '''
+    side = max(int(round(np.sqrt(vertCount))), 2)
+    u, v = np.meshgrid(np.linspace(0.0, 1.0, side), np.linspace(0.0, 1.0, side))
+    u, v = u.ravel(), v.ravel()
+    points = np.column_stack((u, v, 0.05 * np.sin(u * waves * np.pi) * np.cos(v * waves * np.pi)))
+
+    ids = np.arange(side * side).reshape(side, side)
+    quads = np.column_stack((ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel(),
+                             ids[1:, 1:].ravel(), ids[1:, :-1].ravel()))
+    triangles = np.vstack((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]))
+    return points, triangles, quads
+
+
+def closestInfluences(points, positions, count, chunkSize=65536):
+    '''
+    returns (ids, weights): count closest positions to every point,
+    and their normalized inverse distance weights
+    '''
+    count = min(count, len(positions))
+    ids = np.zeros((len(points), count), dtype=np.int64)
+    weights = np.zeros((len(points), count), dtype=np.float32)
+    for start in range(0, len(points), chunkSize):
+        chunk = points[start:start + chunkSize, :2]
+        distances = np.sqrt(((chunk[:, None, :] - positions[None, :, :2]) ** 2).sum(axis=2))
+        closest = np.argpartition(distances, count - 1, axis=1)[:, :count]
+        inverse = 1.0 / (distances[np.arange(len(chunk))[:, None], closest] + 1e-3)
+        ids[start:start + chunkSize] = closest
+        weights[start:start + chunkSize] = inverse / inverse.sum(axis=1)[:, None]
+    return ids, weights
+
+
+def syntheticLayers(points, influences, layerCount, rng):
+    '''
+    returns list of SparseLayerWeights, bottom layer first:
+    a base layer with all influences on all vertices, then layers that
+    cover about a quarter of the mesh with a few influences, every other one masked
+    '''
+    influencePositions = rng.rand(len(influences), 2)
+    layers = []
+    for layerIndex in range(layerCount):
+        if layerIndex == 0:
+            vertIds = np.arange(len(points))
+            influenceIds = np.arange(len(influences))
+            mask = None
+        else:
+            center = rng.rand(2)
+            distance = np.sqrt(((points[:, :2] - center) ** 2).sum(axis=1))
+            radius = np.sqrt(0.25 / np.pi)
+            vertIds = np.flatnonzero(distance < radius)
+            influenceIds = np.sort(rng.choice(len(influences), min(LAYER_INFLUENCES, len(influences)),
+                                              replace=False))
+            mask = np.clip(1.5 - distance / radius * 1.5, 0.0, 1.0) if layerIndex % 2 else None
+
+        closest, weights = closestInfluences(points[vertIds], influencePositions[influenceIds],
+                                             VERTEX_INFLUENCES)
+        matrix = CsrMatrix.fromCoo(closest.ravel(), np.repeat(vertIds, closest.shape[1]), weights.ravel(),
+                                   (len(influenceIds), len(points)))
+        layers.append(SparseLayerWeights([influences[i] for i in influenceIds], influenceIds, matrix, mask,
+                                         name='layer%d' % (layerIndex + 1)))
+    return layers
+
+
+#===============================================================================
+# stand-ins for the scene
+#===============================================================================
+
+class FakeMllInterface(object):
+    '''
+    in-memory stand-in for ngSkinTools' MllInterface
+    weights are kept sparse, and passed in and out as lists like MllInterface does
+    '''
+
+    def __init__(self, mesh, skinCluster, influences, vertCount):
+        '''
+        influences [list] - influence names, list index is the influence's logical index
+        '''
+        self.mesh = mesh
+        self.skinCluster = skinCluster
+        self.influences = list(influences)
+        self.vertCount = vertCount
+
+        # {layerId: {'name', 'enabled', 'mask', 'weights': {influenceIndex: (vertIds, values)}}}
+        self.layers = OrderedDict()
+        self.nextLayerId = 1
+
+        # number of calls made to each method, for benchmarks
+        self.callCount = {}
+
+    def countCall(self, name):
+        self.callCount[name] = self.callCount.get(name, 0) + 1
+
+    def addLayer(self, layer):
+        '''
+        adds SparseLayerWeights as a new top layer
+        '''
+        layerId = self.createLayer(layer.name)
+        self.layers[layerId]['enabled'] = layer.enabled
+        self.layers[layerId]['mask'] = layer.mask
+        for row, influenceIndex in enumerate(layer.influenceIndices.tolist()):
+            start, end = layer.weights.indptr[row], layer.weights.indptr[row + 1]
+            if end > start:
+                self.layers[layerId]['weights'][influenceIndex] = (layer.weights.indices[start:end],
+                                                                   layer.weights.data[start:end])
+        return layerId
+
+    def getTargetInfo(self):
+        return self.mesh, self.skinCluster
+
+    def getLayersAvailable(self):
+        return True
+
+    def getVertCount(self):
+        return self.vertCount
+
+    def listLayers(self):
+        '''
+        top layer first
+        '''
+        self.countCall('listLayers')
+        return [(layerId, layer['name']) for layerId, layer in reversed(self.layers.items())]
+
+    def createLayer(self, name, forceEmpty=False):
+        self.countCall('createLayer')
+        layerId = self.nextLayerId
+        self.nextLayerId += 1
+        self.layers[layerId] = {'name': name, 'enabled': True, 'mask': None, 'weights': {}}
+        return layerId
+
+    def getLayerName(self, layerId):
+        return self.layers[layerId]['name']
+
+    def setLayerName(self, layerId, name):
+        self.layers[layerId]['name'] = name
+
+    def isLayerEnabled(self, layerId):
+        return self.layers[layerId]['enabled']
+
+    def setLayerEnabled(self, layerId, enabled):
+        self.countCall('setLayerEnabled')
+        self.layers[layerId]['enabled'] = enabled
+
+    def listLayerInfluences(self, layerId=None, activeInfluences=True):
+        '''
+        yields (influenceName, influenceIndex)
+        activeInfluences - only influences with weights on layerId
+        '''
+        self.countCall('listLayerInfluences')
+        if not activeInfluences:
+            return iter([(name, index) for index, name in enumerate(self.influences)])
+        return iter([(self.influences[index], index) for index in sorted(self.layers[layerId]['weights'])])
+
+    def getInfluenceWeights(self, layerId, influenceIndex):
+        self.countCall('getInfluenceWeights')
+        weights = np.zeros(self.vertCount, dtype=np.float32)
+        if influenceIndex in self.layers[layerId]['weights']:
+            vertIds, values = self.layers[layerId]['weights'][influenceIndex]
+            weights[vertIds] = values
+        return weights.tolist()
+
+    def setInfluenceWeights(self, layerId, influenceIndex, weights):
+        self.countCall('setInfluenceWeights')
+        weights = np.asarray(weights, dtype=np.float32)
+        vertIds = np.flatnonzero(weights)
+        if len(vertIds):
+            self.layers[layerId]['weights'][influenceIndex] = (vertIds, weights[vertIds])
+        else:
+            self.layers[layerId]['weights'].pop(influenceIndex, None)
+
+    def getLayerMask(self, layerId):
+        self.countCall('getLayerMask')
+        mask = self.layers[layerId]['mask']
+        return [] if mask is None else mask.tolist()
+
+    def setLayerMask(self, layerId, mask):
+        self.countCall('setLayerMask')
+        self.layers[layerId]['mask'] = np.asarray(mask, dtype=np.float32) if len(mask) else None
+
+    def getDenseWeights(self, layerId):
+        '''
+        returns (influences x vertices) weights of layerId
+        '''
+        weights = np.zeros((len(self.influences), self.vertCount), dtype=np.float32)
+        for influenceIndex, (vertIds, values) in self.layers[layerId]['weights'].items():
+            weights[influenceIndex, vertIds] = values
+        return weights
+
+
+class FakeCmds(object):
+    '''
+    the maya.cmds commands used by the benchmarked tools
+    '''
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.attributes = {}
+
+    def progressWindow(self, *args, **kwargs):
+        # never cancelled
+        return False
+
+    def copySkinWeights(self, ss, ds, **kwargs):
+        self.scene.copySkinWeights(ss, ds)
+
+    def error(self, message):
+        raise RuntimeError(message)
+
+    def warning(self, message):
+        pass
+
+    def select(self, *args, **kwargs):
+        pass
+
+    def attributeQuery(self, attribute, node, exists):
+        return '%s.%s' % (node, attribute) in self.attributes
+
+    def addAttr(self, node, longName, **kwargs):
+        self.attributes['%s.%s' % (node, longName)] = None
+
+    def getAttr(self, plug):
+        return self.attributes[plug]
+
+    def setAttr(self, plug, value, **kwargs):
+        self.attributes[plug] = value
+
+
+class SyntheticScene(object):
+    '''
+    source and destination meshes with skin layers, kept in memory
+    the source mesh is a grid, the destination a coarser grid,
+    both use the same influences
+    '''
+
+    def __init__(self, vertCount, influenceCount, layerCount, seed=0):
+        rng = np.random.RandomState(seed)
+        srcPoints, srcTriangles, srcQuads = gridMesh(vertCount)
+        destPoints, destTriangles, _ = gridMesh(int(vertCount * 0.8), waves=3.5)
+        self.meshes = {SRC_MESH: MeshData(srcPoints, srcTriangles),
+                       DEST_MESH: MeshData(destPoints, destTriangles)}
+        self.edges = polygonEdges(np.full(len(srcQuads), 4), srcQuads.ravel())
+
+        self.influences = ['joint%d' % index for index in range(influenceCount)]
+        self.layers = syntheticLayers(srcPoints, self.influences, layerCount, rng)
+
+        self.closest = None
+        self.reset()
+
+    def getSize(self):
+        return (self.meshes[SRC_MESH].getVertCount(), len(self.influences), len(self.layers))
+
+    def reset(self):
+        '''
+        discards all changes made by a benchmark
+        '''
+        self.srcMll = self.createMll(SRC_MESH, SRC_SKIN)
+        for layer in self.layers:
+            self.srcMll.addLayer(layer)
+        self.srcMll.callCount = {}
+        self.destMll = self.createMll(DEST_MESH, DEST_SKIN)
+        self.skins = {}
+
+    def createMll(self, mesh, skinCluster):
+        return FakeMllInterface(mesh, skinCluster, self.influences, self.meshes[mesh].getVertCount())
+
+    def getLayerIds(self):
+        '''
+        source layer ids, bottom layer first
+        '''
+        return [layerId for layerId, _ in reversed(self.srcMll.listLayers())]
+
+    def getMeshData(self, mesh, sampleSpace=0):
+        '''
+        stand-in for meshData.getCachedMeshData
+        '''
+        return self.meshes[mesh]
+
+    def getSkinWeights(self, skinCluster, mesh=None):
+        '''
+        stand-in for MayaSkinClusterWeights
+        the source skinCluster starts with the base layer's weights, the destination empty
+        '''
+        if skinCluster not in self.skins:
+            if skinCluster == SRC_SKIN:
+                weights = self.srcMll.getDenseWeights(self.getLayerIds()[0])
+            else:
+                weights = np.zeros((len(self.influences), self.meshes[DEST_MESH].getVertCount()), dtype=np.float32)
+            self.skins[skinCluster] = FakeSkinClusterWeights(self.influences, weights)
+        return self.skins[skinCluster]
+
+    def copySkinWeights(self, srcSkinCluster, destSkinCluster):
+        '''
+        stand-in for copySkinWeights by closest vertex and influence name:
+        the source skinCluster is evaluated as its top enabled layer
+        (copySkinLayerById solos the copied layer)
+        '''
+        if self.closest is None:
+            srcMeshData = self.meshes[SRC_MESH]
+            self.closest = closestVertices(srcMeshData.points, self.meshes[DEST_MESH].points,
+                                           srcMeshData.getPointBVH())
+        enabled = [layerId for layerId, _ in self.srcMll.listLayers() if self.srcMll.isLayerEnabled(layerId)]
+        weights = self.srcMll.getDenseWeights(enabled[0])[:, self.closest]
+        self.getSkinWeights(destSkinCluster).setWeights(weights)
+
+
+#===============================================================================
+# timing
+#===============================================================================
+
+class PhaseTimer(object):
+    '''
+    adds up the time spent in named phases
+    '''
+
+    def __init__(self):
+        self.phases = OrderedDict()
+        self.current = None
+        self.started = None
+
+    def begin(self, name):
+        '''
+        ends the current phase, and starts timing name
+        '''
+        self.stop()
+        self.current = name
+        self.started = timeit.default_timer()
+
+    def stop(self):
+        if self.current is not None:
+            elapsed = timeit.default_timer() - self.started
+            self.phases[self.current] = self.phases.get(self.current, 0.0) + elapsed
+            self.current = None
+
+    @contextmanager
+    def phase(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def addRecords(self, records):
+        '''
+        adds up the phases recorded by lib.profiling, by phase name
+        '''
+        for record in records:
+            self.phases[record['phase']] = self.phases.get(record['phase'], 0.0) + record['seconds']
+
+    def getTotal(self):
+        return sum(self.phases.values())
+
+
+@contextmanager
+def patchModule(module, **attributes):
+    '''
+    temporarily replaces module globals (e.g. mc) with stand-ins
+    '''
+    original = dict((name, getattr(module, name)) for name in attributes)
+    for name, value in attributes.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(module, name, value)
+
+
+#===============================================================================
+# benchmarks
+# each one runs on a freshly reset scene, and returns call counts
+#===============================================================================
+
+def benchQueryWeights(scene, timer, processes):
+    from ngSkinToolsPlus import copySkinLayers
+
+    skinWeights = scene.getSkinWeights(SRC_SKIN)
+    with patchModule(copySkinLayers, MayaSkinClusterWeights=scene.getSkinWeights):
+        with timer.phase('queryWeights'):
+            copySkinLayers.queryWeights(SRC_SKIN, SRC_MESH)
+    return {'skinCluster': skinWeights.callCount}
+
+
+def benchCopySkinLayerById(scene, timer, processes):
+    from ngSkinToolsPlus import copySkinLayers
+    from ngSkinToolsPlus.lib import profiling
+    from ngSkinToolsPlus.utilities import transferSession
+
+    transferSession.clearCache()
+    cmds = FakeCmds(scene)
+    with patchModule(copySkinLayers, mc=cmds, MayaSkinClusterWeights=scene.getSkinWeights), \
+            patchModule(transferSession, getCachedMeshData=scene.getMeshData), \
+            patchModule(profiling, mc=cmds), profiling.profiling() as profiler:
+        for layerId in scene.getLayerIds():
+            copySkinLayers.copySkinLayerById(scene.srcMll, scene.destMll, layerId,
+                                             ['name', None, None], 'closestPoint', 0, True)
+    timer.addRecords(profiler.records)
+    return {'srcMll': scene.srcMll.callCount, 'destMll': scene.destMll.callCount,
+            'skinCluster': scene.getSkinWeights(DEST_SKIN).callCount}
+
+
+def benchTransferSession(scene, timer, processes):
+    from ngSkinToolsPlus.lib import copyRecord, profiling
+    from ngSkinToolsPlus.utilities import transferSession
+
+    transferSession.clearCache()
+    cmds = FakeCmds(scene)
+    with patchModule(transferSession, getCachedMeshData=scene.getMeshData), \
+            patchModule(copyRecord, mc=cmds), patchModule(profiling, mc=cmds), \
+            profiling.profiling() as profiler:
+        session = transferSession.TransferSession(scene.srcMll, scene.destMll, ['name', None, None],
+                                                  'closestPoint', 0, True, processes=processes)
+        session.copyLayers(scene.getLayerIds())
+    timer.addRecords(profiler.records)
+    return {'srcMll': scene.srcMll.callCount, 'destMll': scene.destMll.callCount}
+
+
+def benchCopyLayers(scene, timer, processes):
+    from ngSkinToolsPlus.utilities.copyLayers import CopyLayers
+
+    # CopyLayers copies between meshes with the same topology
+    destMll = scene.createMll(SRC_MESH, DEST_SKIN)
+    copier = CopyLayers()
+    copier.setMllInterface(scene.srcMll, destMll)
+    with timer.phase('copyLayer'):
+        for layerId in scene.getLayerIds():
+            copier.copyLayer(layerId)
+    return {'srcMll': scene.srcMll.callCount, 'destMll': destMll.callCount}
+
+
+def benchMasks(scene, timer, processes):
+    from ngSkinToolsPlus.lib import masks
+
+    layerId = scene.getLayerIds()[-1]
+    vertCount = scene.meshes[SRC_MESH].getVertCount()
+    with timer.phase('adjacency'):
+        adjacency = masks.vertexAdjacency(scene.edges, vertCount)
+    with timer.phase('read'):
+        mask = masks.LayerMask(scene.srcMll, layerId, adjacency)
+    with timer.phase('reverse'):
+        mask.reverse()
+    with timer.phase('unify'):
+        mask.unify(np.arange(0, vertCount, 2))
+    with timer.phase('remap'):
+        mask.remap([(0.0, 0.0), (0.5, 0.1), (1.0, 1.0)])
+    with timer.phase('grow'):
+        mask.grow(2)
+    with timer.phase('shrink'):
+        mask.shrink(2)
+    with timer.phase('smooth'):
+        mask.smooth(1.0)
+    with timer.phase('write'):
+        mask.write()
+    return {'srcMll': scene.srcMll.callCount}
+
+
+BENCHMARKS = OrderedDict([('queryWeights', benchQueryWeights),
+                          ('copySkinLayerById', benchCopySkinLayerById),
+                          ('transferSession', benchTransferSession),
+                          ('copyLayers', benchCopyLayers),
+                          ('masks', benchMasks)])
+
+
+#===============================================================================
+# suite
+#===============================================================================
+
+def parseSize(size):
+    '''
+    returns (vertices, influences, layers) of a preset name or "10000x50x1"
+    '''
+    if size in SIZES:
+        return SIZES[size]
+    try:
+        vertCount, influenceCount, layerCount = [int(value) for value in size.lower().split('x')]
+    except ValueError:
+        raise ValueError('Unknown size %r, use one of %s or "vertices x influences x layers"' %
+                         (size, ', '.join(SIZES)))
+    return vertCount, influenceCount, layerCount
+
+
+def runBenchmark(name, scene, repeat=1, processes=1):
+    '''
+    returns {'total', 'phases', 'calls'} of the fastest of repeat runs,
+    or {'skipped': reason} if the benchmarked module can't be imported here
+    '''
+    best = None
+    for _ in range(repeat):
+        scene.reset()
+        timer = PhaseTimer()
+        # keep the tools' messages out of printed results
+        stdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            calls = BENCHMARKS[name](scene, timer, processes)
+        except ImportError as error:
+            return {'skipped': str(error)}
+        finally:
+            sys.stdout = stdout
+        result = {'total': timer.getTotal(), 'phases': timer.phases, 'calls': calls}
+        if best is None or result['total'] < best['total']:
+            best = result
+    return best
+
+
+def runSuite(sizes=('small',), benchmarks=None, repeat=3, processes=1, seed=0, label=''):
+    '''
+    returns json-able dict with environment info and results per size and benchmark
+    '''
+    results = OrderedDict()
+    for size in sizes:
+        vertCount, influenceCount, layerCount = parseSize(size)
+        started = timeit.default_timer()
+        scene = SyntheticScene(vertCount, influenceCount, layerCount, seed)
+        vertCount, influenceCount, layerCount = scene.getSize()
+        sizeResults = OrderedDict([('vertices', vertCount), ('influences', influenceCount),
+                                   ('layers', layerCount),
+                                   ('generate', timeit.default_timer() - started),
+                                   ('benchmarks', OrderedDict())])
+        for name in benchmarks or BENCHMARKS:
+            sizeResults['benchmarks'][name] = runBenchmark(name, scene, repeat, processes)
+        results[size] = sizeResults
+
+    return OrderedDict([('label', label),
+                        ('time', time.strftime('%Y-%m-%d %H:%M:%S')),
+                        ('python', platform.python_version()),
+                        ('numpy', np.__version__),
+                        ('platform', platform.platform()),
+                        ('repeat', repeat),
+                        ('processes', processes),
+                        ('seed', seed),
+                        ('results', results)])
+
+
+def compareResults(baseline, current, tolerance=0.25, minimum=0.01):
+    '''
+    returns list of (size, benchmark, phase, baseline seconds, current seconds)
+    for totals and phases that got more than tolerance slower
+    phases under minimum seconds in both runs are ignored (timer noise)
+    '''
+    regressions = []
+    for size, sizeResults in current['results'].items():
+        baselineBenchmarks = baseline['results'].get(size, {}).get('benchmarks', {})
+        for name, result in sizeResults['benchmarks'].items():
+            baselineResult = baselineBenchmarks.get(name)
+            if 'skipped' in result or not baselineResult or 'skipped' in baselineResult:
+                continue
+            timings = [('total', baselineResult['total'], result['total'])]
+            for phase, seconds in result['phases'].items():
+                if phase in baselineResult['phases']:
+                    timings.append((phase, baselineResult['phases'][phase], seconds))
+            for phase, before, after in timings:
+                if max(before, after) >= minimum and after > before * (1.0 + tolerance):
+                    regressions.append((size, name, phase, before, after))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark layer copy and mask tools on synthetic data')
+    parser.add_argument('--sizes', nargs='+', default=['small'],
+                        help='presets (%s) or "vertices x influences x layers"' % ', '.join(SIZES))
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), help='default: all')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, the fastest is kept')
+    parser.add_argument('--processes', type=int, default=1, help='worker processes of layer transfers')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--label', default='', help='stored with the results, e.g. version or branch')
+    parser.add_argument('--output', help='json file to write (default: print)')
+    parser.add_argument('--compare', help='json results of an earlier run, exits with 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown, 0.25 is 25%%')
+    args = parser.parse_args(argv)
+
+    results = runSuite(args.sizes, args.benchmarks, args.repeat, args.processes, args.seed, args.label)
+    data = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(data)
+    else:
+        print data
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compareResults(baseline, results, args.tolerance)
+        for size, name, phase, before, after in regressions:
+            print '%s %s %s: %.3fs -> %.3fs' % (size, name, phase, before, after)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
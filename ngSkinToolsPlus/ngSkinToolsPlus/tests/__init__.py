@@ -0,0 +1,11 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+Unit tests. Tests of lib modules run in any python with numpy:
+
+python -m unittest discover -s ngSkinToolsPlus/tests -t .
+
+tests of utilities need mayapy, as utilities import ngSkinTools.
+'''
@@ -0,0 +1,64 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+needs mayapy (utilities import ngSkinTools), but not a scene:
+influence info is given, instead of read from joints
+'''
+import unittest
+
+import numpy as np
+
+from ngSkinToolsPlus.utilities.influenceAssociation import InfluenceAssociation, InfluenceInfo
+
+# joint labels (side, type, otherType)
+UNLABELED = (0, 0, '')
+LEFT_HAND = (1, 12, '')
+RIGHT_HAND = (2, 12, '')
+
+
+def createInfo(positions, labels):
+    return InfluenceInfo(positions, [[np.nan] * 3] * len(positions), labels)
+
+
+def createInfluences(count):
+    return [('joint%d' % index, index) for index in range(count)]
+
+
+class MatchByLabelTest(unittest.TestCase):
+
+    def testUnlabeledJointsAreNotMatched(self):
+        srcInfo = createInfo([[0, 0, 0], [1, 0, 0], [2, 0, 0]], [UNLABELED, UNLABELED, LEFT_HAND])
+        destInfo = createInfo([[0, 0, 0], [5, 0, 0], [2, 0, 0]], [UNLABELED, UNLABELED, LEFT_HAND])
+        association = InfluenceAssociation(createInfluences(3), createInfluences(3), 'label', srcInfo, destInfo)
+
+        self.assertEqual(association.mapping.tolist(), [-1, -1, 2])
+        self.assertEqual(association.matchDict, {2: 2})
+
+    def testUnlabeledJointsFallBackToNextMethod(self):
+        srcInfo = createInfo([[0, 0, 0], [5, 0, 0], [2, 0, 0]], [UNLABELED, UNLABELED, LEFT_HAND])
+        destInfo = createInfo([[5, 0, 0], [0, 0, 0], [9, 0, 0]], [UNLABELED, UNLABELED, LEFT_HAND])
+        association = InfluenceAssociation(createInfluences(3), createInfluences(3), ['label', 'closestJoint'],
+                                           srcInfo, destInfo)
+
+        self.assertEqual(association.mapping.tolist(), [1, 0, 2])
+
+    def testSharedLabelGoesToClosestJoint(self):
+        srcInfo = createInfo([[10, 0, 0], [-10, 0, 0]], [LEFT_HAND, RIGHT_HAND])
+        destInfo = createInfo([[0, 0, 0], [11, 0, 0], [9, 1, 0], [-10, 0, 0]],
+                              [LEFT_HAND, LEFT_HAND, LEFT_HAND, RIGHT_HAND])
+        association = InfluenceAssociation(createInfluences(2), createInfluences(4), 'label', srcInfo, destInfo)
+
+        self.assertEqual(association.mapping.tolist(), [1, 3])
+
+    def testNonJointInfluences(self):
+        srcInfo = createInfo([[0, 0, 0], [1, 0, 0]], [None, LEFT_HAND])
+        destInfo = createInfo([[1, 0, 0], [0, 0, 0]], [LEFT_HAND, None])
+        association = InfluenceAssociation(createInfluences(2), createInfluences(2), 'label', srcInfo, destInfo)
+
+        self.assertEqual(association.mapping.tolist(), [-1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
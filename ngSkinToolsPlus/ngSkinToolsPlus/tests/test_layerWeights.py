@@ -0,0 +1,42 @@
+'''
+Created on Oct 18, 2026
+
+@author: Leon
+'''
+import unittest
+
+import numpy as np
+
+from ngSkinToolsPlus.lib.layerWeights import SparseLayerWeights
+
+
+class LayerStub(object):
+    '''
+    ngSkinTools' importExport.Layer attributes, without influences
+    '''
+
+    def __init__(self, mask):
+        self.name = 'layer1'
+        self.enabled = True
+        self.opacity = 1.0
+        self.mask = mask
+        self.influences = []
+
+
+class FromLayerTest(unittest.TestCase):
+
+    def testArrayMask(self):
+        layer = SparseLayerWeights.fromLayer(LayerStub(np.array([1.0, 0.5, 0.0], dtype=np.float32)))
+
+        self.assertEqual(layer.getVertCount(), 3)
+        self.assertEqual(layer.mask.tolist(), [1.0, 0.5, 0.0])
+
+    def testNoMask(self):
+        layer = SparseLayerWeights.fromLayer(LayerStub(None))
+
+        self.assertEqual(layer.getVertCount(), 0)
+        self.assertIsNone(layer.mask)
+
+
+if __name__ == '__main__':
+    unittest.main()
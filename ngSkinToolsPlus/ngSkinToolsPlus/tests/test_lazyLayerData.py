@@ -0,0 +1,48 @@
+'''
+Created on Oct 18, 2026
+
+@author: Leon
+'''
+import os
+import shutil
+import tempfile
+import unittest
+
+from ngSkinToolsPlus.lib.layerFile import writeJsonDict
+from ngSkinToolsPlus.lib.lazyLayerData import LazyLayerData
+
+
+def createJsonDict(mask):
+    return {'layers': [{'name': 'layer1', 'enabled': True, 'opacity': 1.0, 'mask': mask,
+                        'influences': [{'name': 'joint1', 'index': 0, 'weights': [1.0, 0.5, 0.0]}]}]}
+
+
+class LayerFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tempDir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tempDir, 'layers.ngl')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+
+    def load(self, mask):
+        writeJsonDict(self.filepath, createJsonDict(mask))
+        return LazyLayerData.fromLayerFile(self.filepath).layers[0]
+
+    def testMask(self):
+        layer = self.load([1.0, 0.5, 0.0])
+
+        self.assertEqual(layer.mask, [1.0, 0.5, 0.0])
+        self.assertEqual(layer.influences[0].weights, [1.0, 0.5, 0.0])
+
+    def testNoMask(self):
+        # same as the other loaders: a layer without mask has an empty one
+        self.assertEqual(self.load(None).mask, [])
+
+    def testEmptyMask(self):
+        self.assertEqual(self.load([]).mask, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+
+the main thread is a QueueExecutor, run by hand
+'''
+import unittest
+
+from ngSkinToolsPlus.lib.scheduler import QueueExecutor, Scheduler, runInline
+
+
+class RecordingJob(object):
+    '''
+    squares items, records every call
+    '''
+
+    def __init__(self, items, failCompute=None, failApply=None):
+        self.items = items
+        self.failCompute = failCompute
+        self.failApply = failApply
+        self.computed = []
+        self.applied = []
+        self.finished = []
+
+    def extract(self):
+        return self.items
+
+    def compute(self, item):
+        if item == self.failCompute:
+            raise ValueError('compute %s' % item)
+        self.computed.append(item)
+        return item * item
+
+    def apply(self, item, result):
+        if item == self.failApply:
+            raise ValueError('apply %s' % item)
+        self.applied.append((item, result))
+
+    def finish(self, cancelled=False):
+        self.finished.append(cancelled)
+
+
+class DeferredWorker(object):
+    '''
+    startWorker that keeps the worker function until run() is called,
+    like a worker thread that is still busy
+    '''
+
+    def __init__(self):
+        self.function = None
+
+    def __call__(self, function):
+        self.function = function
+
+    def run(self):
+        self.function()
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def createScheduler(self, job, startWorker=runInline, **kwargs):
+        self.executor = QueueExecutor()
+        self.doneCalls = []
+        return Scheduler(job, self.executor, startWorker=startWorker, onDone=self.doneCalls.append, **kwargs)
+
+    def testCompletes(self):
+        job = RecordingJob([1, 2, 3])
+        scheduler = self.createScheduler(job, chunkSize=2)
+        scheduler.start()
+        self.assertTrue(scheduler.isRunning())
+
+        self.executor.runPending()
+
+        self.assertEqual(job.applied, [(1, 1), (2, 4), (3, 9)])
+        self.assertEqual(job.finished, [False])
+        self.assertEqual(scheduler.state, 'done')
+        self.assertEqual(scheduler.applied, 3)
+        self.assertFalse(scheduler.isRunning())
+        self.assertEqual(self.doneCalls, [scheduler])
+
+    def testCancelDropsResults(self):
+        job = RecordingJob([1, 2, 3])
+        scheduler = self.createScheduler(job)
+        scheduler.start()
+        self.executor.runPending(limit=1)
+        scheduler.cancel()
+
+        self.executor.runPending()
+
+        self.assertEqual(job.applied, [(1, 1)])
+        self.assertEqual(job.finished, [True])
+        self.assertEqual(scheduler.state, 'cancelled')
+
+    def testCancelFromProgressWindow(self):
+        job = RecordingJob([1, 2, 3])
+        scheduler = self.createScheduler(job, isCancelled=lambda: True)
+        scheduler.start()
+
+        self.executor.runPending()
+
+        self.assertEqual(job.applied, [])
+        self.assertEqual(scheduler.state, 'cancelled')
+
+    def testCancelWaitsForWorker(self):
+        job = RecordingJob([1, 2, 3])
+        worker = DeferredWorker()
+        scheduler = self.createScheduler(job, startWorker=worker)
+        scheduler.start()
+        scheduler.cancel()
+
+        # worker hasn't returned yet: nothing is finished, and a new job has to wait
+        self.executor.runPending(limit=10)
+        self.assertTrue(scheduler.isRunning())
+        self.assertEqual(job.finished, [])
+
+        worker.run()
+        self.executor.runPending()
+
+        self.assertEqual(job.computed, [])
+        self.assertEqual(job.finished, [True])
+        self.assertEqual(scheduler.state, 'cancelled')
+        self.assertFalse(scheduler.isRunning())
+
+    def testWaitsForResults(self):
+        job = RecordingJob([1, 2])
+        worker = DeferredWorker()
+        scheduler = self.createScheduler(job, startWorker=worker)
+        scheduler.start()
+
+        # one pending tick, polling for results
+        self.assertEqual(self.executor.runPending(limit=5), 5)
+        self.assertEqual(len(self.executor.pending), 1)
+
+        worker.run()
+        self.executor.runPending()
+
+        self.assertEqual(job.applied, [(1, 1), (2, 4)])
+        self.assertEqual(scheduler.state, 'done')
+
+    def testWorkerError(self):
+        job = RecordingJob([1, 2, 3], failCompute=2)
+        scheduler = self.createScheduler(job)
+        scheduler.start()
+
+        with self.assertRaises(ValueError):
+            self.executor.runPending()
+        self.executor.runPending()
+
+        self.assertEqual(job.applied, [(1, 1)])
+        self.assertEqual(job.finished, [True])
+        self.assertEqual(scheduler.state, 'failed')
+        self.assertFalse(scheduler.isRunning())
+        self.assertEqual(self.doneCalls, [scheduler])
+
+    def testApplyError(self):
+        job = RecordingJob([1, 2, 3], failApply=1)
+        worker = DeferredWorker()
+        scheduler = self.createScheduler(job, startWorker=worker)
+        scheduler.start()
+        worker.run()
+
+        with self.assertRaises(ValueError):
+            self.executor.runPending()
+        self.executor.runPending()
+
+        self.assertEqual(job.applied, [])
+        self.assertEqual(job.finished, [True])
+        self.assertEqual(scheduler.state, 'failed')
+
+    def testExtractError(self):
+        job = RecordingJob(None)
+        scheduler = self.createScheduler(job)
+
+        with self.assertRaises(TypeError):
+            scheduler.start()
+
+        self.assertEqual(scheduler.state, 'failed')
+        self.assertFalse(scheduler.isRunning())
+        self.assertFalse(self.executor.pending)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+'''
+import unittest
+
+import numpy as np
+
+from ngSkinToolsPlus.lib.skinWeights import FakeSkinClusterWeights, normalizeOtherInfluences, transformInfluenceWeights
+
+
+def createSkin():
+    '''
+    3 influences x 4 vertices, every vertex adds up to 1.0
+    '''
+    weights = [[1.0, 0.5, 0.0, 0.2],
+               [0.0, 0.5, 0.5, 0.2],
+               [0.0, 0.0, 0.5, 0.6]]
+    return FakeSkinClusterWeights(['joint1', 'joint2', 'joint3'], weights)
+
+
+class FakeSkinClusterWeightsTest(unittest.TestCase):
+
+    def testGetWeights(self):
+        skin = createSkin()
+        self.assertEqual(skin.getInfluences(), ['joint1', 'joint2', 'joint3'])
+        self.assertEqual(skin.getVertCount(), 4)
+        weights = skin.getWeights()
+        self.assertEqual(weights.shape, (3, 4))
+        self.assertEqual(weights.dtype, np.float32)
+
+        # returned weights are a copy
+        weights[:] = 0
+        self.assertAlmostEqual(skin.getWeights()[0, 0], 1.0)
+
+    def testRejectsMismatchedInfluences(self):
+        with self.assertRaises(ValueError):
+            FakeSkinClusterWeights(['joint1'], np.zeros((2, 4)))
+
+    def testSetAllWeights(self):
+        skin = createSkin()
+        weights = np.full((3, 4), 1.0 / 3)
+        skin.setWeights(weights)
+        np.testing.assert_allclose(skin.getWeights(), weights, rtol=1e-6)
+
+    def testSetSparseWeights(self):
+        skin = createSkin()
+        before = skin.getWeights()
+        skin.setWeights([[0.25, 0.75]], vertIds=[1, 3], influenceIds=[2])
+
+        after = skin.getWeights()
+        np.testing.assert_allclose(after[2, [1, 3]], [0.25, 0.75])
+        # other vertices and influences are left alone
+        np.testing.assert_allclose(after[:, [0, 2]], before[:, [0, 2]])
+        np.testing.assert_allclose(after[:2, [1, 3]], before[:2, [1, 3]])
+
+    def testSetWeightsNormalized(self):
+        skin = createSkin()
+        skin.setWeights([[0.5]], vertIds=[0], influenceIds=[1], normalize=True)
+
+        weights = skin.getWeights()
+        np.testing.assert_allclose(weights[:, 0], [0.5, 0.5, 0.0])
+        np.testing.assert_allclose(weights.sum(axis=0), 1.0, rtol=1e-6)
+
+    def testCallCount(self):
+        skin = createSkin()
+        skin.getWeights()
+        skin.getWeights()
+        skin.setWeights(np.zeros((3, 4)))
+        self.assertEqual(skin.callCount, {'getWeights': 2, 'setWeights': 1})
+
+
+class NormalizeTest(unittest.TestCase):
+
+    def testNormalizeOtherInfluences(self):
+        weights = np.array([[0.5, 0.9],
+                            [0.2, 0.3],
+                            [0.6, 0.1]])
+        others = np.array([False, True, True])
+        result = normalizeOtherInfluences(weights, others, weights[0])
+
+        np.testing.assert_allclose(result[0], [0.5, 0.9])
+        np.testing.assert_allclose(result.sum(axis=0), 1.0, rtol=1e-6)
+        # other influences keep their proportions
+        self.assertAlmostEqual(result[1, 0] / result[2, 0], 0.2 / 0.6, places=5)
+
+    def testNormalizeWithoutOtherWeights(self):
+        # nothing to scale up: vertex keeps its (incomplete) total
+        weights = np.array([[0.5], [0.0], [0.0]])
+        result = normalizeOtherInfluences(weights, np.array([False, True, True]), weights[0])
+        np.testing.assert_allclose(result[:, 0], [0.5, 0.0, 0.0])
+
+    def testFixedTotalAboveOne(self):
+        weights = np.array([[1.5], [0.5]])
+        result = normalizeOtherInfluences(weights, np.array([False, True]), weights[0])
+        np.testing.assert_allclose(result[:, 0], [1.5, 0.0])
+
+    def testTransformInfluenceWeights(self):
+        weights = createSkin().getWeights()
+        result = transformInfluenceWeights(weights, 0, [1.0, 1.0, 0.5, 0.6])
+
+        np.testing.assert_allclose(result[0], [1.0, 1.0, 0.5, 0.6])
+        np.testing.assert_allclose(result.sum(axis=0), 1.0, rtol=1e-6)
+        np.testing.assert_allclose(result[:, 2], [0.5, 0.25, 0.25])
+        np.testing.assert_allclose(result[:, 3], [0.6, 0.1, 0.3], rtol=1e-6)
+        # input is not modified
+        np.testing.assert_allclose(weights[0], [1.0, 0.5, 0.0, 0.2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+'''
+Created on Oct 18, 2026
+
+@author: Leon
+
+needs mayapy (utilities import ngSkinTools), but not a scene:
+meshes, layers and skinClusters are misc.benchmark's in-memory stand-ins
+'''
+import unittest
+
+from ngSkinToolsPlus.lib import copyRecord, profiling
+from ngSkinToolsPlus.misc.benchmark import DEST_SKIN, FakeCmds, SyntheticScene, patchModule
+from ngSkinToolsPlus.utilities import transferSession
+
+
+class ProgressCmds(FakeCmds):
+    '''
+    FakeCmds that counts opened and closed progress windows
+    '''
+
+    def __init__(self, scene):
+        FakeCmds.__init__(self, scene)
+        self.openWindows = 0
+
+    def progressWindow(self, *args, **kwargs):
+        if kwargs.get('endProgress'):
+            self.openWindows -= 1
+        elif 'title' in kwargs:
+            self.openWindows += 1
+        return False
+
+
+class TransferSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        transferSession.clearCache()
+        self.scene = SyntheticScene(400, 8, 3)
+        self.cmds = ProgressCmds(self.scene)
+        self.patches = [patchModule(transferSession, getCachedMeshData=self.scene.getMeshData),
+                        patchModule(copyRecord, mc=self.cmds), patchModule(profiling, mc=self.cmds)]
+        for patch in self.patches:
+            patch.__enter__()
+
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.__exit__(None, None, None)
+
+    def createSession(self):
+        return transferSession.TransferSession(self.scene.srcMll, self.scene.destMll, ['name', None, None],
+                                               'closestPoint', 0, True)
+
+    def testCopyLayers(self):
+        layerIds = self.scene.getLayerIds()
+        destLayerIds = self.createSession().copyLayers(layerIds)
+
+        self.assertEqual(len(destLayerIds), len(layerIds))
+        self.assertEqual(self.cmds.openWindows, 0)
+
+    def testFailedWriteClosesProgress(self):
+        destMll = self.scene.destMll
+        writeWeights = destMll.setInfluenceWeights
+        written = []
+
+        def failOnSecondLayer(layerId, influenceIndex, weights):
+            if layerId not in written:
+                written.append(layerId)
+            if len(written) > 1:
+                raise RuntimeError('write failed')
+            writeWeights(layerId, influenceIndex, weights)
+
+        destMll.setInfluenceWeights = failOnSecondLayer
+        layerIds = self.scene.getLayerIds()
+        with self.assertRaises(RuntimeError):
+            self.createSession().copyLayers(layerIds, incremental=True)
+
+        self.assertEqual(self.cmds.openWindows, 0)
+
+        # the first layer is recorded as copied, the failed one has to be copied again
+        session = self.createSession()
+        record = copyRecord.readCopyRecord(DEST_SKIN)
+        copied = copyRecord.getCopiedLayers(record, session.srcSkn, session.getParameterHash())
+        self.assertIsNotNone(copied[layerIds[0]][0])
+        self.assertIsNone(copied[layerIds[1]][0])
+        self.assertEqual(copied[layerIds[1]][1], written[1])
+
+        # which reuses the layer it was written to
+        destMll.setInfluenceWeights = writeWeights
+        destLayerIds = session.copyLayers(layerIds, incremental=True)
+        self.assertEqual(destLayerIds[:2], written)
+
+
+if __name__ == '__main__':
+    unittest.main()
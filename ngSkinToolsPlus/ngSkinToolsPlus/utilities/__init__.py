@@ -1,10 +1,9 @@
 from ngSkinTools.mllInterface import MllInterface
-from ngSkinTools.importExport import LayerData, Layer, Influence
-from ngSkinTools.importExport import XmlImporter
+from ngSkinToolsPlus.lib.influenceNames import RenameRules, compileRules, getInfluenceNames, getSceneResolver, getShortName
+from ngSkinToolsPlus.lib.lazyLayerData import LazyLayerData
+from ngSkinToolsPlus.lib.masks import LayerMask
 import maya.cmds as cmds
 
-import pymel.core as pm
-
 '''
 Quick hacks just to get the job done when needed. Should be modularized properly some time...
 '''
@@ -27,20 +26,16 @@ def unifyMask(vertsList, mll, layerId):
     '''
     average mask weights on vertsList
     '''
-    maskWts = mll.getLayerMask(layerId)
-    vertsNum = len(vertsList)
-    vertsWeights = [maskWts[vertId] for vertId in vertsList]
-    avgWeight = sum(vertsWeights)/vertsNum
-    for vertId in vertsList:
-        maskWts[vertId] = avgWeight
-    mll.setLayerMask(layerId, maskWts)
+    mask = LayerMask(mll, layerId)
+    mask.unify(vertsList)
+    mask.write()
     
 def reverseMask(mll, layerId):
     '''
     '''
-    maskWts = mll.getLayerMask(layerId)
-    revMaskWts = [1-wt for wt in maskWts]
-    mll.setLayerMask(layerId, revMaskWts)
+    mask = LayerMask(mll, layerId)
+    mask.reverse()
+    mask.write()
     
     
     
@@ -54,107 +49,97 @@ def loadXmlFile(filepath):
     '''
     # example process for importing XML data
     filepath = r"C:\Users\Leon\Documents\maya\projects\Ori\scenes\ori_body_weights_v037.xml"
-    xml = loadXmlFile(filepath)
-    from ngSkinTools.importExport import XmlImporter
-    # create layers from
-    importer = XmlImporter()
-    # load layer data
-    data = importer.process(xml)
-    '''
-    f = open(filepath, 'r')
-    try:
-        contents = ''.join(f.readlines())
-    finally:
-        f.close();
+    data = loadXmlFile(filepath)
     
-    importer = XmlImporter()
-    data = importer.process(contents)
-    return data
+    all layers are parsed up front into sparse weights,
+    weight lists are built when an influence is used
+    (see lib.lazyLayerData for loading large files through a layer file instead)
+    '''
+    return LazyLayerData.fromXml(filepath)
 
 def findUnmatchedInfluences(data, printOut=True):
     '''
     parse data and find unmatchable influences
+    (influences that don't exist in the scene under their stored name)
     
     findUnmatchedInfluences(data)
     '''
-    unmatched = []
-    for influence in data.getAllInfluences():
-        if not pm.objExists(influence):
-            unmatched.append(influence.split('|')[-1])
+    resolver = getSceneResolver()
+    unmatched = [getShortName(name) for name in getInfluenceNames(data) if not resolver.exists(name)]
     if printOut:
         print unmatched
     return unmatched
 
-def matchInfluencesByNodeName(data):
+def matchInfluencesByNodeName(data, printOut=True):
     '''
     match influences by nodeName
-    assumes all influence names are unique
+    (falls back to the name without namespaces if no node has the same name)
+    influences that match several nodes, or none, are left unchanged
+    returns (ambiguous {name: candidates}, missing [names])
     
     matchInfluencesByNodeName(data)
     data.saveTo('GEO:CT_body_geo')
     '''
+    resolved, ambiguous, missing = getSceneResolver().resolveLayerData(data)
     for layer in data.layers:
         for influence in layer.influences:
-            oldLongName = influence.influenceName
-            shortName = oldLongName.split('|')[-1]
-            newLongName = cmds.ls(shortName, l=True)[0]
-            influence.influenceName = newLongName
+            influence.influenceName = resolved.get(influence.influenceName, influence.influenceName)
+    
+    if printOut:
+        for name, candidates in ambiguous.items():
+            print 'Ambiguous influence %s: %s' % (name, ', '.join(candidates))
+        for name in missing:
+            print 'Missing influence %s' % name
+    return ambiguous, missing
 
-def editJson(jsonDict):
-    for eachLayer in jsonDict["layers"]:
-        print eachLayer["name"]
-        for eachInf in eachLayer["influences"]:
-            print eachInf["name"]
-            name = eachInf["name"]
-            shortName = name.split('|')[-1]
-            print shortName
-            replacedName = shortName.replace('CT_', 'CT_lips_')
-            replacedName = shortName.replace('LT_', 'LT_lips_')
-            replacedName = shortName.replace('RT_', 'RT_lips_')
-            eachInf["name"] = replacedName
+# rules editJson and editLayerData were written for
+LIPS_RULES = [('prefix', 'CT_', 'CT_lips_'),
+              ('prefix', 'LT_', 'LT_lips_'),
+              ('prefix', 'RT_', 'RT_lips_')]
 
-def editLayerData(data):
-    for eachLayer in data.layers:
-        print eachLayer.name
-        for eachInfluence in eachLayer.influences:
-            print eachInfluence.influenceName
-            oldLongName = eachInfluence.influenceName
-            oldShortName = oldLongName.split('|')[-1]
-            print oldShortName
-            newShortName = oldShortName.replace('T_', 'T_lips_')
-            print newShortName
-            newLongName = cmds.ls(newShortName, l=True)[0]
-            print newLongName
-            eachInfluence.influenceName = newLongName
+# compiled once, so renamed names stay memoized between calls
+LIPS_RENAME_RULES = compileRules(LIPS_RULES)
+
+def getRenameRules(rules=None):
+    '''
+    rules - RenameRules, or (type, old, new) specs (see lib.influenceNames.compileRules),
+            None for LIPS_RULES
+    '''
+    if rules is None:
+        return LIPS_RENAME_RULES
+    if isinstance(rules, RenameRules):
+        return rules
+    return compileRules(rules)
+
+def editJson(jsonDict, rules=None, dryRun=False):
+    '''
+    renames influences in the JSON dict structure (rules as in getRenameRules)
+    returns RenameResult, print result.format() for a report
+    '''
+    return getRenameRules(rules).applyToJson(jsonDict, dryRun=dryRun)
+
+def editLayerData(data, rules=None, dryRun=False):
+    '''
+    renames influences in LayerData, and maps new names to long names of scene nodes
+    (rules as in getRenameRules)
+    returns RenameResult, print result.format() for a report
+    '''
+    return getRenameRules(rules).applyToLayerData(data, getSceneResolver(), dryRun=dryRun)
 
 def selectInfluencesInLayerData(data):
+    '''
+    selects all influences of all layers, in one select call
+    (weights of lazy data are not decoded)
+    '''
     cmds.select(cl=True)
-    for eachLayer in data.layers:
-        print eachLayer.name
-        for eachInfluence in eachLayer.influences:
-            print eachInfluence.influenceName
-            cmds.select(eachInfluence.influenceName, add=True)
+    names = getInfluenceNames(data)
+    if names:
+        cmds.select(names, add=True)
 
 def retModel(jsonDict):
-    model = LayerData()
-    
-    if jsonDict.has_key("manualInfluenceOverrides"):
-        model.mirrorInfluenceAssociationOverrides = jsonDict['manualInfluenceOverrides']
-    
-    for layerData in jsonDict["layers"]:
-        layer = Layer()
-        model.addLayer(layer)        
-        layer.enabled = layerData['enabled']
-        layer.mask = layerData['mask']
-        layer.name = layerData['name']
-        layer.opacity = layerData['opacity']
-        layer.influences = []
-
-        for influenceData in layerData['influences']:
-            influence = Influence()
-            layer.addInfluence(influence)
-            influence.weights = influenceData['weights']
-            influence.logicalIndex = influenceData['index']
-            influence.influenceName = influenceData['name']
-    
-    return model
\ No newline at end of file
+    '''
+    builds LayerData view of the JSON dict structure
+    (binary layer files convert to and from the same structure, see lib.layerFile)
+    weight lists are shared with jsonDict, not copied
+    '''
+    return LazyLayerData.fromJsonDict(jsonDict)
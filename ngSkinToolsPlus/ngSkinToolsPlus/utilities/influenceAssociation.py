@@ -3,48 +3,246 @@ Created on 01/09/2013
 
 @author: Leon
 '''
+import maya.cmds as mc
+import numpy as np
+
+from ngSkinToolsPlus.lib.bvh import BVH
+
+# joint.type of joints without a label
+JOINT_TYPE_NONE = 0
+
+class InfluenceInfo(object):
+    '''
+    positions, bones and labels of influences,
+    used by the spatial and label association methods
+    '''
+
+    def __init__(self, positions, parentPositions, labels):
+        '''
+        positions - (n x 3) world positions of influences
+        parentPositions - (n x 3) world positions of parent joints
+                          (nan if influence has no parent joint).
+                          a bone is the segment from parent to influence
+        labels - list of (side, type, otherType) joint labels
+                 (None for influences without labels)
+        '''
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.parentPositions = np.asarray(parentPositions, dtype=np.float64).reshape(-1, 3)
+        self.labels = list(labels)
+
+    @classmethod
+    def fromScene(cls, influenceNames):
+        '''
+        reads influence info from the scene
+        '''
+        positions = []
+        parentPositions = []
+        labels = []
+        for name in influenceNames:
+            positions.append(mc.xform(name, q=True, ws=True, t=True))
+
+            parents = mc.listRelatives(name, parent=True, type='joint', fullPath=True)
+            if parents:
+                parentPositions.append(mc.xform(parents[0], q=True, ws=True, t=True))
+            else:
+                parentPositions.append([np.nan] * 3)
+
+            if mc.nodeType(name) == 'joint':
+                labels.append((mc.getAttr(name + '.side'), mc.getAttr(name + '.type'),
+                               mc.getAttr(name + '.otherType')))
+            else:
+                labels.append(None)
+
+        return cls(positions, parentPositions, labels)
+
 
 class InfluenceAssociation():
     '''
-    classdocs
+    Matches influences of a source skin to influences of a destination skin.
     '''
 
-    def __init__(self, srcInfluences, destInfluences, method):
+    def __init__(self, srcInfluences, destInfluences, method, srcInfo=None, destInfo=None):
         '''
         srcInfluences and destInfluences are iterators returned
         from mll.listLayerInfluences(layerId, activeInfluences=False)
         (activeInfluences should be set to False, in case we
         need to match to influences that are currently inactive.)
-        
+
         method - match by "name", "label", "closestJoint",
                             "closestBone", or "oneToOne"
+                 or a list of methods, in order of priority.
+                 influences that are not matched by the first method
+                 are matched by the second, and so on (None entries are skipped)
+
+        srcInfo, destInfo [InfluenceInfo] - needed by "label", "closestJoint" and
+                 "closestBone". read from the scene if not given.
         '''
-        
+        srcInfluences = list(srcInfluences)
+        destInfluences = list(destInfluences)
+
+        self.srcNames = [influenceName for influenceName, _ in srcInfluences]
+        self.srcIndices = np.array([influenceIndex for _, influenceIndex in srcInfluences], dtype=np.int64)
+        self.destNames = [influenceName for influenceName, _ in destInfluences]
+        self.destIndices = np.array([influenceIndex for _, influenceIndex in destInfluences], dtype=np.int64)
+
+        self.srcInfo = srcInfo
+        self.destInfo = destInfo
+
+        if isinstance(method, basestring):
+            methods = [method]
+        else:
+            methods = [eachMethod for eachMethod in method if eachMethod]
+
+        # mapping[i] is the position in destInfluences matched to srcInfluences[i], or -1
+        self.mapping = np.full(len(srcInfluences), -1, dtype=np.int64)
+        for eachMethod in methods:
+            unmatched = self.mapping < 0
+            if not unmatched.any():
+                break
+            candidates = self.match(eachMethod)
+            self.mapping[unmatched] = candidates[unmatched]
+
         # create a dictionary with the format -
         # {influenceIndex on srcMll : influenceIndex on destMll,...}
-        self.matchDict = {}
-        
+        matched = self.mapping >= 0
+        self.matchDict = dict(zip(self.srcIndices[matched].tolist(),
+                                  self.destIndices[self.mapping[matched]].tolist()))
+
+    def match(self, method):
+        '''
+        returns array of dest positions for every src influence (-1 where unmatched)
+        '''
         if method == 'name':
-            self.matchByName(srcInfluences, destInfluences)
-            
-    
-    def matchByName(self, srcInfluences, destInfluences):
+            return self.matchByName()
+        if method == 'label':
+            return self.matchByLabel()
+        if method == 'closestJoint':
+            return self.matchByClosestJoint()
+        if method == 'closestBone':
+            return self.matchByClosestBone()
+        if method == 'oneToOne':
+            return self.matchOneToOne()
+        raise ValueError('Unknown influence association: %s' % method)
+
+    def getInfo(self):
+        '''
+        returns srcInfo, destInfo (reading them from the scene on first use)
+        '''
+        if self.srcInfo is None:
+            self.srcInfo = InfluenceInfo.fromScene(self.srcNames)
+        if self.destInfo is None:
+            self.destInfo = InfluenceInfo.fromScene(self.destNames)
+        return self.srcInfo, self.destInfo
+
+    def matchByName(self):
         '''
         '''
-        srcDict = {}
-        for influenceName, influenceIndex in srcInfluences:
-            srcDict[influenceIndex] = influenceName
-        
         destDict = {}
-        for influenceName, influenceIndex in destInfluences:
-            destDict[influenceName] = influenceIndex
-        
-        for influenceIndex, influenceName in srcDict.items():
-            # search for the same name in destDict
-            if influenceName in destDict.keys():
-                # index of srcInfluence = index of destInfluence
-                self.matchDict[influenceIndex] = destDict[influenceName]
-                
+        for position, influenceName in enumerate(self.destNames):
+            destDict.setdefault(influenceName, position)
+
+        return np.array([destDict.get(influenceName, -1) for influenceName in self.srcNames], dtype=np.int64)
+
+    def matchByLabel(self):
+        '''
+        match joints with the same side, type and other type labels
+        joints without a label are left to the next method,
+        a label shared by several destination joints goes to the closest one
+        '''
+        srcInfo, destInfo = self.getInfo()
+
+        destDict = {}
+        for position, label in enumerate(destInfo.labels):
+            if isLabeled(label):
+                destDict.setdefault(tuple(label), []).append(position)
+
+        mapping = np.full(len(self.srcNames), -1, dtype=np.int64)
+        for srcPosition, label in enumerate(srcInfo.labels):
+            candidates = destDict.get(tuple(label), []) if isLabeled(label) else []
+            if len(candidates) == 1:
+                mapping[srcPosition] = candidates[0]
+            elif candidates:
+                delta = destInfo.positions[candidates] - srcInfo.positions[srcPosition]
+                mapping[srcPosition] = candidates[np.argmin(np.einsum('ij,ij->i', delta, delta))]
+        return mapping
+
+    def matchByClosestJoint(self):
+        '''
+        match each influence to the closest destination influence
+        '''
+        srcInfo, destInfo = self.getInfo()
+        if not len(destInfo.positions) or not len(srcInfo.positions):
+            return np.full(len(self.srcNames), -1, dtype=np.int64)
+
+        destPositions = destInfo.positions
+        srcPositions = srcInfo.positions
+
+        def measure(queryIds, pointIds):
+            delta = destPositions[pointIds] - srcPositions[queryIds]
+            return np.einsum('ij,ij->i', delta, delta)
+
+        positions, _ = BVH(destPositions, destPositions, leafSize=4).nearest(srcPositions, measure)
+        return positions
+
+    def matchByClosestBone(self):
+        '''
+        match each influence to the destination influence with the closest bone,
+        measured from the middle of the source bone
+        '''
+        srcInfo, destInfo = self.getInfo()
+        if not len(destInfo.positions) or not len(srcInfo.positions):
+            return np.full(len(self.srcNames), -1, dtype=np.int64)
+
+        srcPoints = boneMidpoints(srcInfo)
+        boneStarts, boneEnds = boneSegments(destInfo)
+
+        # (src x dest) distances; influence counts are small enough for a full matrix
+        distances = sqDistanceToSegments(srcPoints[:, None], boneStarts[None], boneEnds[None])
+        return np.argmin(distances, axis=1)
+
+    def matchOneToOne(self):
+        '''
+        match influences by their order in the skinCluster
+        '''
+        mapping = np.full(len(self.srcNames), -1, dtype=np.int64)
+        count = min(len(self.srcNames), len(self.destNames))
+        mapping[:count] = np.arange(count)
+        return mapping
+
     def __getitem__(self, srcIndex):
         return self.matchDict[srcIndex]
-                
\ No newline at end of file
+
+
+def isLabeled(label):
+    '''
+    returns True for labels of joints with a type (joints without one all share the default label)
+    '''
+    return label is not None and label[1] != JOINT_TYPE_NONE
+
+
+def boneSegments(info):
+    '''
+    start and end of each bone; influences without parent joint are a single point
+    '''
+    starts = np.where(np.isnan(info.parentPositions), info.positions, info.parentPositions)
+    return starts, info.positions
+
+
+def boneMidpoints(info):
+    '''
+    '''
+    starts, ends = boneSegments(info)
+    return (starts + ends) * 0.5
+
+
+def sqDistanceToSegments(points, starts, ends):
+    '''
+    squared distance from points to segments (start, end), with broadcasting
+    '''
+    segments = ends - starts
+    lengths = (segments * segments).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(lengths > 0, ((points - starts) * segments).sum(axis=-1) / lengths, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    delta = starts + segments * t[..., None] - points
+    return (delta * delta).sum(axis=-1)
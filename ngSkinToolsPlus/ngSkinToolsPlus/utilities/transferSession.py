@@ -0,0 +1,497 @@
+'''
+Created on Oct 17, 2026
+
+@author: Leon
+'''
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+
+from ngSkinToolsPlus.lib.copyRecord import getCopiedLayers, readCopyRecord, setCopiedLayers, writeCopyRecord
+from ngSkinToolsPlus.lib.layerWeights import SparseLayerWeights
+from ngSkinToolsPlus.lib.meshData import getCachedMeshData, getCachedMeshUvs
+from ngSkinToolsPlus.lib.parallel import getProcessCount, mapTasks, shareCsr
+from ngSkinToolsPlus.lib.profiling import profiler
+from ngSkinToolsPlus.lib.transferWorkers import (SourceMesh, associateInWorker, initLayerWorker, initWorker,
+                                                 shareLayers, transferLayerInWorker, transferSparseLayer)
+from ngSkinToolsPlus.utilities.influenceAssociation import InfluenceAssociation
+
+# surface associations that SurfaceAssociation can compute natively
+NATIVE_SURFACE_ASSOCIATIONS = ('closestPoint', 'rayCast', 'closestComponent', 'uvSpace')
+
+# influence associations that InfluenceAssociation can compute natively
+NATIVE_INFLUENCE_ASSOCIATIONS = ('name', 'label', 'closestJoint', 'closestBone', 'oneToOne')
+
+# SurfaceAssociations of recently copied mesh pairs,
+# keyed on (srcMesh key, destMesh key, method, uv hashes)
+MAX_CACHED_ASSOCIATIONS = 8
+surfaceAssociationCache = OrderedDict()
+
+
+def clearCache():
+    '''
+    forget all cached surface associations
+    '''
+    surfaceAssociationCache.clear()
+
+
+def getCacheKey(srcMeshData, destMeshData, method, srcUvs=None, destUvs=None):
+    '''
+    identifies a SurfaceAssociation by mesh contents
+    '''
+    uvKey = (srcUvs.uvHash, destUvs.uvHash) if method == 'uvSpace' else None
+    return srcMeshData.getKey(), destMeshData.getKey(), method, uvKey
+
+
+def storeSurfaceAssociation(key, association):
+    '''
+    adds association to the cache, dropping the oldest ones
+    '''
+    surfaceAssociationCache[key] = association
+    while len(surfaceAssociationCache) > MAX_CACHED_ASSOCIATIONS:
+        surfaceAssociationCache.popitem(last=False)
+
+
+def getSurfaceAssociation(srcMeshData, destMeshData, method, srcUvs=None, destUvs=None):
+    '''
+    returns (cached) SurfaceAssociation between two meshes
+    srcUvs, destUvs [MeshUvs] - needed for "uvSpace" method
+    '''
+    key = getCacheKey(srcMeshData, destMeshData, method, srcUvs, destUvs)
+    if key in surfaceAssociationCache:
+        return surfaceAssociationCache[key]
+
+    association = SourceMesh(srcMeshData, srcUvs).associate(destMeshData, method, destUvs)
+    storeSurfaceAssociation(key, association)
+    return association
+
+
+class TransferSession(object):
+    '''
+    Copies layers from one mesh to another.
+
+    The vertex and influence correspondence between the two meshes is
+    computed once, and then applied to the influence weights and masks
+    of every copied layer.
+
+    example use:
+    srcMll = MllInterface()
+    srcMll.setCurrentMesh('body_geo')
+    destMll = MllInterface()
+    destMll.setCurrentMesh('shirt_geo')
+
+    session = TransferSession(srcMll, destMll, ['name', None, None], 'closestPoint')
+    session.copyLayers([1, 2, 3])
+    '''
+
+    def __init__(self, srcMll, destMll, influenceAssociation, surfaceAssociation,
+                 sampleSpace=0, normalize=True, uv=None, sourceLayers=None,
+                 pruneThreshold=0.0, processes=1):
+        '''
+        arguments are the same as copySkinLayers.copySkinLayers
+        sourceLayers - {layerId: SparseLayerWeights} of srcMll, shared between sessions
+                       with the same source (filled on first use)
+        pruneThreshold - transferred weights at or below this are dropped (before normalizing)
+        processes - number of worker processes transferring layers
+                    (1 to compute in Maya, None for one per cpu, see lib.parallel)
+        '''
+        # calls are counted while profiling
+        self.srcMll = profiler.wrap(srcMll, 'srcMll')
+        self.destMll = profiler.wrap(destMll, 'destMll')
+        self.influenceAssociation = [method for method in influenceAssociation if method]
+        self.surfaceAssociation = surfaceAssociation
+        self.sampleSpace = sampleSpace
+        self.normalize = normalize
+        self.uv = uv
+        self.pruneThreshold = pruneThreshold
+        self.processes = processes
+
+        self.srcMeshName, self.srcSkn = srcMll.getTargetInfo()
+        self.destMeshName, self.destSkn = destMll.getTargetInfo()
+
+        self.sourceLayers = {} if sourceLayers is None else sourceLayers
+
+        # computed on first use
+        self.meshes = None
+        self.association = None
+        self.influenceMapping = None
+        self.destInfluences = None
+        self.parameterHash = None
+
+    def isSupported(self):
+        '''
+        returns True if the chosen association methods
+        can be computed without copySkinWeights
+        '''
+        if self.getSurfaceMethod() not in NATIVE_SURFACE_ASSOCIATIONS:
+            return False
+        for method in self.influenceAssociation:
+            if method not in NATIVE_INFLUENCE_ASSOCIATIONS:
+                return False
+        return True
+
+    def getSurfaceMethod(self):
+        '''
+        surface association used for the vertex correspondence
+        (copySkinWeights uses closestPoint with uv sets for UV space)
+        '''
+        if self.uv:
+            return 'uvSpace'
+        return self.surfaceAssociation
+
+    def getMeshes(self):
+        '''
+        returns (srcMeshData, destMeshData, srcUvs, destUvs), read from the scene on first use
+        (uvs are None unless needed)
+        '''
+        if self.meshes is None:
+            srcMeshData = getCachedMeshData(self.srcMeshName, self.sampleSpace)
+            destMeshData = getCachedMeshData(self.destMeshName, self.sampleSpace)
+            srcUvs = destUvs = None
+            if self.getSurfaceMethod() == 'uvSpace':
+                srcUvs = getCachedMeshUvs(self.srcMeshName, self.uv[0])
+                destUvs = getCachedMeshUvs(self.destMeshName, self.uv[1])
+            self.meshes = srcMeshData, destMeshData, srcUvs, destUvs
+        return self.meshes
+
+    def getSurfaceAssociation(self):
+        '''
+        '''
+        if self.association is None:
+            srcMeshData, destMeshData, srcUvs, destUvs = self.getMeshes()
+            self.association = getSurfaceAssociation(srcMeshData, destMeshData, self.getSurfaceMethod(), srcUvs, destUvs)
+        return self.association
+
+    def getInfluenceMapping(self):
+        '''
+        returns {influenceIndex on srcMll : influenceIndex on destMll}
+        '''
+        if self.influenceMapping is None:
+            srcInfluences = list(self.srcMll.listLayerInfluences(0, False))
+            self.destInfluences = list(self.destMll.listLayerInfluences(0, False))
+
+            # methods are evaluated in order of priority
+            matcher = InfluenceAssociation(srcInfluences, self.destInfluences, self.influenceAssociation)
+            self.influenceMapping = matcher.matchDict
+
+        return self.influenceMapping
+
+    def getSourceLayer(self, layerId):
+        '''
+        returns SparseLayerWeights of layerId on srcMll (read on first use)
+        '''
+        if layerId not in self.sourceLayers:
+            self.sourceLayers[layerId] = SparseLayerWeights.fromMll(self.srcMll, layerId)
+        return self.sourceLayers[layerId]
+
+    def getDestInfluenceNames(self):
+        '''
+        returns {influenceIndex on destMll: influenceName}
+        '''
+        self.getInfluenceMapping()
+        return dict((influenceIndex, influenceName) for influenceName, influenceIndex in self.destInfluences)
+
+    def transferLayer(self, layerId):
+        '''
+        returns SparseLayerWeights of layerId, mapped onto destination mesh
+        '''
+        return transferSparseLayer(self.getSourceLayer(layerId), self.getSurfaceAssociation(),
+                                   self.getInfluenceMapping(), self.getDestInfluenceNames(),
+                                   self.normalize, self.pruneThreshold)
+
+    def transferLayers(self, layerIds):
+        '''
+        returns SparseLayerWeights of all layerIds, mapped onto destination mesh
+        layers are transferred in parallel by a process pool. source weights
+        and the interpolation matrix are handed to the workers in shared memory,
+        only the transferred layers are sent back
+        '''
+        layerIds = list(layerIds)
+        if getProcessCount(self.processes, len(layerIds)) <= 1:
+            return [self.transferLayer(layerId) for layerId in layerIds]
+
+        association = self.getSurfaceAssociation()
+        if association.transposedMatrix is None:
+            association.transposedMatrix = association.matrix.transpose()
+
+        initargs = (shareLayers([self.getSourceLayer(layerId) for layerId in layerIds]),
+                    shareCsr(association.matrix), shareCsr(association.transposedMatrix),
+                    self.getInfluenceMapping(), self.getDestInfluenceNames(),
+                    self.normalize, self.pruneThreshold)
+        return mapTasks(transferLayerInWorker, range(len(layerIds)), self.processes, initLayerWorker, initargs)
+
+    def transferMask(self, mask):
+        '''
+        maps mask weights of source mesh onto destination mesh
+        uninitialized masks ([]) stay uninitialized
+        '''
+        if not len(mask):
+            return []
+        return np.clip(self.getSurfaceAssociation().transfer(mask), 0.0, 1.0).tolist()
+
+    def getParameterHash(self):
+        '''
+        hash of everything besides the layers that changes transferred weights:
+        association options, mesh contents, and the resulting influence mapping
+        '''
+        if self.parameterHash is not None:
+            return self.parameterHash
+        srcMeshData, destMeshData, _, _ = self.getMeshes()
+        parameters = (self.influenceAssociation, self.getSurfaceMethod(), self.sampleSpace,
+                      bool(self.normalize), self.uv, self.pruneThreshold,
+                      srcMeshData.getKey(), destMeshData.getKey(),
+                      sorted(self.getInfluenceMapping().items()), sorted(self.getDestInfluenceNames().items()))
+        self.parameterHash = hashlib.sha1(repr(parameters).encode('utf-8')).hexdigest()
+        return self.parameterHash
+
+    def planCopy(self, layerIds, incremental=False):
+        '''
+        compares layerIds with the copy record of destMll
+        returns (destLayerIds, changed, copied):
+            destLayerIds - destination layer to update per layerId (None for a new layer)
+            changed - layerIds that have to be transferred
+            copied - {srcLayerId: [layerHash, destLayerId]} for the updated record
+        without incremental, every layer is transferred to a new layer
+        '''
+        parameters = self.getParameterHash()
+        copied = getCopiedLayers(readCopyRecord(self.destSkn), self.srcSkn, parameters)
+        existing = set(layerId for layerId, _ in self.destMll.listLayers())
+
+        destLayerIds = []
+        changed = []
+        for layerId in layerIds:
+            layerHash = self.getSourceLayer(layerId).contentHash()
+            previousHash, destLayerId = copied.get(layerId, (None, None))
+            if not incremental or destLayerId not in existing:
+                destLayerId = None
+            if destLayerId is None or previousHash != layerHash:
+                changed.append(layerId)
+            destLayerIds.append(destLayerId)
+            copied[layerId] = [layerHash, destLayerId]
+
+        return destLayerIds, changed, copied
+
+    def copyLayer(self, layerId, incremental=False):
+        '''
+        copies layerId to a new layer on destination mesh
+        (or updates the layer it was copied to before, see copyLayers)
+        returns id of the destination layer
+        '''
+        return self.copyLayers([layerId], incremental)[0]
+
+    def copyLayers(self, layerIds, incremental=False):
+        '''
+        copies all layerIds, in the given order
+        layers are transferred in parallel, then written to destMll one by one
+        (see CopyLayersJob to copy without blocking Maya)
+
+        incremental - layers that were copied to destMll before are updated in place,
+                      and only if they (or the copy parameters) changed since.
+                      copied layers are recorded on the destination skinCluster either way
+        returns ids of destination layers
+        '''
+        job = CopyLayersJob(self, layerIds, incremental)
+        job.extract()
+        try:
+            with job.scope(), profiler.phase('Transfer layers'):
+                layers = self.transferLayers(job.changed)
+            for layerId, layer in zip(job.changed, layers):
+                job.apply(layerId, layer)
+        except Exception:
+            # record the layers written so far, and close the progress window
+            job.finish(cancelled=True)
+            raise
+        job.finish()
+        return job.destLayerIds
+
+
+class CopyLayersJob(object):
+    '''
+    TransferSession.copyLayers, split in the phases of lib.scheduler.Scheduler:
+    everything is read from the scene up front, layers are transferred one by one
+    (without touching the scene), and written to destMll one by one
+
+    example use:
+    job = CopyLayersJob(session, [1, 2, 3], cancellable=True)
+    scheduler = Scheduler(job, isCancelled=profiler.isCancelled)
+    scheduler.start()
+    '''
+
+    def __init__(self, session, layerIds, incremental=False, cancellable=False):
+        '''
+        session [TransferSession]
+        incremental - see TransferSession.copyLayers
+        cancellable - the progress window can be cancelled
+        '''
+        self.session = session
+        self.layerIds = list(layerIds)
+        self.incremental = incremental
+        self.cancellable = cancellable
+
+        # set by extract
+        self.destLayerIds = None
+        self.changed = None
+        self.copied = None
+        # layerIds written to destMll so far
+        self.applied = []
+
+    def scope(self, layer=''):
+        return profiler.scope(source=self.session.srcMeshName, destination=self.session.destMeshName, layer=layer)
+
+    def extract(self):
+        '''
+        reads meshes, influences and source layers
+        returns layerIds that have to be transferred
+        '''
+        with self.scope():
+            profiler.beginProgress('Copy layers: %s' % self.session.destMeshName, len(self.layerIds) + 3, self.cancellable)
+            try:
+                with profiler.phase('Read layers'):
+                    self.session.getMeshes()
+                    self.destLayerIds, self.changed, self.copied = self.session.planCopy(self.layerIds, self.incremental)
+            except Exception:
+                profiler.endProgress()
+                raise
+        return list(self.changed)
+
+    def compute(self, layerId):
+        '''
+        returns SparseLayerWeights of layerId, mapped onto destination mesh
+        '''
+        return self.session.transferLayer(layerId)
+
+    def apply(self, layerId, layer):
+        '''
+        writes transferred layer to a new layer on destMll, or to the one it was copied to before
+        '''
+        destMll = self.session.destMll
+        with self.scope(layer.name), profiler.phase('Set layer weights', status='Set layer weights: %s' % layer.name):
+            position = self.layerIds.index(layerId)
+            destLayerId = self.destLayerIds[position]
+            if destLayerId is None:
+                destLayerId = destMll.createLayer(layer.name, forceEmpty=True)
+                # recorded before writing, so a failed write is replaced by the next copy
+                self.destLayerIds[position] = destLayerId
+                self.copied[layerId][1] = destLayerId
+                layer.toMll(destMll, destLayerId)
+            else:
+                layer.toMll(destMll, destLayerId, replace=True)
+        self.applied.append(layerId)
+
+    def finish(self, cancelled=False):
+        '''
+        records copied layers on the destination skinCluster, and closes the progress window
+        layers that were not written (cancelled) are copied again next time
+        '''
+        session = self.session
+        unchanged = []
+        for layerId in self.layerIds:
+            if layerId not in self.changed:
+                unchanged.append(session.getSourceLayer(layerId).name)
+            elif layerId not in self.applied:
+                self.copied[layerId][0] = None
+        if cancelled:
+            profiler.warning('Copy cancelled, %d of %d layers copied' % (len(self.applied), len(self.changed)))
+
+        status = 'Write copy record'
+        if unchanged:
+            status += ' (unchanged: %s)' % ', '.join(unchanged)
+        with self.scope():
+            try:
+                with profiler.phase('Write copy record', status=status):
+                    record = readCopyRecord(session.destSkn)
+                    setCopiedLayers(record, session.srcSkn, session.getParameterHash(), self.copied)
+                    writeCopyRecord(session.destSkn, record)
+            finally:
+                profiler.endProgress()
+
+
+class BatchTransferSession(object):
+    '''
+    Copies layers from one mesh to many meshes.
+
+    Source layers are read, and the source mesh's spatial search structure
+    is built, once for all destinations. The vertex correspondences of the
+    destinations are computed in parallel by a process pool.
+
+    example use:
+    batch = BatchTransferSession(srcMll, [shirtMll, shirtLod1Mll, pantsMll], ['name'], 'closestPoint')
+    batch.copyLayers([1, 2, 3])
+    '''
+
+    def __init__(self, srcMll, destMlls, influenceAssociation, surfaceAssociation,
+                 sampleSpace=0, normalize=True, uv=None, processes=1):
+        '''
+        arguments are the same as TransferSession, with a list of destMlls
+        uv - (srcUvSet, destUvSet), destUvSet is used on all destinations
+        processes - number of worker processes, used for destination mappings
+                    and layer transfers (1 to compute in Maya, None for one per cpu)
+        '''
+        self.srcMll = srcMll
+        self.sampleSpace = sampleSpace
+        self.uv = uv
+        self.processes = processes
+
+        self.sourceLayers = {}
+        self.sessions = [TransferSession(srcMll, destMll, influenceAssociation, surfaceAssociation,
+                                         sampleSpace, normalize, uv, self.sourceLayers, processes=processes)
+                         for destMll in destMlls]
+
+    def isSupported(self):
+        '''
+        returns True if the chosen association methods
+        can be computed without copySkinWeights
+        '''
+        return all(session.isSupported() for session in self.sessions)
+
+    def computeAssociations(self, sessions=None):
+        '''
+        computes surface associations of all destinations that aren't cached yet
+        sessions - only compute these sessions' associations (default all)
+        '''
+        sessions = self.sessions if sessions is None else sessions
+        pending = [session for session in sessions if session.association is None]
+        if not pending:
+            return
+
+        method = pending[0].getSurfaceMethod()
+        srcMeshName = pending[0].srcMeshName
+        srcMeshData = getCachedMeshData(srcMeshName, self.sampleSpace)
+        srcUvs = getCachedMeshUvs(srcMeshName, self.uv[0]) if method == 'uvSpace' else None
+
+        # meshes with the same contents (e.g. duplicated variants) are computed once
+        associations = {}
+        tasks = OrderedDict()
+        sessionKeys = []
+        for session in pending:
+            destMeshData = getCachedMeshData(session.destMeshName, self.sampleSpace)
+            destUvs = getCachedMeshUvs(session.destMeshName, self.uv[1]) if method == 'uvSpace' else None
+            key = getCacheKey(srcMeshData, destMeshData, method, srcUvs, destUvs)
+            sessionKeys.append(key)
+            if key in surfaceAssociationCache:
+                associations[key] = surfaceAssociationCache[key]
+            elif key not in tasks:
+                tasks[key] = (destMeshData, method, destUvs)
+
+        results = mapTasks(associateInWorker, tasks.values(), self.processes, initWorker, (srcMeshData, srcUvs))
+        for key, association in zip(tasks.keys(), results):
+            storeSurfaceAssociation(key, association)
+            associations[key] = association
+
+        for session, key in zip(pending, sessionKeys):
+            session.association = associations[key]
+
+    def copyLayers(self, layerIds, incremental=False):
+        '''
+        copies all layerIds to every destination
+        incremental - see TransferSession.copyLayers
+        returns ids of destination layers, per destination
+        '''
+        layerIds = list(layerIds)
+        sessions = self.sessions
+        if incremental:
+            # destinations that are up to date don't need an association
+            sessions = [session for session in sessions if session.planCopy(layerIds, True)[1]]
+        self.computeAssociations(sessions)
+        return [session.copyLayers(layerIds, incremental) for session in self.sessions]